@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Asyncio Test Runner
+Executes JSON-based API tests on an asyncio event loop with aiohttp.
+Plan format, fixtures, placeholders, validation and reports are shared with
+TestRunner, so both engines produce identical results.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+import parameters
+import resilience
+import timing
+from results import TestResult
+from test_runner import ROWS_RECORDED, Colors, SUPPORTED_METHODS, TestRunner, main as run_cli
+
+try:
+    import aiohttp
+    from multidict import CIMultiDict
+except ImportError:
+    aiohttp = None
+
+
+class BufferedResponse:
+    """Fully read aiohttp response exposing the parts of requests.Response used for validation"""
+
+    def __init__(self, status: int, headers, content: bytes, encoding: str = None,
+                 headers_time: float = None, download_ms: float = 0.0):
+        self.status_code = status
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.headers_time = headers_time  # perf_counter() when the response headers arrived
+        self.download_ms = download_ms
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class AsyncTestRunner(TestRunner):
+    """Executes TestSprite JSON test plans on asyncio with many requests in flight"""
+
+    in_process_transport = False
+
+    def __init__(self, test_plan_path: str, http_config: Dict = None, workers: int = 100, **options):
+        if aiohttp is None:
+            print(f"{Colors.RED}Error: The async engine requires aiohttp (pip install aiohttp){Colors.RESET}")
+            sys.exit(1)
+        super().__init__(test_plan_path, http_config=http_config, workers=workers, **options)
+        self.host_limits = {}
+
+    def _create_session(self):
+        """aiohttp sessions must be created inside the running event loop"""
+        return None
+
+    def _open_session(self) -> 'aiohttp.ClientSession':
+        """Create the pooled aiohttp session and per-host concurrency limits"""
+        connector = aiohttp.TCPConnector(
+            limit=self.http_config['pool_connections'] * self.http_config['pool_size'],
+            limit_per_host=self.http_config['pool_size'],
+            force_close=not self.http_config['keep_alive']
+        )
+        self.host_limits = {
+            host: asyncio.Semaphore(config.get('pool_size', self.http_config['pool_size']))
+            for host, config in self.http_config['hosts'].items()
+        }
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()]
+        )
+
+    @staticmethod
+    def _trace_config() -> 'aiohttp.TraceConfig':
+        """Record DNS and connection setup into the phases dict passed as trace_request_ctx
+
+        aiohttp reports connection creation as one span (TCP connect and TLS handshake
+        together), so tls_ms stays None and the handshake is included in connect_ms.
+        """
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_dns_start(session, context, params):
+            context.dns_start = time.perf_counter()
+
+        async def on_dns_end(session, context, params):
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx['dns_ms'] += (time.perf_counter() - context.dns_start) * 1000
+
+        async def on_connection_start(session, context, params):
+            context.connection_start = time.perf_counter()
+            context.dns_before = context.trace_request_ctx['dns_ms'] if context.trace_request_ctx else 0.0
+
+        async def on_connection_end(session, context, params):
+            phases = context.trace_request_ctx
+            if phases is not None:
+                elapsed = (time.perf_counter() - context.connection_start) * 1000
+                phases['connect_ms'] += max(0.0, elapsed - (phases['dns_ms'] - context.dns_before))
+
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connection_start)
+        trace_config.on_connection_create_end.append(on_connection_end)
+        return trace_config
+
+    def _host_limit(self, url: str):
+        """Semaphore of the longest matching per-host override, if any"""
+        matches = [host for host in self.host_limits if url.startswith(host)]
+        return self.host_limits[max(matches, key=len)] if matches else None
+
+    async def _send(self, method: str, url: str, headers: Dict, body: Any = None, phases: Dict = None,
+                    endpoint: str = None, guarded: List = None) -> BufferedResponse:
+        """Send a request through the aiohttp session, rate limited and retried by the request guard"""
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        json_body = body if method in ('POST', 'PUT') else None
+        limit = self._host_limit(url)
+
+        # Same bytes requests would send, so both engines share cassette keys
+        body_bytes = json.dumps(json_body).encode('utf-8') if json_body is not None else b''
+        if self.cassette is not None:
+            entry = self.cassette.lookup(method, url, body_bytes)
+            if entry is not None:
+                return BufferedResponse(entry.status, CIMultiDict(entry.headers), entry.body,
+                                        headers_time=time.perf_counter())
+
+        request = self.guard.start(method, url, endpoint)
+        if guarded is not None:
+            guarded.append(request)
+        while True:
+            wait = self.guard.admit(request)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                if limit:
+                    await limit.acquire()
+                try:
+                    async with self.session.request(method, url, headers=headers, json=json_body,
+                                                    trace_request_ctx=phases) as response:
+                        headers_time = time.perf_counter()
+                        content = await response.read()
+                        buffered = BufferedResponse(
+                            response.status, response.headers, content, response.charset,
+                            headers_time=headers_time,
+                            download_ms=(time.perf_counter() - headers_time) * 1000
+                        )
+                finally:
+                    if limit:
+                        limit.release()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                wait = self.guard.failed(request, e)
+                if wait is None:
+                    raise
+            except Exception:
+                self.guard.abandoned(request)
+                raise
+            else:
+                wait = self.guard.completed(request, buffered.status_code, buffered.headers.get('Retry-After'))
+                if wait is None:
+                    if self.cassette is not None:
+                        self.cassette.store(method, url, body_bytes, buffered.status_code, buffered.headers.items(),
+                                            buffered.content)
+                    return buffered
+            await asyncio.sleep(wait)
+
+    async def _run_graph_async(self, deps: Dict, action, workers: int):
+        """Await action(node) for every node once its deps have finished, at most `workers` at once"""
+        slots = asyncio.Semaphore(workers)
+        finished = {node: asyncio.Event() for node in deps}
+
+        async def run_node(node):
+            for dep in deps[node]:
+                await finished[dep].wait()
+            async with slots:
+                await action(node)
+            finished[node].set()
+
+        await asyncio.gather(*(run_node(node) for node in deps))
+
+    async def _create_fixture_async(self, fixture_name: str):
+        """Create one fixture and store its response"""
+        request = self._fixture_request(fixture_name, self.fixtures[fixture_name])
+        if request is None:
+            return
+
+        try:
+            self._store_fixture(fixture_name, await self._send(*request))
+        except Exception as e:
+            print(f"  {Colors.RED}[ERROR] Fixture '{fixture_name}': {str(e) or type(e).__name__}{Colors.RESET}")
+
+    async def _setup_fixtures_async(self):
+        """Setup test fixtures by creating initial data, independent fixtures concurrently"""
+        if not self.fixtures:
+            return
+
+        self.fixture_graph = self._build_fixture_graph()
+        setup_deps, _ = self.fixture_graph
+
+        print(f"{Colors.BOLD}{Colors.YELLOW}Setting up fixtures...{Colors.RESET}\n")
+
+        await self._run_graph_async(setup_deps, self._create_fixture_async, self._fixture_workers(setup_deps))
+
+        print()
+        self._check_fixture_fields()
+
+    async def _run_cleanup_step_async(self, position: int):
+        """Execute one cleanup step"""
+        request = self._cleanup_request(self.fixtures['cleanup'][position])
+        if request is None:
+            return
+        method, path, url, headers = request
+
+        try:
+            if method == 'DELETE':
+                self._report_cleanup(path, await self._send(method, url, headers))
+        except Exception as e:
+            print(f"  {Colors.RED}[ERROR] Cleanup failed: {path} - {str(e) or type(e).__name__}{Colors.RESET}")
+
+    async def _cleanup_fixtures_async(self):
+        """Cleanup test fixtures by deleting created data, in reverse dependency order"""
+        if self.fixture_graph is None:
+            return
+        _, cleanup_deps = self.fixture_graph
+        self.fixture_graph = None
+        if not cleanup_deps:
+            return
+
+        print(f"\n{Colors.BOLD}{Colors.YELLOW}Cleaning up fixtures...{Colors.RESET}\n")
+
+        await self._run_graph_async(cleanup_deps, self._run_cleanup_step_async, self._fixture_workers(cleanup_deps))
+
+        print()
+
+    async def _execute_test_async(self, test_case: Dict) -> TestResult:
+        """Execute a single test case"""
+        result, request = self._prepare_test(test_case)
+
+        phases = {'dns_ms': 0.0, 'connect_ms': 0.0, 'tls_ms': None}
+        guarded = []
+        try:
+            start_time = time.perf_counter()
+            response = await self._send(*request, phases=phases, endpoint=timing.endpoint_key(test_case),
+                                        guarded=guarded)
+            if guarded:
+                # Waiting for a rate limit slot is not server time (cassette hits are never guarded)
+                start_time += guarded[0].throttled_ms / 1000
+            duration = (time.perf_counter() - start_time) * 1000
+            self.profiler.add('send', duration / 1000)
+
+            connection_ms = phases['dns_ms'] + phases['connect_ms']
+            phases['ttfb_ms'] = max(0.0, (response.headers_time - start_time) * 1000 - connection_ms)
+            phases['download_ms'] = response.download_ms
+
+            self._complete_test(result, test_case, response, duration, phases)
+
+        except asyncio.TimeoutError:
+            result['message'] = f"Request timeout (>{self.timeout}s)"
+        except aiohttp.ClientConnectionError:
+            result['message'] = "Connection error - is the server running?"
+        except resilience.CircuitOpenError as e:
+            result['message'] = str(e)
+        except Exception as e:
+            result['message'] = f"Error: {str(e)}"
+
+        if guarded:
+            result['resilience'] = guarded[0].details()
+        return result
+
+    async def _run_parameterized_async(self, entry: Dict):
+        """Execute and record every row of a parameterized case, `workers` rows in flight, in row order"""
+        in_flight = deque()
+        for test_case in self._expand(entry['test_case']):
+            in_flight.append(asyncio.ensure_future(self._execute_test_async(test_case)))
+            if len(in_flight) >= self.workers:
+                self._record_result(await in_flight.popleft(), entry)
+        while in_flight:
+            self._record_result(await in_flight.popleft(), entry)
+
+    async def _run_schedule(self, schedule: List[Dict]):
+        """Run every test case once its dependencies finish, at most `workers` in flight"""
+        slots = asyncio.Semaphore(self.workers)
+        finished = {entry['index']: asyncio.Event() for entry in schedule}
+        completed = {}
+        walker = self._walk_plan(schedule)
+        pending = next(walker, None)
+
+        deps = self._concurrent_deps(schedule)
+
+        async def run_entry(entry: Dict):
+            nonlocal pending
+            for dep in deps[entry['index']]:
+                await finished[dep].wait()
+
+            if parameters.is_parameterized(entry['test_case']):
+                await self._run_parameterized_async(entry)
+                completed[entry['index']] = ROWS_RECORDED
+            else:
+                async with slots:
+                    completed[entry['index']] = await self._execute_test_async(entry['test_case'])
+            finished[entry['index']].set()
+
+            # Flush every result whose predecessors in plan order are already printed
+            while pending is not None and pending['index'] in completed:
+                result = completed.pop(pending['index'])
+                if result is not ROWS_RECORDED:
+                    self._record_result(result, pending)
+                pending = next(walker, None)
+
+        await asyncio.gather(*(run_entry(entry) for entry in schedule))
+
+        # Print headers of any trailing requirements without test cases
+        for _ in walker:
+            pass
+
+    async def _run_all_tests_async(self) -> int:
+        self._print_header()
+
+        schedule = self._build_schedule()
+
+        self.session = self._open_session()
+        try:
+            try:
+                # Setup fixtures before running tests
+                with self.profiler.phase('fixtures'):
+                    await self._setup_fixtures_async()
+
+                await self._run_schedule(schedule)
+            finally:
+                # Cleanup fixtures after all tests, also when the run is cancelled
+                with self.profiler.phase('fixtures'):
+                    await self._cleanup_fixtures_async()
+        finally:
+            await self.session.close()
+            self.session = None
+
+        self._print_summary()
+
+        return 1 if self.results['failed'] > 0 else 0
+
+    def run_all_tests(self):
+        """Execute all tests in the test plan on a fresh event loop"""
+        return asyncio.run(self._run_all_tests_async())
+
+
+if __name__ == '__main__':
+    sys.argv[1:1] = ['--engine', 'async']
+    run_cli()
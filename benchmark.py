@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Runner benchmark suite
+Measures the overhead of the runner, reporters and Postman converter on
+synthetic plans against the local Petstore stand-in, writes the numbers as
+JSON and compares them with a stored baseline to catch regressions
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import requests
+
+from convert_to_postman import PostmanConverter
+from petstore_server import IN_PROCESS_URL
+from results import TestResult
+from test_runner import Colors, TestRunner
+
+DEFAULT_BASELINE = Path(__file__).parent / 'bench_baseline.json'
+DEFAULT_OUTPUT = 'bench_results.json'
+
+DEFAULT_SIZES = {
+    'requirements': 20,     # requirements per synthetic plan
+    'cases': 25,            # test cases per requirement
+    'fixtures': 10,         # pet fixtures, each with a cleanup step
+    'body_items': 200,      # tags in each large request body
+    'response_items': 2000  # pets returned by the large list response
+}
+
+QUICK_SIZES = {'requirements': 4, 'cases': 10, 'fixtures': 4, 'body_items': 50, 'response_items': 200}
+
+# A benchmark slower than baseline * (1 + threshold) is a regression; generous, since
+# timings on shared machines easily drift 20-30% between runs
+DEFAULT_THRESHOLD = 0.5
+
+
+def synthetic_plan(sizes: Dict) -> Dict:
+    """Plan with requirements x cases test cases, pet fixtures and large request bodies
+
+    Cases cycle through creating a pet with a large body, reading and updating
+    fixture pets through placeholders, and listing pets by status.
+    """
+    fixtures = {}
+    cleanup = []
+    for number in range(sizes['fixtures']):
+        name = f"bench_pet_{number}"
+        fixtures[name] = {
+            'method': 'POST',
+            'path': '/pet',
+            'body': {'name': f"Bench Pet {number}", 'photoUrls': ['https://example.com/bench.jpg'], 'status': 'available'}
+        }
+        cleanup.append({'method': 'DELETE', 'path': f"/pet/{{{name}.id}}"})
+    if cleanup:
+        fixtures['cleanup'] = cleanup
+
+    large_body = {
+        'name': 'Bench Large Pet',
+        'photoUrls': [f"https://example.com/bench-{n}.jpg" for n in range(10)],
+        'status': 'pending',
+        'category': {'id': 1, 'name': 'Dogs'},
+        'tags': [{'id': n, 'name': f"tag-{n}"} for n in range(sizes['body_items'])]
+    }
+
+    requirements = []
+    for r in range(sizes['requirements']):
+        test_cases = []
+        for c in range(sizes['cases']):
+            fixture = f"bench_pet_{(r * sizes['cases'] + c) % sizes['fixtures']}" if sizes['fixtures'] else None
+            kind = c % 4
+            case = {'id': f"TC-BENCH-{r:03d}-{c:03d}", 'name': f"Bench case {r}/{c}"}
+            if kind == 0 or fixture is None:
+                case.update(method='POST', path='/pet', headers={'Content-Type': 'application/json'},
+                            body=large_body, expected_status=200,
+                            expected_response={'contains': ['id', 'name', 'photoUrls']})
+            elif kind == 1:
+                case.update(method='GET', path=f"/pet/{{{fixture}.id}}", expected_status=200,
+                            expected_response={'contains': ['id', 'name'], 'type': 'object'})
+            elif kind == 2:
+                case.update(method='PUT', path='/pet', headers={'Content-Type': 'application/json'},
+                            body={'id': f"{{{fixture}.id}}", 'name': f"{{{fixture}.name}}",
+                                  'photoUrls': ['https://example.com/updated.jpg'], 'status': 'available'},
+                            expected_status=200)
+            else:
+                case.update(method='GET', path='/pet/findByStatus?status=sold', expected_status=200,
+                            expected_response={'type': 'array'})
+            test_cases.append(case)
+        requirements.append({'id': f"REQ-BENCH-{r:03d}", 'name': f"Bench requirement {r}", 'test_cases': test_cases})
+
+    return {
+        'project_name': 'Benchmark Plan',
+        'test_type': 'backend',
+        'base_url': 'http://localhost:3000',
+        'authentication': {'api_key': {'header': 'api_key', 'value': 'special-key'}},
+        'fixtures': fixtures,
+        'requirements': requirements
+    }
+
+
+def measure(action: Callable[[], int], repeats: int) -> Dict:
+    """Run action `repeats` times; it returns how many operations it performed"""
+    per_op = []
+    ops = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ops = action()
+        per_op.append((time.perf_counter() - start) / max(ops, 1) * 1e6)
+    return {
+        'unit': 'us/op',
+        'median': round(statistics.median(per_op), 3),
+        'min': round(min(per_op), 3),
+        'ops': ops,
+        'repeats': repeats
+    }
+
+
+class BenchmarkSuite:
+    """Synthetic plan, runners against the stand-in and the benchmarks that use them"""
+
+    def __init__(self, sizes: Dict, workdir: str, repeats: int):
+        self.sizes = sizes
+        self.workdir = Path(workdir)
+        self.repeats = repeats
+        self.plan_path = self.workdir / 'bench_plan.json'
+        with open(self.plan_path, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_plan(sizes), f)
+        self.runners = {}
+
+    def benchmarks(self) -> Dict[str, Callable[[], Dict]]:
+        return {
+            'execute_test.inprocess': lambda: self.bench_execute('inprocess'),
+            'execute_test.port': lambda: self.bench_execute('port'),
+            'execute_test.large_response': self.bench_large_response,
+            'placeholders.render': self.bench_placeholders,
+            'validate_response.object': lambda: self.bench_validate('/pet/1'),
+            'validate_response.large_array': lambda: self.bench_validate('/pet/findByStatus?status=sold'),
+            'save_report.json': lambda: self.bench_report('json'),
+            'save_report.html': lambda: self.bench_report('html'),
+            'postman.convert': self.bench_convert,
+            'postman.write': self.bench_postman_write
+        }
+
+    def runner(self, mode: str = 'inprocess') -> TestRunner:
+        """Runner on the stand-in with fixtures created and large list data seeded"""
+        if mode not in self.runners:
+            runner = TestRunner(str(self.plan_path), local_server=mode)
+            runner._setup_fixtures()
+            store = runner.local_server.store if runner.local_server else runner.session.get_adapter(IN_PROCESS_URL).store
+            for number in range(self.sizes['response_items']):
+                body = json.dumps({'name': f"Listed Pet {number}", 'photoUrls': ['https://example.com/listed.jpg'],
+                                   'status': 'sold', 'tags': [{'id': 1, 'name': 'listed'}]}).encode()
+                store.handle('POST', '/pet', {'Content-Type': 'application/json'}, body)
+            self.runners[mode] = runner
+        return self.runners[mode]
+
+    def test_cases(self, runner: TestRunner, path_prefix: str = None) -> List[Dict]:
+        cases = [case for req in runner.test_plan['requirements'] for case in req['test_cases']]
+        if path_prefix:
+            cases = [case for case in cases if case['path'].startswith(path_prefix)]
+        return cases
+
+    def bench_execute(self, mode: str) -> Dict:
+        """Per-request cost of _execute_test, every case of the plan in turn"""
+        runner = self.runner(mode)
+        cases = self.test_cases(runner)
+
+        def run():
+            for case in cases:
+                runner._execute_test(case)
+            return len(cases)
+        return measure(run, self.repeats)
+
+    def bench_large_response(self) -> Dict:
+        """_execute_test on a list response of response_items pets"""
+        runner = self.runner()
+        cases = self.test_cases(runner, '/pet/findByStatus')
+
+        def run():
+            for case in cases:
+                runner._execute_test(case)
+            return len(cases)
+        return measure(run, self.repeats)
+
+    def bench_placeholders(self) -> Dict:
+        """Resolving a test case's path and body against fixture data (cache defeated)"""
+        runner = self.runner()
+        cases = self.test_cases(runner)
+
+        def run():
+            for case in cases:
+                runner.fixture_generation += 1
+                runner._render_test(case)
+            return len(cases)
+        return measure(run, self.repeats)
+
+    def bench_validate(self, path: str) -> Dict:
+        """_validate_response on a received response, parsing its body"""
+        runner = self.runner()
+        response = runner.session.get(f"{runner.base_url}{path}")
+        expected = {'expected_status': 200, 'expected_response': {'type': 'array' if 'find' in path else 'object',
+                                                                   'contains': ['id']}}
+        count = 200
+
+        def run():
+            for _ in range(count):
+                runner._validate_response(response, expected)
+            return count
+        return measure(run, self.repeats)
+
+    def _report_runner(self) -> TestRunner:
+        """Runner holding one synthetic result per plan test case, timings included"""
+        if 'report' not in self.runners:
+            runner = TestRunner(str(self.plan_path))
+            timings = {'dns_ms': 0.0, 'connect_ms': 0.0, 'tls_ms': 0.0, 'ttfb_ms': 1.5, 'download_ms': 0.2,
+                       'validation_ms': 0.01}
+            schedule = runner._build_schedule()
+            for number, entry in enumerate(schedule):
+                case = entry['test_case']
+                passed = number % 7 != 0
+                result = TestResult(case['id'], case['name'], case['method'], f"{runner.base_url}{case['path']}",
+                                    passed=passed, message="All validations passed" if passed else "Status code mismatch",
+                                    response_status=200, duration_ms=1.7 + number % 13, timings=timings)
+                runner._record_result(result, entry)
+            self.runners['report'] = runner
+        return self.runners['report']
+
+    def bench_report(self, kind: str) -> Dict:
+        """save_report / save_html_report, per result written"""
+        runner = self._report_runner()
+        output = str(self.workdir / f"bench_report.{kind}")
+
+        def run():
+            if kind == 'json':
+                runner.save_report(output)
+            else:
+                runner.save_html_report(output)
+            return runner.results['total']
+        return measure(run, self.repeats)
+
+    def bench_convert(self) -> Dict:
+        """PostmanConverter.convert, per request converted"""
+        converter = PostmanConverter(str(self.plan_path))
+
+        def run():
+            collection = converter.convert()
+            return sum(len(folder['item']) for folder in collection['item'])
+        return measure(run, self.repeats)
+
+    def bench_postman_write(self) -> Dict:
+        """Streaming the collection to disk with PostmanConverter.write, per request"""
+        converter = PostmanConverter(str(self.plan_path))
+
+        def run():
+            with open(os.devnull, 'w', encoding='utf-8') as f:
+                return converter.write(f)['requests']
+        return measure(run, self.repeats)
+
+    def close(self):
+        for runner in self.runners.values():
+            runner._cleanup_fixtures()
+            runner.close()
+
+
+def environment() -> Dict:
+    """Where the numbers came from; baselines only compare well on the same machine"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'requests': requests.__version__,
+        'revision': revision
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Per-benchmark ratio of the current best time to the baseline best time
+
+    The fastest repeat is the least disturbed by other load on the machine, so it
+    is what gets compared; the median is reported alongside it.
+    """
+    rows = []
+    for name, current in results['benchmarks'].items():
+        reference = baseline.get('benchmarks', {}).get(name)
+        if reference is None or not reference.get('min'):
+            rows.append({'name': name, 'current': current['min'], 'baseline': None, 'ratio': None, 'status': 'new'})
+            continue
+        ratio = current['min'] / reference['min']
+        status = 'regression' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else 'ok')
+        rows.append({'name': name, 'current': current['min'], 'baseline': reference['min'],
+                     'ratio': round(ratio, 3), 'status': status})
+    return rows
+
+
+def print_comparison(rows: List[Dict]):
+    colors = {'regression': Colors.RED, 'faster': Colors.GREEN, 'ok': '', 'new': Colors.YELLOW}
+    print(f"{Colors.BOLD}{'Benchmark':<32}{'best us/op':>12}{'baseline':>12}{'ratio':>8}  status{Colors.RESET}")
+    for row in rows:
+        baseline = f"{row['baseline']:.3f}" if row['baseline'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        print(f"{row['name']:<32}{row['current']:>12.3f}{baseline:>12}{ratio:>8}  "
+              f"{colors[row['status']]}{row['status']}{Colors.RESET}")
+    print()
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the runner, reporters and Postman converter')
+    parser.add_argument('--only', action='append', metavar='PATTERN', help='Run benchmarks matching a glob (repeatable), e.g. "save_report.*"')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repetitions per benchmark; the median is reported (default: 5)')
+    parser.add_argument('--quick', action='store_true', help='Small synthetic plan for a fast smoke run')
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name, help=f"Synthetic plan size: {name} (default: {default})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'Machine-readable results (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help=f'Slowdown ratio above baseline counted as a regression (default: {DEFAULT_THRESHOLD})')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Run the benchmarks, write the results and compare them with the baseline"""
+    args = parse_args()
+
+    sizes = dict(QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    sizes.update({name: getattr(args, name) for name in DEFAULT_SIZES if getattr(args, name) is not None})
+
+    results = {'environment': environment(), 'sizes': sizes, 'benchmarks': {}}
+
+    with tempfile.TemporaryDirectory(prefix='petstore-bench-') as workdir:
+        suite = BenchmarkSuite(sizes, workdir, args.repeats)
+        selected = {
+            name: bench for name, bench in suite.benchmarks().items()
+            if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)
+        }
+        try:
+            for name, bench in selected.items():
+                print(f"  {name} ...", end='', flush=True)
+                # The runner's own console output is not what is being measured
+                with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                    results['benchmarks'][name] = bench()
+                stats = results['benchmarks'][name]
+                print(f" median {stats['median']:.3f} us/op, best {stats['min']:.3f}")
+        finally:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                suite.close()
+    print()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"{Colors.GREEN}Results saved to: {args.output}{Colors.RESET}\n")
+
+    exit_code = 0
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('sizes') != sizes:
+            print(f"{Colors.YELLOW}Baseline was measured with different plan sizes; not comparing{Colors.RESET}\n")
+        else:
+            rows = compare(results, baseline, args.threshold)
+            print_comparison(rows)
+            regressions = [row['name'] for row in rows if row['status'] == 'regression']
+            if regressions and not args.save_baseline:
+                print(f"{Colors.RED}Regressions (> {args.threshold:.0%} slower): {', '.join(regressions)}{Colors.RESET}\n")
+                exit_code = 1
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"{Colors.GREEN}Baseline saved to: {baseline_path}{Colors.RESET}\n")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+"""
+Record/replay cassettes
+Stores request/response pairs in a compact append-only file with a sorted,
+memory-mapped key index, and serves them back instead of the network.
+
+Modes:
+    record  send every request and append its response to the cassette
+    replay  serve every request from the cassette; nothing goes to the network
+    cache   serve GETs from the cassette while fresh (TTL), otherwise send and store
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: appends from parallel processes are not serialized
+
+CASSETTE_MODES = ('record', 'replay', 'cache')
+
+DEFAULT_CASSETTE_CONFIG = {
+    'path': None,
+    'mode': 'replay',
+    'ttl': 300,             # seconds a cached GET stays fresh (cache mode)
+    'max_entries': 1024     # decoded responses kept in the in-memory LRU
+}
+
+MAGIC = b'CASSET01'
+INDEX_MAGIC = b'CASIDX01'
+RECORD = struct.Struct('<20sHdII')     # key, status, recorded_at, headers length, body length
+INDEX_HEADER = struct.Struct('<8sQ')   # magic, data file length covered by the index
+INDEX_ENTRY = struct.Struct('<20sQ')   # key, record offset
+
+# Hop-by-hop or encoding headers that no longer describe the stored (decoded) body
+SKIPPED_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length'}
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Replay mode got a request that was never recorded"""
+
+
+class CassetteEntry:
+    """One stored response"""
+
+    __slots__ = ('status', 'headers', 'body', 'recorded_at')
+
+    def __init__(self, status: int, headers: List, body: bytes, recorded_at: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.recorded_at = recorded_at
+
+
+def normalize_url(url: str) -> str:
+    """Path plus sorted query; scheme and host are dropped so cassettes survive base_url changes"""
+    split = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(split.query, keep_blank_values=True)))
+    return (split.path or '/') + (f"?{query}" if query else '')
+
+
+def resource_prefixes(path: str) -> List[str]:
+    """Every prefix of a URL path, from '' (the root) to the path itself: /pet/5 -> '', /pet, /pet/5"""
+    segments = [segment for segment in path.split('/') if segment]
+    return [''.join(f"/{segment}" for segment in segments[:length]) for length in range(len(segments) + 1)]
+
+
+class Cassette:
+    """Append-only response store with an mmap'd binary-search index and an LRU in front"""
+
+    def __init__(self, path: str, mode: str = 'replay', ttl: float = 300, max_entries: int = 1024):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.index_path = Path(f"{path}.idx")
+        self.mode = mode
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.lock = threading.Lock()
+        self.lru = OrderedDict()   # key -> CassetteEntry
+        self.occurrences = {}      # request hash -> times seen in this run (record/replay)
+        self.invalidated = {}      # path prefix -> time of the last mutation of a resource under it
+        self.appended = {}         # key -> offset of records written by this process
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        if mode == 'replay':
+            if not self.path.exists():
+                raise FileNotFoundError(f"Cassette not found: {self.path}")
+            self.file = open(self.path, 'rb')
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, 'a+b')
+            with self._file_lock():
+                if os.path.getsize(self.path) == 0:
+                    self.file.write(MAGIC)
+                    self.file.flush()
+
+        self.data = None
+        self.index = None
+        self._map()
+
+    # Storage
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes sharing the cassette"""
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def _scan(self) -> Tuple[Dict[bytes, int], int]:
+        """Offsets of the latest record per key, and the end of the last complete record"""
+        offsets = {}
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a cassette file")
+            position = len(MAGIC)
+            while position + RECORD.size <= size:
+                f.seek(position)
+                key, _, _, headers_length, body_length = RECORD.unpack(f.read(RECORD.size))
+                end = position + RECORD.size + headers_length + body_length
+                if end > size:
+                    break  # truncated by an interrupted write
+                offsets[key] = position
+                position = end
+        return offsets, position
+
+    def _write_index(self):
+        """Rebuild the sorted key index from the data file"""
+        with self._file_lock():
+            offsets, end = self._scan()
+            temp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'wb') as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, end))
+                for key in sorted(offsets):
+                    f.write(INDEX_ENTRY.pack(key, offsets[key]))
+            os.replace(temp_path, self.index_path)
+
+    def _index_is_current(self) -> bool:
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, covered = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return magic == INDEX_MAGIC and covered == os.path.getsize(self.path)
+
+    def _map(self):
+        """Memory-map the data file and an up-to-date index"""
+        if not self._index_is_current():
+            self._write_index()
+        with open(self.index_path, 'rb') as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _find_offset(self, key: bytes):
+        """Binary search the mmap'd index"""
+        low = 0
+        high = (len(self.index) - INDEX_HEADER.size) // INDEX_ENTRY.size
+        while low < high:
+            middle = (low + high) // 2
+            position = INDEX_HEADER.size + middle * INDEX_ENTRY.size
+            candidate = self.index[position:position + 20]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return INDEX_ENTRY.unpack_from(self.index, position)[1]
+        return None
+
+    def _read(self, offset: int) -> CassetteEntry:
+        if offset < len(self.data):
+            buffer, start = self.data, offset
+        else:
+            # Appended after the file was mapped
+            self.file.seek(offset)
+            header = self.file.read(RECORD.size)
+            _, _, _, headers_length, body_length = RECORD.unpack(header)
+            buffer, start = header + self.file.read(headers_length + body_length), 0
+
+        _, status, recorded_at, headers_length, body_length = RECORD.unpack_from(buffer, start)
+        headers_start = start + RECORD.size
+        body_start = headers_start + headers_length
+        headers = json.loads(bytes(buffer[headers_start:body_start]))
+        return CassetteEntry(status, headers, bytes(buffer[body_start:body_start + body_length]), recorded_at)
+
+    def _get(self, key: bytes):
+        """Entry for a key from the LRU, this process's appends or the index (caller holds self.lock)"""
+        entry = self.lru.get(key)
+        if entry is not None:
+            self.lru.move_to_end(key)
+            return entry
+
+        offset = self.appended.get(key)
+        if offset is None:
+            offset = self._find_offset(key)
+        if offset is None:
+            return None
+
+        entry = self._read(offset)
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: bytes, entry: CassetteEntry):
+        self.lru[key] = entry
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.max_entries:
+            self.lru.popitem(last=False)
+
+    # Keys
+
+    @staticmethod
+    def _request_hash(method: str, url: str, body: bytes) -> bytes:
+        digest = hashlib.sha1(f"{method.upper()} {normalize_url(url)}\0".encode('utf-8'))
+        digest.update(body or b'')
+        return digest.digest()[:16]
+
+    def _key(self, request_hash: bytes, occurrence: int) -> bytes:
+        # The n-th identical request of a run maps to the n-th recording, so sequences
+        # such as GET -> PUT -> GET replay in order
+        return request_hash + struct.pack('>I', occurrence)
+
+    def _next_occurrence(self, request_hash: bytes) -> int:
+        occurrence = self.occurrences.get(request_hash, 0)
+        self.occurrences[request_hash] = occurrence + 1
+        return occurrence
+
+    # Public API
+
+    def lookup(self, method: str, url: str, body: bytes = b''):
+        """Stored response to serve instead of sending, or None to send the request"""
+        method = method.upper()
+        if self.mode == 'record' or (self.mode == 'cache' and method != 'GET'):
+            return None
+
+        request_hash = self._request_hash(method, url, body)
+        with self.lock:
+            if self.mode == 'replay':
+                occurrence = self._next_occurrence(request_hash)
+                # Fall back to the latest earlier recording when a request repeats more often than recorded
+                for candidate in range(occurrence, -1, -1):
+                    entry = self._get(self._key(request_hash, candidate))
+                    if entry is not None:
+                        self.hits += 1
+                        return entry
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for {method} {normalize_url(url)}")
+
+            entry = self._get(self._key(request_hash, 0))
+            fresh = (
+                entry is not None
+                and time.time() - entry.recorded_at <= self.ttl
+                and all(entry.recorded_at >= self.invalidated.get(prefix, 0)
+                        for prefix in resource_prefixes(urlsplit(url).path))
+            )
+            if fresh:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def store(self, method: str, url: str, body: bytes, status: int, headers, content: bytes):
+        """Record a response that came from the network"""
+        method = method.upper()
+        if self.mode == 'replay':
+            return
+        if self.mode == 'cache':
+            if method != 'GET':
+                # A mutation makes cached reads of its resource stale: DELETE /pet/5 covers /pet/5 and
+                # /pet/findByStatus, PUT or POST /pet everything under /pet, including the body's /pet/{id}
+                prefixes = resource_prefixes(urlsplit(url).path)
+                resource = prefixes[-2] if len(prefixes) > 2 else prefixes[-1]
+                with self.lock:
+                    self.invalidated[resource] = time.time()
+                return
+            if not 200 <= status < 300:
+                return
+
+        request_hash = self._request_hash(method, url, body)
+        kept_headers = [[name, value] for name, value in headers if name.lower() not in SKIPPED_HEADERS]
+        entry = CassetteEntry(status, kept_headers, content, time.time())
+        header_bytes = json.dumps(kept_headers).encode('utf-8')
+
+        with self.lock:
+            occurrence = self._next_occurrence(request_hash) if self.mode == 'record' else 0
+            key = self._key(request_hash, occurrence)
+            record = RECORD.pack(key, status, entry.recorded_at, len(header_bytes), len(content))
+            with self._file_lock():
+                self.file.seek(0, os.SEEK_END)
+                offset = self.file.tell()
+                self.file.write(record + header_bytes + content)
+                self.file.flush()
+            self.appended[key] = offset
+            self._remember(key, entry)
+            self.recorded += 1
+
+    def stats(self) -> Dict:
+        return {'mode': self.mode, 'hits': self.hits, 'misses': self.misses, 'recorded': self.recorded}
+
+    def close(self):
+        """Unmap files and, if anything was recorded, rebuild the index for the next run"""
+        if self.file.closed:
+            return
+        if self.index is not None:
+            self.index.close()
+        if self.data is not None:
+            self.data.close()
+        if self.recorded:
+            self._write_index()
+        self.file.close()
+
+
+def build_response(request: requests.PreparedRequest, entry: CassetteEntry) -> requests.Response:
+    """requests.Response for a stored entry"""
+    response = requests.Response()
+    response.status_code = entry.status
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response._content = entry.body
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter that consults a Cassette before delegating to the wrapped adapter"""
+
+    def __init__(self, inner: BaseAdapter, cassette: Cassette):
+        super().__init__()
+        self.inner = inner
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        entry = self.cassette.lookup(request.method, request.url, body)
+        if entry is not None:
+            return build_response(request, entry)
+
+        response = self.inner.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        self.cassette.store(request.method, request.url, body, response.status_code,
+                            response.headers.items(), response.content)
+        return response
+
+    def close(self):
+        self.inner.close()
@@ -0,0 +1,398 @@
+"""
+Contract validation
+Compiles the response schemas of a Swagger 2.0 spec (docs/petstore-swagger.json)
+into validator functions, cached per operation and status code, and checks
+responses against them
+"""
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from json_stream import JsonArrayParser
+
+DEFAULT_SPEC_PATH = str(Path(__file__).parent / 'docs' / 'petstore-swagger.json')
+
+# Errors reported per response; validation stops early once reached
+MAX_ERRORS = 10
+
+INT_RANGES = {
+    'int32': (-2 ** 31, 2 ** 31 - 1),
+    'int64': (-2 ** 63, 2 ** 63 - 1)
+}
+
+# explain(value, location, errors) appends "location: problem" strings to errors
+Validator = Callable[[Any, str, List[str]], None]
+
+_registries = {}
+
+
+def load_contracts(spec_path: str = DEFAULT_SPEC_PATH) -> 'ContractRegistry':
+    """Registry for a spec file, loaded once per process"""
+    key = str(Path(spec_path).resolve())
+    registry = _registries.get(key)
+    if registry is None:
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            registry = _registries[key] = ContractRegistry(json.load(f))
+    return registry
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'integer' if isinstance(value, int) else 'number'
+    if isinstance(value, str):
+        return 'string'
+    return 'array' if isinstance(value, list) else 'object'
+
+
+def _accept(value, location, errors):
+    pass
+
+
+class CheckGenerator:
+    """Generates Python source for boolean schema checks
+
+    The generated functions only answer valid/invalid, with no error bookkeeping, which
+    keeps the common all-valid case cheap; SchemaCompiler explains the failures.
+    """
+
+    def __init__(self, definitions: Dict):
+        self.definitions = definitions
+        self.namespace = {}
+        self.functions = {}   # definition name or id(schema) -> generated function name
+
+    def compile(self, schema: Dict) -> Callable[[Any], bool]:
+        return self.namespace[self._function(schema)]
+
+    def _function(self, schema: Dict, definition: str = None) -> str:
+        key = definition or id(schema)
+        if key in self.functions:
+            return self.functions[key]
+        name = self.functions[key] = f"check_{definition or len(self.functions)}"
+
+        lines = [f"def {name}(v0):"]
+        self._emit(schema, 'v0', 1, lines)
+        lines.append("    return True")
+        exec('\n'.join(lines), self.namespace)
+        return name
+
+    def _constant(self, value) -> str:
+        name = f"C{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def _emit(self, schema: Dict, var: str, indent: int, lines: List[str]):
+        pad = '    ' * indent
+        if '$ref' in schema:
+            definition = schema['$ref'].rsplit('/', 1)[-1]
+            function = self._function(self.definitions.get(definition, {}), definition)
+            lines.append(f"{pad}if not {function}({var}): return False")
+            return
+
+        depth = int(var[1:])
+        child = f"v{depth + 1}"
+        schema_type = schema.get('type')
+        if schema_type == 'object' or 'properties' in schema:
+            lines.append(f"{pad}if type({var}) is not dict: return False")
+            required = schema.get('required', ())
+            if required:
+                lines.append(f"{pad}if {' or '.join(f'{name!r} not in {var}' for name in required)}: return False")
+            for name, sub in schema.get('properties', {}).items():
+                body = []
+                self._emit(sub, child, indent + 1, body)
+                if body:
+                    lines.append(f"{pad}{child} = {var}.get({name!r})")
+                    lines.append(f"{pad}if {child} is not None:")
+                    lines.extend(body)
+        elif schema_type == 'array':
+            lines.append(f"{pad}if type({var}) is not list: return False")
+            body = []
+            self._emit(schema.get('items', {}), child, indent + 1, body)
+            if body:
+                lines.append(f"{pad}for {child} in {var}:")
+                lines.extend(body)
+        elif schema_type == 'integer':
+            lines.append(f"{pad}if type({var}) is not int: return False")
+            if schema.get('format') in INT_RANGES:
+                low, high = INT_RANGES[schema['format']]
+                lines.append(f"{pad}if not {low} <= {var} <= {high}: return False")
+        elif schema_type == 'number':
+            lines.append(f"{pad}if type({var}) is not int and type({var}) is not float: return False")
+        elif schema_type == 'boolean':
+            lines.append(f"{pad}if type({var}) is not bool: return False")
+        elif schema_type == 'string':
+            lines.append(f"{pad}if type({var}) is not str: return False")
+            if 'enum' in schema:
+                lines.append(f"{pad}if {var} not in {self._constant(frozenset(schema['enum']))}: return False")
+
+
+class SchemaCompiler:
+    """Turns schema dicts into validators
+
+    Each compiled schema is a (check, explain) pair: check(value) -> bool is generated
+    code for the fast path, and explain(value, location, errors) reports what is wrong.
+    """
+
+    def __init__(self, definitions: Dict):
+        self.definitions = definitions
+        self.checks = CheckGenerator(definitions)
+        self.refs = {}
+
+    def compile(self, schema: Dict):
+        return self.checks.compile(schema), self.explainer(schema)
+
+    def explainer(self, schema: Dict) -> Validator:
+        if not schema:
+            return _accept
+        if '$ref' in schema:
+            return self._ref(schema['$ref'])
+
+        schema_type = schema.get('type')
+        if schema_type == 'object' or 'properties' in schema:
+            return self._object(schema)
+        if schema_type == 'array':
+            return self._array(schema)
+        if schema_type == 'integer':
+            return self._integer(schema)
+        if schema_type == 'number':
+            return self._scalar(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool), 'number')
+        if schema_type == 'boolean':
+            return self._scalar(lambda v: isinstance(v, bool), 'boolean')
+        if schema_type == 'string':
+            return self._string(schema)
+        return _accept
+
+    def _ref(self, ref: str) -> Validator:
+        name = ref.rsplit('/', 1)[-1]
+        if name not in self.refs:
+            # Placeholder first so self-referencing definitions terminate
+            target = []
+            self.refs[name] = lambda value, location, errors: target[0](value, location, errors)
+            target.append(self.explainer(self.definitions.get(name, {})))
+            self.refs[name] = target[0]
+        return self.refs[name]
+
+    def _object(self, schema: Dict) -> Validator:
+        required = tuple(schema.get('required', ()))
+        properties = tuple((name, self.explainer(sub)) for name, sub in schema.get('properties', {}).items())
+
+        def validate(value, location, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{location}: expected object, got {_type_name(value)}")
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{location}: missing required property '{name}'")
+            for name, check in properties:
+                if name in value and value[name] is not None:
+                    check(value[name], f"{location}.{name}", errors)
+        return validate
+
+    def _array(self, schema: Dict) -> Validator:
+        check_item = self.explainer(schema.get('items', {}))
+
+        def validate(value, location, errors):
+            if not isinstance(value, list):
+                errors.append(f"{location}: expected array, got {_type_name(value)}")
+                return
+            for index, item in enumerate(value):
+                check_item(item, f"{location}[{index}]", errors)
+                if len(errors) >= MAX_ERRORS:
+                    return
+        return validate
+
+    def _integer(self, schema: Dict) -> Validator:
+        low, high = INT_RANGES.get(schema.get('format'), (None, None))
+
+        def validate(value, location, errors):
+            if not isinstance(value, int) or isinstance(value, bool):
+                errors.append(f"{location}: expected integer, got {_type_name(value)}")
+            elif low is not None and not low <= value <= high:
+                errors.append(f"{location}: {value} is out of {schema['format']} range")
+        return validate
+
+    def _string(self, schema: Dict) -> Validator:
+        allowed = frozenset(schema['enum']) if 'enum' in schema else None
+
+        def validate(value, location, errors):
+            if not isinstance(value, str):
+                errors.append(f"{location}: expected string, got {_type_name(value)}")
+            elif allowed is not None and value not in allowed:
+                errors.append(f"{location}: '{value}' is not one of {', '.join(schema['enum'])}")
+        return validate
+
+    @staticmethod
+    def _scalar(matches: Callable[[Any], bool], name: str) -> Validator:
+        def validate(value, location, errors):
+            if not matches(value):
+                errors.append(f"{location}: expected {name}, got {_type_name(value)}")
+        return validate
+
+
+class Contract:
+    """Compiled expectations for one operation and status code"""
+
+    __slots__ = ('operation', 'body', 'item', 'headers')
+
+    def __init__(self, operation: str, body, item, headers: List):
+        self.operation = operation
+        self.body = body        # (check, explain) for the response schema, None when it has none
+        self.item = item        # (check, explain) for array items, which can be validated while streaming
+        self.headers = headers  # [(name, type)] of documented response headers
+
+    @property
+    def streams(self) -> bool:
+        return self.item is not None
+
+    def check_headers(self, headers) -> List[str]:
+        errors = []
+        for name, header_type in self.headers:
+            value = headers.get(name)
+            if value is None:
+                errors.append(f"Contract: missing header {name}")
+            elif header_type == 'integer' and not value.strip().lstrip('-').isdigit():
+                errors.append(f"Contract: header {name} should be an integer, got '{value}'")
+        return errors
+
+    def check_content(self, content: bytes) -> List[str]:
+        """Validate a fully downloaded body"""
+        if self.body is None:
+            return []
+        if self.streams:
+            stream = self.stream()
+            stream.feed(content)
+            return stream.close()
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return [f"Contract: response body is not valid JSON ({self.operation})"]
+        check, explain = self.body
+        if check(data):
+            return []
+        errors = []
+        explain(data, '$', errors)
+        return [f"Contract: {error}" for error in errors[:MAX_ERRORS]]
+
+    def stream(self) -> 'StreamingCheck':
+        return StreamingCheck(self)
+
+
+class StreamingCheck:
+    """Validates the items of an array body chunk by chunk as it downloads"""
+
+    __slots__ = ('contract', 'parser', 'errors', 'failed')
+
+    def __init__(self, contract: Contract):
+        self.contract = contract
+        self.parser = JsonArrayParser()
+        self.errors = []
+        self.failed = False
+
+    def feed(self, chunk: bytes):
+        if self.failed:
+            return
+        try:
+            items = self.parser.feed(chunk)
+        except ValueError as e:
+            self._fail(str(e))
+            return
+        self._check(items)
+
+    def _check(self, items: List):
+        check, explain = self.contract.item
+        if all(map(check, items)):
+            return
+        offset = self.parser.count - len(items)
+        for position, item in enumerate(items):
+            if not check(item):
+                explain(item, f"$[{offset + position}]", self.errors)
+            if len(self.errors) >= MAX_ERRORS:
+                # Enough to fail the test; stop validating the rest of the stream
+                self.failed = True
+                return
+
+    def _fail(self, message: str):
+        self.errors.append(f"$: {message}")
+        self.failed = True
+
+    def close(self, complete: bool = True) -> List[str]:
+        """Errors found; complete=False when reading stopped before the end of the array"""
+        if complete and not self.failed:
+            try:
+                self._check(self.parser.close())
+            except ValueError as e:
+                self._fail(str(e))
+        return [f"Contract: {error}" for error in self.errors[:MAX_ERRORS]]
+
+
+class ContractRegistry:
+    """Operations of a Swagger 2.0 spec with lazily compiled, cached response contracts"""
+
+    def __init__(self, spec: Dict):
+        self.base_path = (spec.get('basePath') or '').rstrip('/')
+        self.compiler = SchemaCompiler(spec.get('definitions', {}))
+        self.compile_lock = threading.Lock()  # worker threads share the registry
+        self.responses = {}    # operation -> responses section of the spec
+        self.contracts = {}    # (operation, status) -> Contract or None
+        self.matches = {}      # (method, path) -> operation or None
+        self.routes = []       # (method, compiled path pattern, operation, template parameter count)
+
+        for template, path_item in spec.get('paths', {}).items():
+            pattern = re.compile('^' + re.sub(r'\\\{[^/]+?\\\}', '[^/]+', re.escape(template)) + '$')
+            for method, operation in path_item.items():
+                key = f"{method.upper()} {template}"
+                self.responses[key] = operation.get('responses', {})
+                self.routes.append((method.upper(), pattern, key, template.count('{')))
+
+        # Literal paths such as /pet/findByStatus win over /pet/{petId}
+        self.routes.sort(key=lambda route: route[3])
+
+    def match(self, method: str, path: str):
+        """Spec operation ('GET /pet/{petId}') for a request path, or None"""
+        cache_key = (method, path)
+        if cache_key in self.matches:
+            return self.matches[cache_key]
+
+        if self.base_path and path.startswith(self.base_path + '/'):
+            path = path[len(self.base_path):]
+        operation = next(
+            (key for route_method, pattern, key, _ in self.routes if route_method == method and pattern.match(path)),
+            None
+        )
+        if len(self.matches) > 10000:
+            self.matches.clear()
+        self.matches[cache_key] = operation
+        return operation
+
+    def contract_for(self, method: str, path: str, status: int):
+        """Compiled contract for a response, or None when the spec documents nothing to check"""
+        operation = self.match(method.upper(), path)
+        if operation is None:
+            return None
+
+        cache_key = (operation, status)
+        if cache_key not in self.contracts:
+            with self.compile_lock:
+                if cache_key not in self.contracts:
+                    self.contracts[cache_key] = self._compile(operation, status)
+        return self.contracts[cache_key]
+
+    def _compile(self, operation: str, status: int):
+        responses = self.responses[operation]
+        response = responses.get(str(status)) or responses.get('default')
+        if not response or ('schema' not in response and 'headers' not in response):
+            return None
+
+        schema = response.get('schema')
+        body = self.compiler.compile(schema) if schema else None
+        item = None
+        if schema and schema.get('type') == 'array':
+            item = self.compiler.compile(schema.get('items', {}))
+        headers = [(name, header.get('type')) for name, header in response.get('headers', {}).items()]
+        return Contract(operation, body, item, headers)
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Convert Postman collections to JSON test plans
+Compiles a Postman Collection v2.1 into the runner's plan format: folders become
+requirements, requests become test cases and simple status assertions become
+expected_status. The collection is read and the plan written incrementally, so
+collections of any size convert in constant memory.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+from urllib.parse import urlsplit
+
+from json_stream import JsonEventReader, JsonStreamWriter
+
+# test_runner.SUPPORTED_METHODS, repeated so the importer needs only the standard library
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+DEFAULT_BASE_URL = 'http://localhost:3000'
+
+# Status assertions we understand in test scripts:
+#   pm.response.to.have.status(200)
+#   pm.expect(pm.response.code).to.eql(200)  (also .equal/.equals, and pm.response.status)
+#   tests["..."] = responseCode.code === 200
+STATUS_ASSERTIONS = [
+    re.compile(r'pm\.response\.to\.(?:have|be)\.status\(\s*(\d{3})\s*\)'),
+    re.compile(r'pm\.expect\(\s*pm\.response\.(?:code|status)\s*\)\.to\.(?:be\.)?(?:eql|equal|equals)\(\s*(\d{3})\s*\)'),
+    re.compile(r'responseCode\.code\s*===?\s*(\d{3})'),
+]
+STATUS_OK_ASSERTION = re.compile(r'pm\.response\.to\.be\.ok\b')
+
+VARIABLE_PATTERN = re.compile(r'\{\{([^{}]+)\}\}')
+
+# Written by convert_to_postman.py into request descriptions, so a round trip keeps them
+EXPECTED_STATUS_PREFIX = 'Expected Status: '
+EXPECTED_RESPONSE_PREFIX = 'Expected Response: '
+
+# convert_to_postman.FIXTURES_VARIABLE: collection variable holding the plan's fixtures as JSON
+FIXTURES_VARIABLE = 'testPlanFixtures'
+
+# {fixture.field} placeholders (placeholders.PLACEHOLDER_PATTERN); {params.x} is a parameter row, not a fixture
+FIXTURE_REFERENCE = re.compile(r'\{([A-Za-z_]\w*)\.[^{}\s]+\}')
+PARAMS = 'params'
+
+
+class _Node:
+    """An object of the collection being read: the collection itself, a folder or a request"""
+
+    __slots__ = ('members', 'is_folder', 'parent', 'path')
+
+    def __init__(self, parent: Optional['_Node']):
+        self.members = {}
+        self.is_folder = False
+        self.parent = parent
+        self.path = None  # folder names from the top, once known
+
+
+class PostmanImporter:
+    """Compile a Postman collection into a test plan, streaming both"""
+
+    def __init__(self, collection_path: str, variables: Dict[str, str] = None, compact: bool = False):
+        self.collection_path = collection_path
+        self.compact = compact
+        self.cli_variables = dict(variables or {})
+        self._reset()
+
+    def _reset(self):
+        """Start a conversion pass from scratch"""
+        self.variables = dict(self.cli_variables)
+        self.late_variables = set()  # collection variables only seen after the items
+        self.unresolved = set()
+        self.fixture_references = set()  # fixture names used by {fixture.field} placeholders
+        self.base_url = None
+        self.base_variable = None
+        self.stats = {
+            'folders': 0, 'requirements': 0, 'requests': 0, 'with_status': 0,
+            'skipped': 0, 'bytes': 0, 'seconds': 0.0
+        }
+        self.warnings = []
+
+    def _open_collection(self):
+        if str(self.collection_path).endswith('.gz'):
+            return gzip.open(self.collection_path, 'rb')
+        return open(self.collection_path, 'rb')
+
+    def _substitute(self, text: str) -> str:
+        """Replace {{variables}} whose values are known; unknown ones are left as written"""
+        if '{{' not in text:
+            return text
+        return VARIABLE_PATTERN.sub(self._variable_value, text)
+
+    def _variable_value(self, match) -> str:
+        name = match.group(1).strip()
+        if name in self.variables:
+            return str(self.variables[name])
+        self.unresolved.add(name)
+        return match.group(0)
+
+    def _split_url(self, url: Any) -> Optional[str]:
+        """Plan path for a request URL, settling the plan base_url from the first one seen"""
+        if isinstance(url, dict):
+            raw = url.get('raw')
+            if raw is None:
+                host = url.get('host', '')
+                host = '.'.join(host) if isinstance(host, list) else host
+                path = url.get('path', '')
+                path = '/'.join(path) if isinstance(path, list) else path
+                raw = f"{url['protocol']}://{host}/{path}" if url.get('protocol') else f"{host}/{path}"
+                query = [f"{q['key']}={q.get('value', '')}" for q in url.get('query', []) if not q.get('disabled')]
+                if query:
+                    raw += '?' + '&'.join(query)
+            # Postman path variables (:petId) carry their values alongside the URL
+            for variable in url.get('variable', []):
+                if variable.get('key') and variable.get('value') is not None:
+                    raw = re.sub(rf':{re.escape(variable["key"])}(?=/|\?|$)', str(variable['value']), raw)
+        else:
+            raw = url or ''
+
+        # {{baseUrl}}/pet: the variable is the plan base_url, resolved once the whole collection is read
+        leading = re.match(r'\{\{([^{}]+)\}\}', raw)
+        if leading:
+            name = leading.group(1).strip()
+            if self.base_variable is None and self.base_url is None:
+                self.base_variable = name
+            if name == self.base_variable:
+                return self._as_path(self._substitute(raw[leading.end():]))
+
+        raw = self._substitute(raw)
+        if '://' not in raw:
+            raw = 'http://' + raw
+        parts = urlsplit(raw)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if self.base_url is None and self.base_variable is None:
+            self.base_url = origin
+        if origin != self.base_url:
+            return None
+        return self._as_path(raw[len(origin):])
+
+    @staticmethod
+    def _as_path(path: str) -> str:
+        return path if path.startswith('/') else '/' + path
+
+    def _expected_status(self, events: List) -> Optional[int]:
+        for event in events or []:
+            if event.get('listen') != 'test':
+                continue
+            script = event.get('script', {}).get('exec', [])
+            source = '\n'.join(script) if isinstance(script, list) else str(script)
+            for pattern in STATUS_ASSERTIONS:
+                match = pattern.search(source)
+                if match:
+                    return int(match.group(1))
+            if STATUS_OK_ASSERTION.search(source):
+                return 200
+        return None
+
+    def _create_test_case(self, item: Dict, case_id: str) -> Optional[Dict]:
+        """Convert a Postman request item to a test case, or None if the runner can't send it"""
+        name = item.get('name', 'Unnamed Request')
+        request = item.get('request', {})
+        if isinstance(request, str):
+            request = {'url': request}
+
+        method = request.get('method', 'GET').upper()
+        # Requests the runner can't send are skipped rather than failing at run time
+        if method not in SUPPORTED_METHODS:
+            self.warnings.append(f"{name}: method {method} is not supported by the runner, skipped")
+            return None
+
+        path = self._split_url(request.get('url'))
+        if path is None:
+            self.warnings.append(f"{name}: URL is not on the plan base_url {self.base_url}, skipped")
+            return None
+
+        test_case = {'id': case_id, 'name': name}
+
+        # Descriptions written by convert_to_postman carry the expectations back
+        description = request.get('description') or item.get('description') or ''
+        if isinstance(description, dict):
+            description = description.get('content', '')
+        kept = []
+        expected_status = None
+        expected_response = None
+        for part in description.split('\n\n') if description else []:
+            if part.startswith(EXPECTED_STATUS_PREFIX) and part[len(EXPECTED_STATUS_PREFIX):].strip().isdigit():
+                expected_status = int(part[len(EXPECTED_STATUS_PREFIX):])
+            elif part.startswith(EXPECTED_RESPONSE_PREFIX):
+                try:
+                    expected_response = json.loads(part[len(EXPECTED_RESPONSE_PREFIX):])
+                except ValueError:
+                    kept.append(part)
+            else:
+                kept.append(part)
+        if kept:
+            test_case['description'] = '\n\n'.join(kept)
+
+        test_case['method'] = method
+        test_case['path'] = path
+
+        headers = {
+            header['key']: self._substitute(str(header.get('value', '')))
+            for header in request.get('header', [])
+            if isinstance(header, dict) and header.get('key') and not header.get('disabled')
+        }
+        if headers:
+            test_case['headers'] = headers
+
+        body = request.get('body') or {}
+        if body.get('mode') == 'raw' and body.get('raw', '').strip():
+            try:
+                test_case['body'] = json.loads(self._substitute(body['raw']))
+            except ValueError:
+                self.warnings.append(f"{name}: raw body is not JSON, dropped")
+        elif body.get('mode') not in (None, 'raw'):
+            self.warnings.append(f"{name}: {body['mode']} body is not supported, dropped")
+
+        status = self._expected_status(item.get('event'))
+        if status is None:
+            status = expected_status
+        if status is not None:
+            test_case['expected_status'] = status
+            self.stats['with_status'] += 1
+        if expected_response is not None:
+            test_case['expected_response'] = expected_response
+        self.fixture_references.update(FIXTURE_REFERENCE.findall(path + json.dumps(test_case.get('body'))))
+        return test_case
+
+    def _plan_settings(self, collection: Dict) -> Dict:
+        """Top-level plan members known only once the whole collection is read"""
+        settings = {}
+        if self.base_variable is not None:
+            base_url = self.variables.get(self.base_variable)
+            if base_url is None:
+                self.warnings.append(f"No value for {{{{{self.base_variable}}}}}; "
+                                     f"using {DEFAULT_BASE_URL} (pass --var {self.base_variable}=URL)")
+                base_url = DEFAULT_BASE_URL
+            settings['base_url'] = str(base_url).rstrip('/')
+        else:
+            settings['base_url'] = self.base_url or DEFAULT_BASE_URL
+
+        fixtures = self.variables.get(FIXTURES_VARIABLE)
+        if fixtures:
+            try:
+                settings['fixtures'] = json.loads(fixtures)
+            except ValueError:
+                self.warnings.append(f"{{{{{FIXTURES_VARIABLE}}}}} is not JSON; fixtures dropped")
+        missing = self.fixture_references - set(settings.get('fixtures') or {}) - {PARAMS, 'cleanup'}
+        if missing:
+            self.warnings.append(f"Test cases reference fixtures the collection does not define: "
+                                 f"{', '.join(sorted(missing))} (add them to the plan's \"fixtures\")")
+
+        auth = collection.get('auth') or {}
+        if auth.get('type') == 'apikey':
+            fields = {entry.get('key'): entry.get('value') for entry in auth.get('apikey', []) if isinstance(entry, dict)}
+            if fields.get('in', 'header') == 'header' and fields.get('key'):
+                settings['authentication'] = {
+                    'api_key': {'header': fields['key'], 'value': self._substitute(str(fields.get('value', '')))}
+                }
+        return settings
+
+    def write(self, out: TextIO):
+        """Stream the plan to a text stream while reading the collection"""
+        start = time.perf_counter()
+        self._reset()
+        writer = JsonStreamWriter(out, self.compact)
+        writer.begin_object()
+
+        with self._open_collection() as source:
+            reader = JsonEventReader(source)
+            root = None
+            node = None
+            described = False
+            requirements_open = False
+            open_requirement = None  # the folder whose requirement is being written
+            for event in reader.events():
+                kind = event[0]
+                if kind == 'member':
+                    node.members[event[1]] = event[2]
+                    # Collection variables usually follow the items; any seen earlier apply right away
+                    if node is root and event[1] == 'variable':
+                        added = self._add_variables(event[2])
+                        if requirements_open:
+                            self.late_variables.update(added)
+                    elif node is root and event[1] == 'info' and not requirements_open:
+                        self._describe(writer, event[2])
+                        described = True
+                elif kind == 'enter':
+                    node = _Node(node)
+                    if root is None:
+                        root = node
+                elif kind == 'begin':
+                    if node is root:
+                        writer.value('backend', 'test_type')
+                        writer.begin_array('requirements')
+                        requirements_open = True
+                    else:
+                        node.is_folder = True
+                        self.stats['folders'] += 1
+                        parent_path = node.parent.path or []
+                        node.path = parent_path + [node.members.get('name', f"Folder {self.stats['folders']}")]
+                elif kind == 'leave':
+                    finished, node = node, node.parent
+                    if finished is root:
+                        break
+                    if finished.is_folder:
+                        if open_requirement is finished:
+                            writer.end()
+                            writer.end()
+                            open_requirement = None
+                        continue
+                    # A request: it goes into its folder's requirement, opened on first use
+                    case_number = self.stats['requests'] - self.stats['skipped'] + 1
+                    self.stats['requests'] += 1
+                    test_case = self._create_test_case(finished.members, f"TC-{case_number:04d}")
+                    if test_case is None:
+                        self.stats['skipped'] += 1
+                        continue
+                    if open_requirement is not finished.parent:
+                        if open_requirement is not None:
+                            writer.end()
+                            writer.end()
+                        open_requirement = finished.parent
+                        self._begin_requirement(writer, open_requirement, root)
+                    writer.value(test_case)
+            self.stats['bytes'] = reader.bytes_read
+
+        if open_requirement is not None:
+            writer.end()
+            writer.end()
+        if not requirements_open:
+            writer.value('backend', 'test_type')
+            writer.begin_array('requirements')
+        writer.end()
+
+        if not described:
+            self._describe(writer, root.members.get('info'))
+        self._add_variables(root.members.get('variable'))
+        for key, value in self._plan_settings(root.members).items():
+            writer.value(value, key)
+        writer.end()
+
+        self.stats['seconds'] = time.perf_counter() - start
+
+    def _add_variables(self, variables: Any) -> List[str]:
+        """Add collection variables, unless overridden on the command line; returns the names added"""
+        added = []
+        for variable in variables or []:
+            if isinstance(variable, dict) and variable.get('key') and variable['key'] not in self.variables:
+                self.variables[variable['key']] = variable.get('value', '')
+                added.append(variable['key'])
+        return added
+
+    @staticmethod
+    def _describe(writer: JsonStreamWriter, info: Any):
+        info = info if isinstance(info, dict) else {}
+        writer.value(info.get('name', 'Imported Postman Collection'), 'project_name')
+        description = info.get('description')
+        if isinstance(description, dict):
+            description = description.get('content')
+        if description:
+            writer.value(description, 'description')
+
+    def _begin_requirement(self, writer: JsonStreamWriter, folder: _Node, root: _Node):
+        """Open a requirement for a folder; folders split by subfolders get one per run of requests"""
+        self.stats['requirements'] += 1
+        requirement_id = f"REQ-{self.stats['requirements']:03d}"
+        if folder is root:
+            name = 'Ungrouped Requests'
+        else:
+            name = ' / '.join(folder.path)
+        writer.begin_object()
+        writer.value(requirement_id, 'id')
+        writer.value(name, 'name')
+        description = folder.members.get('description')
+        if isinstance(description, dict):
+            description = description.get('content')
+        if description and folder is not root:
+            writer.value(description, 'description')
+        writer.begin_array('test_cases')
+
+    def save(self, output_path: str) -> Dict:
+        """Write the plan to a file and return the conversion stats
+
+        The plan is written to a temporary file first, so a collection that turns
+        out to be malformed part way through leaves no half-written plan behind.
+        """
+        if not Path(self.collection_path).is_file():
+            raise FileNotFoundError(self.collection_path)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        temp = f"{output_path}.tmp"
+        try:
+            with open(temp, 'w', encoding='utf-8') as f:
+                self.write(f)
+                # Postman exports put collection variables after the items. Only when
+                # requests used them is a second pass, with them known upfront, worth it.
+                late = self.late_variables & self.unresolved
+                if late:
+                    self.cli_variables.update({key: self.variables[key] for key in self.late_variables})
+                    first_pass = self.stats['seconds']
+                    f.seek(0)
+                    f.truncate()
+                    self.write(f)
+                    self.stats['seconds'] += first_pass
+            os.replace(temp, output_path)
+        finally:
+            Path(temp).unlink(missing_ok=True)
+
+        stats = self.stats
+        seconds = max(stats['seconds'], 1e-9)
+        print(f"[OK] Test plan saved to: {output_path}")
+        print(f"Requirements: {stats['requirements']} (from {stats['folders']} folders)")
+        print(f"Test Cases: {stats['requests'] - stats['skipped']} "
+              f"({stats['with_status']} with expected_status, {stats['skipped']} skipped)")
+        print(f"Throughput: {stats['requests'] / seconds:,.0f} requests/s, "
+              f"{stats['bytes'] / seconds / 1e6:,.1f} MB/s ({stats['seconds']:.2f}s)")
+        if self.unresolved:
+            self.warnings.append(f"Unresolved variables left as written: {', '.join(sorted(self.unresolved))} "
+                                 f"(pass --var NAME=VALUE)")
+        for warning in self.warnings[:20]:
+            print(f"  [WARN] {warning}")
+        if len(self.warnings) > 20:
+            print(f"  ... {len(self.warnings) - 20} more warnings")
+        print(f"\nRun it with:")
+        print(f"   python test_runner.py {output_path}")
+        return stats
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Convert a Postman Collection v2.1 into a runnable test plan')
+    parser.add_argument('collection', help='Postman collection JSON file (.json or .json.gz)')
+    parser.add_argument('output', nargs='?', help='Plan file to write (default: imported_plans/<collection>.json)')
+    parser.add_argument('--var', action='append', default=[], metavar='NAME=VALUE',
+                        help='Value for a Postman {{variable}}, e.g. --var baseUrl=http://localhost:3000 (repeatable)')
+    parser.add_argument('--compact', action='store_true', help='Write compact JSON instead of indenting it (about twice as fast)')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+
+    variables = {}
+    for assignment in args.var:
+        name, separator, value = assignment.partition('=')
+        if not separator:
+            print(f"Error: --var expects NAME=VALUE, got: {assignment}")
+            sys.exit(1)
+        variables[name.strip()] = value
+
+    output_path = args.output
+    if output_path is None:
+        stem = Path(args.collection).name.split('.')[0]
+        output_path = f"imported_plans/{stem}.json"
+
+    importer = PostmanImporter(args.collection, variables, args.compact)
+    try:
+        importer.save(output_path)
+    except FileNotFoundError:
+        print(f"Error: Collection file not found: {args.collection}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: Invalid Postman collection: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 """
 Convert JSON test files to Postman Collection format
-Generates a Postman Collection v2.1 from test JSON files
+Generates a Postman Collection v2.1 from test JSON files, streaming it to disk
+one request at a time (gzip-compressed when the output ends in .gz)
 """
 
+import gzip
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, TextIO, Tuple
 from datetime import datetime
 
+from json_stream import JsonStreamWriter
+from plan_loader import PlanError, load_plan
+
+# Collection variable holding the plan's fixtures as JSON, so convert_from_postman.py can restore them
+FIXTURES_VARIABLE = 'testPlanFixtures'
+
 
 class PostmanConverter:
     """Convert test JSON to Postman Collection format"""
@@ -21,14 +29,16 @@ class PostmanConverter:
     def _load_test_plan(self) -> Dict:
         """Load test plan from JSON file"""
         try:
-            with open(self.test_plan_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_plan(self.test_plan_path)
         except FileNotFoundError:
             print(f"Error: Test plan file not found: {self.test_plan_path}")
             sys.exit(1)
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON in test plan: {e}")
             sys.exit(1)
+        except PlanError as e:
+            print(f"Error: Invalid test plan: {e}")
+            sys.exit(1)
 
     def _create_postman_request(self, test_case: Dict, base_url: str) -> Dict:
         """Convert a test case to Postman request format"""
@@ -126,61 +136,122 @@ class PostmanConverter:
 
         return postman_request
 
-    def convert(self) -> Dict:
-        """Convert test plan to Postman Collection"""
-        base_url = self.test_plan.get('base_url', 'http://localhost:3000')
+    def collection_info(self) -> Dict:
         project_name = self.test_plan.get('project_name', 'API Tests')
-
-        # Build collection structure
-        collection = {
-            "info": {
-                "name": project_name,
-                "description": f"Converted from test plan: {self.test_plan_path}\nGenerated: {datetime.now().isoformat()}",
-                "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
-            },
-            "item": []
+        return {
+            "name": project_name,
+            "description": f"Converted from test plan: {self.test_plan_path}\nGenerated: {datetime.now().isoformat()}",
+            "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
         }
 
-        # Process requirements (folders) and test cases (requests)
-        requirements = self.test_plan.get('requirements', [])
+    def collection_variables(self) -> List[Dict]:
+        """Collection variables: the plan's fixtures, which Postman itself does not run"""
+        fixtures = self.test_plan.get('fixtures')
+        if not fixtures:
+            return []
+        return [{"key": FIXTURES_VARIABLE, "value": json.dumps(fixtures), "type": "string"}]
+
+    def iter_folders(self) -> Iterator[Tuple[Dict, Iterator[Dict]]]:
+        """Yield (folder, requests) per requirement
 
-        for req in requirements:
+        folder holds the name and description; requests are converted lazily as
+        the iterator is consumed.
+        """
+        base_url = self.test_plan.get('base_url', 'http://localhost:3000')
+
+        for req in self.test_plan.get('requirements', []):
             req_id = req.get('id', 'UNKNOWN')
             req_name = req.get('name', 'Unnamed Requirement')
-            req_description = req.get('description', '')
-            test_cases = req.get('test_cases', [])
-
-            # Create folder for each requirement
             folder = {
                 "name": f"{req_id} - {req_name}",
-                "description": req_description,
-                "item": []
+                "description": req.get('description', '')
             }
+            requests = (self._create_postman_request(test_case, base_url)
+                        for test_case in req.get('test_cases', []))
+            yield folder, requests
 
-            # Add test cases as requests
-            for test_case in test_cases:
-                request = self._create_postman_request(test_case, base_url)
-                folder["item"].append(request)
+    def convert(self) -> Dict:
+        """Convert test plan to Postman Collection"""
+        # Build collection structure
+        collection = {
+            "info": self.collection_info(),
+            "item": []
+        }
 
+        # Process requirements (folders) and test cases (requests)
+        for folder, requests in self.iter_folders():
+            folder["item"] = list(requests)
             collection["item"].append(folder)
 
+        variables = self.collection_variables()
+        if variables:
+            collection["variable"] = variables
         return collection
 
-    def save(self, output_path: str):
-        """Save Postman collection to file"""
-        collection = self.convert()
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(collection, f, indent=2)
+    def write(self, out: TextIO, compact: bool = False) -> Dict:
+        """Write the collection to a text stream one request at a time; returns the counts
+
+        Output matches json.dump(self.convert(), indent=2) (or compact separators)
+        without ever holding the whole collection.
+        """
+        writer = JsonStreamWriter(out, compact)
+        writer.begin_object()
+        writer.value(self.collection_info(), 'info')
+        writer.begin_array('item')
+        counts = {'folders': 0, 'requests': 0}
+        for folder, requests in self.iter_folders():
+            counts['requests'] += write_folder(writer, folder, requests)
+            counts['folders'] += 1
+        writer.end()
+        variables = self.collection_variables()
+        if variables:
+            writer.value(variables, 'variable')
+        writer.end()
+        return counts
+
+    def save(self, output_path: str, compact: bool = False, compress: bool = None) -> Dict:
+        """Stream the Postman collection to a file and return its counts
+
+        A path ending in .gz is gzip-compressed unless compress says otherwise.
+        """
+        with open_output(output_path, compress) as f:
+            counts = self.write(f, compact)
 
         print(f"[OK] Postman collection saved to: {output_path}")
-        print(f"Collection: {collection['info']['name']}")
-        print(f"Folders: {len(collection['item'])}")
-
-        total_requests = sum(len(folder['item']) for folder in collection['item'])
-        print(f"Total Requests: {total_requests}")
+        print(f"Collection: {self.test_plan.get('project_name', 'API Tests')}")
+        print(f"Folders: {counts['folders']}")
+        print(f"Total Requests: {counts['requests']}")
         print(f"\nImport this file into Postman:")
         print(f"   File -> Import -> Upload Files -> {output_path}")
+        return counts
+
+
+def write_folder(writer: JsonStreamWriter, folder: Dict, requests: Iterable[Dict], *copies: JsonStreamWriter) -> int:
+    """Write one folder and its requests, to `writer` and any extra `copies`; returns the request count"""
+    writers = (writer,) + copies
+    for target in writers:
+        target.begin_object()
+        for key, value in folder.items():
+            target.value(value, key)
+        target.begin_array('item')
+    count = 0
+    for request in requests:
+        for target in writers:
+            target.value(request)
+        count += 1
+    for target in writers:
+        target.end()
+        target.end()
+    return count
+
+
+def open_output(path, compress: bool = None) -> TextIO:
+    """Text stream for a collection file; gzip-compressed for .gz paths or when compress is set"""
+    if compress is None:
+        compress = str(path).endswith('.gz')
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
 
 
 def main():
@@ -190,6 +261,7 @@ def main():
         print("\nExamples:")
         print("  python convert_to_postman.py tests/pet/pet_crud.json")
         print("  python convert_to_postman.py tests/pet/pet_crud.json postman_pet_crud.json")
+        print("  python convert_to_postman.py tests/pet/pet_crud.json postman_pet_crud.json.gz")
         sys.exit(1)
 
     test_plan_path = sys.argv[1]
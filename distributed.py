@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Distributed test execution
+A coordinator splits plans into shards balanced by historical durations and
+hands them to workers (other machines, or local processes) over HTTP. Workers
+stream results back as NDJSON and the coordinator merges them into the usual
+per-plan and combined JSON/HTML reports.
+"""
+
+import argparse
+import heapq
+import hmac
+import ipaddress
+import json
+import os
+import queue
+import re
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from contracts import DEFAULT_SPEC_PATH
+from plan_loader import PlanError, load_plan, validate_plan
+from reporting import write_json_report
+from results import as_dict
+from run_all_plans import discover_plans, merge_reports, print_plan_summary, report_stem
+from test_runner import Colors, TestRunner, build_summary, dependency_units, render_html_report
+from timing import LatencyRecorder
+
+DEFAULT_PORT = 8765
+
+SHARD_BY = ('plan', 'requirement', 'case')
+
+# Shared secret between coordinator and workers: --token, or this environment variable
+TOKEN_ENV = 'SHARD_WORKER_TOKEN'
+TOKEN_HEADER = 'X-Shard-Token'
+
+# Estimate for test cases that no earlier report has a duration for, if none has any
+DEFAULT_ESTIMATE_MS = 100.0
+
+# Fixture body fields whose values the server keeps unique; they get a per-shard suffix
+NAMESPACED_FIELDS = ('username',)
+
+# Explicit numeric fixture ids are moved into a per-shard range
+SHARD_ID_STRIDE = 1_000_000
+
+
+# --- Sharding --------------------------------------------------------------
+
+# Id of a row expanded from a parameterized case: TC-PET-001[42]
+EXPANDED_ID = re.compile(r'^(.*)\[\d+\]$')
+
+
+def load_history(paths: List[str]) -> Dict[str, float]:
+    """Test case id -> duration_ms from earlier JSON reports; later reports win
+
+    Rows of a parameterized case add up to the duration of the case itself.
+    """
+    durations = {}
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"{Colors.YELLOW}Warning: Skipping history {path}: {e}{Colors.RESET}")
+            continue
+        rows = {}
+        for result in report.get('results', []):
+            if result.get('response_status') is not None and 'id' in result:
+                expanded = EXPANDED_ID.match(result['id'])
+                if expanded:
+                    rows[expanded.group(1)] = rows.get(expanded.group(1), 0.0) + (result.get('duration_ms') or 0.0)
+                else:
+                    durations[result['id']] = result.get('duration_ms') or 0.0
+        durations.update(rows)
+    return durations
+
+
+def plan_units(plan_path: str, shard_by: str) -> List[List[int]]:
+    """Groups of test case positions (plan order) that must run on the same worker"""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        runner = TestRunner(plan_path)
+        try:
+            schedule = runner._build_schedule()
+        finally:
+            runner.close()
+    return dependency_units(schedule, shard_by)
+
+
+def plan_cases(plan: Dict) -> List[Dict]:
+    return [test_case for req in plan.get('requirements', []) for test_case in req.get('test_cases', [])]
+
+
+def build_shards(plans: List[Tuple[str, Dict]], shard_count: int, shard_by: str, history: Dict[str, float]) -> List[Dict]:
+    """Assign plan units to shards, longest first onto the least loaded shard"""
+    known = list(history.values())
+    default_ms = sum(known) / len(known) if known else DEFAULT_ESTIMATE_MS
+
+    units = []
+    for plan_index, (plan_path, plan) in enumerate(plans):
+        cases = plan_cases(plan)
+        for positions in plan_units(plan_path, shard_by):
+            estimate = sum(history.get(cases[position].get('id'), default_ms) for position in positions)
+            units.append((estimate, plan_index, positions))
+    units.sort(key=lambda unit: (-unit[0], unit[1], unit[2][0]))
+
+    shards = [{'shard': number + 1, 'estimate_ms': 0.0, 'plans': {}} for number in range(shard_count)]
+    loads = [(0.0, number) for number in range(shard_count)]
+    for estimate, plan_index, positions in units:
+        load, number = heapq.heappop(loads)
+        shard = shards[number]
+        shard['estimate_ms'] += estimate
+        shard['plans'].setdefault(plan_index, []).extend(positions)
+        heapq.heappush(loads, (load + estimate, number))
+
+    for shard in shards:
+        shard['plans'] = {plan_index: sorted(positions) for plan_index, positions in sorted(shard['plans'].items())}
+    return [shard for shard in shards if shard['plans']]
+
+
+def namespace_plan(plan: Dict, shard: int) -> Dict:
+    """Give the plan's fixtures shard-unique usernames and ids
+
+    Every shard creates its own copy of the fixtures; without this, parallel
+    workers hitting one server would create and delete each other's users.
+    Occurrences of the old values anywhere in the plan (paths, query strings,
+    bodies, expected responses, cleanup) are rewritten to match.
+    """
+    replacements = {}
+    for name, fixture in plan.get('fixtures', {}).items():
+        body = fixture.get('body') if name != 'cleanup' and isinstance(fixture, dict) else None
+        if not isinstance(body, dict):
+            continue
+        for field in NAMESPACED_FIELDS:
+            if isinstance(body.get(field), str):
+                replacements[body[field]] = f"{body[field]}_s{shard}"
+        if isinstance(body.get('id'), int) and not isinstance(body['id'], bool):
+            replacements[str(body['id'])] = str(body['id'] + shard * SHARD_ID_STRIDE)
+    if not replacements:
+        return plan
+
+    pattern = re.compile(r'(?<![\w.-])(' + '|'.join(map(re.escape, sorted(replacements, key=len, reverse=True))) + r')(?![\w.-])')
+
+    def replace(text: str) -> str:
+        return pattern.sub(lambda match: replacements[match.group(1)], text)
+
+    def rewrite(value, key=None):
+        # Numeric ids appear as JSON numbers in bodies and as text in paths
+        if isinstance(value, int) and not isinstance(value, bool) and str(value) in replacements \
+                and key is not None and (key == 'id' or key.endswith('Id')):
+            return int(replacements[str(value)])
+        if isinstance(value, dict):
+            return {k: rewrite(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [rewrite(item, key) for item in value]
+        return replace(value) if isinstance(value, str) else value
+
+    return rewrite(plan)
+
+
+def shard_plan(plan: Dict, positions: List[int], shard: int) -> Dict:
+    """The part of a plan holding the given test case positions, fixtures namespaced"""
+    wanted = set(positions)
+    requirements = []
+    position = 0
+    for req in plan.get('requirements', []):
+        cases = []
+        for test_case in req.get('test_cases', []):
+            if position in wanted:
+                cases.append(test_case)
+            position += 1
+        if cases:
+            requirements.append(dict(req, test_cases=cases))
+    return namespace_plan(dict(plan, requirements=requirements), shard)
+
+
+# --- Worker ----------------------------------------------------------------
+
+class ShardRunner(TestRunner):
+    """TestRunner over an in-memory shard plan that streams each result as it is recorded"""
+
+    def __init__(self, name: str, plan: Dict, emit: Callable[[Dict], None], **kwargs):
+        self.shard_plan = plan
+        self.emit = emit
+        self.rows = {}  # entry index -> results recorded so far; rows of one entry are recorded in order by one thread
+        super().__init__(name, **kwargs)
+
+    def _load_test_plan(self) -> Dict:
+        errors = validate_plan(self.shard_plan)
+        if errors:
+            raise PlanError('; '.join(errors))
+        return self.shard_plan
+
+    def _record_result(self, result, entry: Dict):
+        super()._record_result(result, entry)
+        row = self.rows.get(entry['index'], 0)
+        self.rows[entry['index']] = row + 1
+        self.emit({'record': 'result', 'plan': self.test_plan_path, 'position': entry['index'], 'row': row,
+                   'result': as_dict(result)})
+
+
+def run_shard(shard: Dict, emit: Callable[[Dict], None]):
+    """Run every plan of a shard, emitting result, plan and error records"""
+    options = shard.get('options', {})
+    for item in shard['plans']:
+        name = item['name']
+        try:
+            runner = ShardRunner(name, item['plan'], emit, workers=options.get('workers', 1),
+                                 local_server=options.get('local_server'), contract=options.get('contract'))
+        except (PlanError, SystemExit) as e:
+            emit({'record': 'error', 'plan': name, 'error': f"Test plan could not be loaded: {e}"})
+            continue
+        try:
+            runner.run_all_tests()
+        except (BrokenPipeError, ConnectionError):
+            raise
+        except SystemExit:
+            emit({'record': 'error', 'plan': name, 'error': 'Test plan could not be scheduled'})
+        except Exception as e:
+            emit({'record': 'error', 'plan': name, 'error': f"Error: {str(e)}"})
+        finally:
+            runner.close()
+        emit({'record': 'plan', 'plan': name, 'base_url': runner.base_url, 'latency_state': runner.latency.state()})
+
+
+class WorkerRequestHandler(BaseHTTPRequestHandler):
+    """POST /shards runs a shard and streams its records back as NDJSON"""
+
+    server_version = 'PetstoreShardWorker/1.0'
+
+    def _authorized(self) -> bool:
+        """Check the shared token; a worker without one only listens on loopback"""
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ''), token):
+            self.server.log(f"Rejected a request from {self.client_address[0]}: missing or wrong {TOKEN_HEADER}")
+            self.send_error(401, f"Missing or wrong {TOKEN_HEADER}")
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != '/health':
+            self.send_error(404)
+            return
+        payload = json.dumps({'status': 'ok'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/shards':
+            self.send_error(404)
+            return
+        try:
+            shard = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        except json.JSONDecodeError as e:
+            self.send_error(400, f"Invalid shard: {e}")
+            return
+
+        # HTTP/1.0 without Content-Length: the stream ends when the connection closes
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        lock = threading.Lock()
+
+        def emit(record: Dict):
+            line = (json.dumps(record) + '\n').encode('utf-8')
+            with lock:
+                self.wfile.write(line)
+                self.wfile.flush()
+
+        self.server.log(f"Shard {shard.get('shard')} from {self.client_address[0]}: {len(shard['plans'])} plan(s)")
+        try:
+            run_shard(shard, emit)
+            emit({'record': 'done', 'shard': shard.get('shard')})
+        except (BrokenPipeError, ConnectionError):
+            self.server.log(f"Shard {shard.get('shard')}: coordinator disconnected, stopped")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WorkerServer(ThreadingHTTPServer):
+    """Shard worker; each request runs on its own thread"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], token: str = None):
+        self.token = token
+        super().__init__(address, WorkerRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def log(self, message: str):
+        print(message, file=sys.stderr, flush=True)
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def run_worker(args: argparse.Namespace):
+    """Serve shards until interrupted"""
+    token = args.token or os.environ.get(TOKEN_ENV)
+    if not token and not is_loopback(args.host):
+        # Workers run whatever plan they are sent, so anything reachable from the network needs the secret
+        print(f"{Colors.RED}Error: --host {args.host} needs a shared secret: pass --token or set {TOKEN_ENV}{Colors.RESET}",
+              file=sys.stderr)
+        sys.exit(1)
+    server = WorkerServer((args.host, args.port), token)
+    # First stdout line is the worker URL; --local-workers reads it
+    print(f"Worker listening on {server.url}", flush=True)
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# --- Coordinator -----------------------------------------------------------
+
+def start_local_workers(count: int, token: str) -> List[Tuple[subprocess.Popen, str]]:
+    """Spawn worker processes on free loopback ports; the token goes through the environment, not argv"""
+    workers = []
+    for _ in range(count):
+        process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'worker', '--port', '0', '--quiet'],
+            stdout=subprocess.PIPE, text=True, env=dict(os.environ, **{TOKEN_ENV: token})
+        )
+        line = process.stdout.readline().strip()
+        if not line.startswith('Worker listening on '):
+            process.kill()
+            raise RuntimeError(f"Local worker failed to start: {line or 'no output'}")
+        workers.append((process, line.rsplit(' ', 1)[1]))
+    return workers
+
+
+def stream_shard(worker_url: str, payload: Dict, records: queue.Queue, timeout: float, token: str = None):
+    """Send one shard to a worker and forward its records; the last one is 'done' or 'shard_error'"""
+    shard = payload['shard']
+    headers = {TOKEN_HEADER: token} if token else {}
+    try:
+        with requests.post(f"{worker_url.rstrip('/')}/shards", json=payload, headers=headers, stream=True,
+                           timeout=(timeout, None)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    record = json.loads(line)
+                    record['shard'] = shard
+                    records.put(record)
+                    if record['record'] == 'done':
+                        return
+        records.put({'record': 'shard_error', 'shard': shard, 'error': f"{worker_url} closed the stream early"})
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        records.put({'record': 'shard_error', 'shard': shard, 'error': f"{worker_url}: {e}"})
+
+
+def dispatch(shards: List[Dict], payloads: Dict[int, Dict], worker_urls: List[str], records: queue.Queue, timeout: float,
+             token: str = None):
+    """Each worker pulls the next (largest remaining) shard when it finishes one"""
+    pending = queue.Queue()
+    for shard in shards:
+        pending.put(shard['shard'])
+
+    def work(url: str):
+        while True:
+            try:
+                number = pending.get_nowait()
+            except queue.Empty:
+                return
+            records.put({'record': 'start', 'shard': number, 'worker': url})
+            stream_shard(url, payloads[number], records, timeout, token)
+
+    threads = [threading.Thread(target=work, args=(url,), daemon=True) for url in worker_urls]
+    for thread in threads:
+        thread.start()
+
+    def finish():
+        for thread in threads:
+            thread.join()
+        records.put(None)
+
+    threading.Thread(target=finish, daemon=True).start()
+
+
+def print_streamed_result(result: Dict, shard: int):
+    icon = f"{Colors.GREEN}[PASS]{Colors.RESET}" if result['passed'] else f"{Colors.RED}[FAIL]{Colors.RESET}"
+    print(f"  {icon} [{result['id']}] {result['name']} {Colors.CYAN}(shard {shard}){Colors.RESET}")
+    if not result['passed']:
+        print(f"    {Colors.RED}Error: {result['message']}{Colors.RESET}")
+
+
+def collect(records: queue.Queue, shards: List[Dict], plans: List[Tuple[str, Dict]]) -> Tuple[Dict, List[str]]:
+    """Gather streamed records into per-plan results (original plan order) and shard errors"""
+    by_number = {shard['shard']: shard for shard in shards}
+    plan_index = {path: index for index, (path, _) in enumerate(plans)}
+    collected = {index: {'results': {}, 'latency': LatencyRecorder(), 'base_url': None, 'errors': []}
+                 for index in range(len(plans))}
+    errors = []
+    started = {}
+
+    while True:
+        record = records.get()
+        if record is None:
+            break
+        shard = by_number[record['shard']]
+        kind = record['record']
+        if kind == 'start':
+            started[shard['shard']] = time.perf_counter()
+            print(f"{Colors.BOLD}Shard {shard['shard']}{Colors.RESET} -> {record['worker']} "
+                  f"(~{shard['estimate_ms']:.0f} ms estimated)")
+        elif kind == 'result':
+            index = plan_index[record['plan']]
+            # Map the position within the shard's plan back to the original plan; rows of a parameterized case keep their order
+            position = shard['plans'][index][record['position']]
+            collected[index]['results'][position, record['row']] = record['result']
+            print_streamed_result(record['result'], shard['shard'])
+        elif kind == 'plan':
+            entry = collected[plan_index[record['plan']]]
+            entry['latency'].merge(LatencyRecorder.from_state(record['latency_state']))
+            entry['base_url'] = entry['base_url'] or record['base_url']
+        elif kind == 'error':
+            collected[plan_index[record['plan']]]['errors'].append(record['error'])
+            print(f"{Colors.RED}[ERROR] Shard {shard['shard']} {record['plan']}: {record['error']}{Colors.RESET}")
+        elif kind == 'done':
+            elapsed = time.perf_counter() - started.get(shard['shard'], time.perf_counter())
+            print(f"{Colors.GREEN}Shard {shard['shard']} finished in {elapsed:.1f}s{Colors.RESET}")
+        elif kind == 'shard_error':
+            errors.append(f"Shard {shard['shard']}: {record['error']}")
+            print(f"{Colors.RED}[ERROR] Shard {shard['shard']}: {record['error']}{Colors.RESET}")
+    return collected, errors
+
+
+def plan_outcome(plan_path: str, plan: Dict, entry: Dict, report_base: Path) -> Dict:
+    """Write one plan's merged reports; returns an outcome shaped like run_all_plans.run_plan's"""
+    outcome = {'plan': plan_path, 'report': str(report_base) + '.json'}
+    expected = len(plan_cases(plan))
+    results = [entry['results'][key] for key in sorted(entry['results'])]
+    recorded = len({position for position, _ in entry['results']})
+    if entry['errors'] and not results:
+        outcome['error'] = '; '.join(entry['errors'])
+        return outcome
+
+    passed = sum(1 for result in results if result['passed'])
+    report = {
+        'project_name': plan.get('project_name'),
+        'test_type': plan.get('test_type'),
+        'base_url': entry['base_url'] or plan.get('base_url', 'http://localhost:3000'),
+        'timestamp': datetime.now().isoformat(),
+        'summary': build_summary(passed, len(results) - passed),
+        'latency': entry['latency'].summary()
+    }
+    report_base.parent.mkdir(parents=True, exist_ok=True)
+    write_json_report(report, results, outcome['report'])
+    render_html_report(dict(report, results=results, project_name=report['project_name'] or 'Unknown Project',
+                            test_type=report['test_type'] or 'backend'), str(report_base) + '.html')
+
+    outcome['report_data'] = dict(report, results=results)
+    outcome['latency_state'] = entry['latency'].state()
+    if recorded < expected:
+        outcome['missing'] = expected - recorded
+    return outcome
+
+
+def run_coordinator(args: argparse.Namespace) -> int:
+    plan_paths = discover_plans(args.patterns)
+    if not plan_paths:
+        print(f"{Colors.RED}Error: No test plans matched: {' '.join(args.patterns)}{Colors.RESET}")
+        return 1
+
+    plans = []
+    for path in plan_paths:
+        try:
+            plans.append((str(path), load_plan(path)))
+        except (OSError, json.JSONDecodeError, PlanError) as e:
+            print(f"{Colors.RED}Error: Cannot load {path}: {e}{Colors.RESET}")
+            return 1
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    history_paths = args.history or [p for p in [str(output_dir / 'test_report.json')] if os.path.exists(p)]
+    history = load_history(history_paths)
+
+    # Local workers share the given token, or one generated for this run
+    token = args.token or os.environ.get(TOKEN_ENV) or (secrets.token_urlsafe(32) if args.local_workers else None)
+    local_workers = start_local_workers(args.local_workers, token) if args.local_workers else []
+    worker_urls = list(args.worker or []) + [url for _, url in local_workers]
+    try:
+        shard_count = args.shards or len(worker_urls)
+        shards = build_shards(plans, shard_count, args.shard_by, history)
+        options = {'workers': args.workers, 'local_server': args.local_server, 'contract': args.contract}
+        payloads = {
+            shard['shard']: {
+                'shard': shard['shard'],
+                'options': options,
+                'plans': [{'name': plans[index][0], 'plan': shard_plan(plans[index][1], positions, shard['shard'])}
+                          for index, positions in shard['plans'].items()]
+            }
+            for shard in shards
+        }
+
+        print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  Petstore API - Distributed Run{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
+        print(f"{Colors.BOLD}Plans:{Colors.RESET} {len(plans)} | {Colors.BOLD}Workers:{Colors.RESET} {len(worker_urls)} | "
+              f"{Colors.BOLD}Shards:{Colors.RESET} {len(shards)} by {args.shard_by} | "
+              f"{Colors.BOLD}History:{Colors.RESET} {len(history)} durations\n")
+
+        records = queue.Queue()
+        dispatch(sorted(shards, key=lambda shard: -shard['estimate_ms']), payloads, worker_urls, records, args.connect_timeout,
+                 token)
+        collected, shard_errors = collect(records, shards, plans)
+    finally:
+        for process, _ in local_workers:
+            process.terminate()
+            process.wait()
+
+    plans_root = Path(os.path.commonpath([p.resolve().parent for p in plan_paths]))
+    outcomes = [
+        plan_outcome(path, plan, collected[index], output_dir / report_stem(Path(path), plans_root))
+        for index, (path, plan) in enumerate(plans)
+    ]
+    merged = merge_reports(outcomes, output_dir)
+    merged['project_name'] = 'Petstore API - Distributed Run'
+    merged['shards'] = [
+        {'shard': shard['shard'], 'estimate_ms': round(shard['estimate_ms'], 1),
+         'test_cases': sum(len(positions) for positions in shard['plans'].values())}
+        for shard in shards
+    ]
+
+    merged_path = output_dir / 'test_report.json'
+    with open(merged_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+
+    print_plan_summary(merged)
+    missing = sum(outcome.get('missing', 0) for outcome in outcomes)
+    if missing:
+        print(f"{Colors.RED}{missing} test case(s) produced no result{Colors.RESET}\n")
+    print(f"{Colors.GREEN}Merged report saved to: {merged_path}{Colors.RESET}")
+    render_html_report(merged, str(output_dir / 'test_report.html'))
+
+    failed = merged['summary']['failed'] > 0 or missing or shard_errors or any(plan.get('error') for plan in merged['plans'])
+    return 1 if failed else 0
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run test plans sharded across worker processes or machines')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker = commands.add_parser('worker', help='Serve shards sent by a coordinator')
+    worker.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1; use 0.0.0.0 for remote coordinators, which requires --token)')
+    worker.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    worker.add_argument('--quiet', action='store_true', help='Do not print test output')
+    worker.add_argument('--token', help=f'Shared secret coordinators must send in {TOKEN_HEADER} (default: ${TOKEN_ENV}); required off loopback')
+
+    run = commands.add_parser('run', help='Shard plans across workers and merge the reports')
+    run.add_argument('patterns', nargs='*', default=['tests/**/*.json'], help='Plan files or glob patterns (default: tests/**/*.json)')
+    run.add_argument('--worker', action='append', metavar='URL', help='Worker URL, e.g. http://10.0.0.5:8765 (repeatable)')
+    run.add_argument('--local-workers', type=int, default=0, metavar='N', help='Start N worker processes on this machine')
+    run.add_argument('--shards', type=int, help='Number of shards (default: one per worker)')
+    run.add_argument('--shard-by', choices=SHARD_BY, default='requirement', help='Smallest unit moved between shards (default: requirement)')
+    run.add_argument('--history', action='append', metavar='REPORT', help='Earlier JSON report(s) with durations to balance shards (default: <output-dir>/test_report.json)')
+    run.add_argument('--workers', type=int, default=1, help='Concurrent test cases within each plan on a worker')
+    run.add_argument('--local-server', choices=['inprocess', 'port'], help='Each worker runs plans against its own Petstore stand-in')
+    run.add_argument('--contract', nargs='?', const=DEFAULT_SPEC_PATH, metavar='SPEC', help='Validate responses against the Swagger spec schemas (path on the workers)')
+    run.add_argument('--token', help=f'Shared secret sent to the workers (default: ${TOKEN_ENV}; generated for --local-workers)')
+    run.add_argument('--connect-timeout', type=float, default=10.0, help='Seconds to wait for a worker to accept a shard')
+    run.add_argument('--output-dir', default='reports', help='Directory for per-plan and merged reports')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        if not args.worker and not args.local_workers:
+            parser.error('run needs --worker URL or --local-workers N')
+        if args.shards is not None and args.shards < 1:
+            parser.error('--shards must be at least 1')
+    return args
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    if args.command == 'worker':
+        run_worker(args)
+    else:
+        sys.exit(run_coordinator(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,129 +1,276 @@
 #!/usr/bin/env python3
 """
 Generate Postman Collections from all test files
-Creates both individual collections and one combined collection
+Creates both individual collections and one combined collection.
+Generation is incremental: a manifest records the content hash of every plan,
+and only plans that changed are converted again (in a process pool). The
+combined collection is assembled from the per-plan folder fragments.
+Every file is streamed to disk one request at a time, optionally gzip-compressed,
+so memory stays flat however many plans and test cases are combined.
 """
 
+import argparse
+import hashlib
 import json
-from pathlib import Path
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from convert_to_postman import PostmanConverter
+from pathlib import Path
+from typing import Dict, List
 
+import convert_to_postman
+import json_stream
+from convert_to_postman import PostmanConverter, open_output, write_folder
+from json_stream import JsonStreamWriter
 
-def generate_combined_collection(test_files: list) -> dict:
-    """Generate a single combined Postman collection from multiple test files"""
+MANIFEST_NAME = '.manifest.json'
+FRAGMENT_DIR = '.fragments'
+COMBINED_NAME = 'Petstore_API_Complete.json'
 
-    combined = {
-        "info": {
-            "name": "Petstore API - Complete Test Suite",
-            "description": f"Complete API test collection with all endpoints\nGenerated: {datetime.now().isoformat()}\n\nIncludes:\n- Pet Operations (CRUD, Search)\n- Store Operations (Orders, Inventory)\n- User Operations (CRUD, Authentication)",
-            "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
-        },
-        "item": []
-    }
+# Category mapping for better organization
+CATEGORIES = {
+    "pet": "Pet Operations",
+    "store": "Store Operations",
+    "user": "User Operations"
+}
+
+# Below this many changed plans a process pool costs more than it saves
+POOL_THRESHOLD = 8
+
+
+def converter_key() -> str:
+    """Hash of the converter source, so changing it rebuilds every collection"""
+    source = b''.join(Path(module.__file__).read_bytes() for module in (convert_to_postman, json_stream))
+    source += Path(__file__).read_bytes()
+    return hashlib.blake2b(source, digest_size=8).hexdigest()
+
+
+def plan_hash(plan_path: Path) -> str:
+    return hashlib.blake2b(plan_path.read_bytes(), digest_size=16).hexdigest()
+
+
+def folder_separator(compact: bool) -> str:
+    """Text between two folders of a fragment, as they sit in the combined collection"""
+    return ',' if compact else ',\n        '
+
+
+def output_name(name: str, compress: bool) -> str:
+    return f"{name}.gz" if compress else name
+
+
+def convert_plan(plan_path: str, output_path: str, fragment_path: str, compact: bool, compress: bool = False) -> Dict:
+    """Convert one plan: stream its collection and its folders fragment in a single pass
+
+    The fragment is the plan's folders already rendered as they appear inside the
+    combined collection, so assembling it is a plain copy. Requests are written as
+    they are converted, so memory does not grow with the plan. Runs in worker
+    processes, so only the counts travel back.
+    """
+    converter = PostmanConverter(plan_path)
+    counts = {'folders': 0, 'requests': 0}
+
+    Path(fragment_path).parent.mkdir(parents=True, exist_ok=True)
+    with open_output(output_path, compress) as out, open(fragment_path, 'w', encoding='utf-8') as fragment:
+        writer = JsonStreamWriter(out, compact)
+        fragment_writer = JsonStreamWriter(fragment, compact, level=4)
+        writer.begin_object()
+        writer.value(converter.collection_info(), 'info')
+        writer.begin_array('item')
+        for folder, requests in converter.iter_folders():
+            if counts['folders']:
+                fragment.write(folder_separator(compact))
+            counts['requests'] += write_folder(writer, folder, requests, fragment_writer)
+            counts['folders'] += 1
+        writer.end()
+        variables = converter.collection_variables()
+        if variables:
+            writer.value(variables, 'variable')
+        writer.end()
 
-    # Category mapping for better organization
-    categories = {
-        "pet": "Pet Operations",
-        "store": "Store Operations",
-        "user": "User Operations"
+    return counts
+
+
+def load_manifest(output_dir: Path) -> Dict:
+    try:
+        with open(output_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir: Path, manifest: Dict):
+    temp = output_dir / f"{MANIFEST_NAME}.tmp"
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp, output_dir / MANIFEST_NAME)
+
+
+def write_combined_collection(entries: List[Dict], output_dir: Path, compact: bool, compress: bool = False) -> Path:
+    """Assemble the combined collection from per-plan fragments, one folder at a time
+
+    Fragments are copied through without parsing; indented output matches
+    json.dump(..., indent=2) of the whole collection.
+    """
+    info = {
+        "name": "Petstore API - Complete Test Suite",
+        "description": f"Complete API test collection with all endpoints\nGenerated: {datetime.now().isoformat()}\n\nIncludes:\n- Pet Operations (CRUD, Search)\n- Store Operations (Orders, Inventory)\n- User Operations (CRUD, Authentication)",
+        "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
     }
 
-    # Group items by category
-    category_items = {cat: [] for cat in categories.values()}
+    # Group plans by category, keeping plan order within each
+    categories = {name: [] for name in CATEGORIES.values()}
+    for entry in entries:
+        categories.setdefault(entry['category'], []).append(entry)
+    categories = {name: items for name, items in categories.items() if any(e['folders'] for e in items)}
 
-    for test_file in test_files:
-        converter = PostmanConverter(str(test_file))
-        collection = converter.convert()
+    path = output_dir / output_name(COMBINED_NAME, compress)
+    with open_output(path, compress) as out:
+        writer = JsonStreamWriter(out, compact)
+        writer.begin_object()
+        writer.value(info, 'info')
+        writer.begin_array('item')
 
-        # Determine category from path
-        category_key = test_file.parent.name
-        category_name = categories.get(category_key, "Other")
+        for category_name, items in categories.items():
+            writer.begin_object()
+            writer.value(category_name, 'name')
+            writer.begin_array('item')
+            for entry in items:
+                if not entry['folders']:
+                    continue
+                with open(output_dir / entry['fragment'], 'r', encoding='utf-8') as fragment:
+                    writer.raw(fragment, entry['folders'])
+            writer.end()
+            writer.value(f"All {category_name.lower()} endpoints", 'description')
+            writer.end()
 
-        # Add all folders from this collection
-        for item in collection['item']:
-            category_items[category_name].append(item)
+        writer.end()
+        writer.end()
+    return path
 
-    # Build final structure with category folders
-    for category_name, items in category_items.items():
-        if items:
-            category_folder = {
-                "name": category_name,
-                "item": items,
-                "description": f"All {category_name.lower()} endpoints"
-            }
-            combined['item'].append(category_folder)
 
-    return combined
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Generate Postman collections from all test plans')
+    parser.add_argument('--tests-dir', default='tests', help='Directory searched for plan JSON files (default: tests)')
+    parser.add_argument('--output-dir', default='postman_collections', help='Output directory (default: postman_collections)')
+    parser.add_argument('--compact', action='store_true', help='Write compact JSON instead of indenting it')
+    parser.add_argument('--gzip', action='store_true', help='Write gzip-compressed collections (.json.gz)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every collection, ignoring the manifest')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes for converting changed plans')
+    return parser.parse_args(argv)
 
 
 def main():
     """Generate all Postman collections"""
+    args = parse_args()
 
     # Create output directory
-    output_dir = Path("postman_collections")
+    output_dir = Path(args.output_dir)
     output_dir.mkdir(exist_ok=True)
 
     # Find all test JSON files
-    test_files = sorted(Path("tests").rglob("*.json"))
+    test_files = sorted(Path(args.tests_dir).rglob("*.json"))
 
     print("=" * 70)
     print("  Generating Postman Collections")
     print("=" * 70)
     print()
 
-    # Generate individual collections
-    print("Generating individual collections...")
-    individual_collections = []
+    key = converter_key()
+    manifest = load_manifest(output_dir)
+    if (args.force or manifest.get('converter') != key or manifest.get('compact') != args.compact
+            or manifest.get('gzip', False) != args.gzip):
+        manifest = {}
+    previous = manifest.get('plans', {})
 
+    # Work out which plans changed since the last run
+    entries = []
+    stale = []
     for test_file in test_files:
-        converter = PostmanConverter(str(test_file))
-        output_name = f"postman_{test_file.stem}.json"
-        output_path = output_dir / output_name
+        content_hash = plan_hash(test_file)
+        fragment_id = hashlib.blake2b(str(test_file).encode(), digest_size=6).hexdigest()
+        entry = {
+            'plan': str(test_file),
+            'hash': content_hash,
+            'output': output_name(f"postman_{test_file.stem}.json", args.gzip),
+            'fragment': f"{FRAGMENT_DIR}/{test_file.stem}-{fragment_id}.json",
+            'category': CATEGORIES.get(test_file.parent.name, "Other")
+        }
+        known = previous.get(entry['plan'])
+        if (known and known['hash'] == content_hash and (output_dir / known['output']).exists()
+                and (output_dir / known['fragment']).exists()):
+            entry.update(folders=known['folders'], requests=known['requests'])
+        else:
+            stale.append(entry)
+        entries.append(entry)
+
+    # Generate individual collections
+    print(f"Generating individual collections ({len(stale)} changed, {len(entries) - len(stale)} up to date)...")
+    jobs = [(entry['plan'], str(output_dir / entry['output']), str(output_dir / entry['fragment']),
+             args.compact, args.gzip)
+            for entry in stale]
+    if len(jobs) >= POOL_THRESHOLD and args.processes > 1:
+        with ProcessPoolExecutor(max_workers=min(args.processes, len(jobs))) as executor:
+            counts = list(executor.map(convert_plan, *zip(*jobs), chunksize=max(1, len(jobs) // (args.processes * 4))))
+    else:
+        counts = [convert_plan(*job) for job in jobs]
+
+    for entry, count in zip(stale, counts):
+        entry.update(count)
+        print(f"  [OK] {entry['output']}")
 
-        converter.save(str(output_path))
-        individual_collections.append(output_name)
-        print(f"  [OK] {output_name}")
+    # Drop fragments of plans that no longer exist
+    current = {entry['plan'] for entry in entries}
+    for plan, known in previous.items():
+        if plan not in current:
+            (output_dir / known['fragment']).unlink(missing_ok=True)
 
     print()
 
     # Generate combined collection
-    print("Generating combined collection...")
-    combined = generate_combined_collection(test_files)
-    combined_path = output_dir / "Petstore_API_Complete.json"
+    combined_key = hashlib.blake2b(
+        json.dumps([(entry['plan'], entry['hash']) for entry in entries]).encode(), digest_size=16
+    ).hexdigest()
+    combined_name = output_name(COMBINED_NAME, args.gzip)
+    if combined_key == manifest.get('combined') and (output_dir / combined_name).exists():
+        print("Combined collection up to date")
+    else:
+        print("Generating combined collection...")
+        write_combined_collection(entries, output_dir, args.compact, args.gzip)
+        print(f"  [OK] {combined_name}")
+    print()
 
-    with open(combined_path, 'w', encoding='utf-8') as f:
-        json.dump(combined, f, indent=2)
+    save_manifest(output_dir, {
+        'converter': key,
+        'compact': args.compact,
+        'gzip': args.gzip,
+        'combined': combined_key,
+        'plans': {entry['plan']: entry for entry in entries}
+    })
 
     # Calculate stats
-    total_requests = 0
-    total_folders = len(combined['item'])
-
-    for category in combined['item']:
-        for folder in category['item']:
-            total_requests += len(folder['item'])
-
-    print(f"  [OK] Petstore_API_Complete.json")
-    print()
+    total_requests = sum(entry['requests'] for entry in entries)
+    total_folders = sum(entry['folders'] for entry in entries)
+    categories = {entry['category'] for entry in entries if entry['folders']}
 
     # Summary
     print("=" * 70)
     print("  Summary")
     print("=" * 70)
     print()
-    print(f"Individual Collections: {len(individual_collections)}")
-    for name in individual_collections:
-        print(f"  - {name}")
+    print(f"Individual Collections: {len(entries)}")
+    for entry in entries:
+        print(f"  - {entry['output']}")
     print()
-    print(f"Combined Collection: Petstore_API_Complete.json")
-    print(f"  Categories: {len(combined['item'])}")
+    print(f"Combined Collection: {combined_name}")
+    print(f"  Categories: {len(categories)}")
     print(f"  Folders: {total_folders}")
     print(f"  Total Requests: {total_requests}")
     print()
-    print("All collections saved to: postman_collections/")
+    print(f"All collections saved to: {output_dir}/")
     print()
     print("Import into Postman:")
-    print("  File -> Import -> Upload Files -> postman_collections/Petstore_API_Complete.json")
+    print(f"  File -> Import -> Upload Files -> {output_dir / combined_name}")
     print()
 
 
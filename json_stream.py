@@ -0,0 +1,286 @@
+"""
+Incremental JSON parsing and writing
+Decodes the items of a top-level JSON array as response chunks arrive, so
+large list responses can be processed without holding the parsed document,
+and writes large documents one member at a time.
+"""
+
+import codecs
+import json
+import re
+import shutil
+from typing import Any, List, TextIO, Union
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_SEPARATOR = re.compile(r'[ \t\n\r]*,[ \t\n\r]*')
+_DELIMITERS = ' \t\n\r,]'
+_OBJECT_DELIMITERS = _DELIMITERS + '}'
+
+
+class JsonArrayParser:
+    """Push parser for a top-level JSON array
+
+    feed() returns the items completed by a chunk; close() checks the array ended.
+    Raises ValueError if the document is not a well-formed array.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.state = 'start'   # start -> first -> (item -> separator)* -> done
+        self.count = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        self.buffer += self.text.decode(chunk, final)
+        items = []
+        buffer = self.buffer
+        position = 0
+
+        scan = self.decoder.scan_once  # C scanner; raw_decode minus its Python wrapper
+        size = len(buffer)
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position >= size:
+                break
+
+            if self.state == 'start':
+                if buffer[position] != '[':
+                    raise ValueError("Response is not a JSON array")
+                position += 1
+                self.state = 'first'
+
+            elif self.state in ('first', 'item'):
+                if self.state == 'first' and buffer[position] == ']':
+                    position += 1
+                    self.state = 'done'
+                    continue
+                try:
+                    item, end = scan(buffer, position)
+                except (StopIteration, ValueError):
+                    if final:
+                        raise ValueError(f"Invalid JSON in array item {self.count}") from None
+                    break  # item continues in a later chunk
+                # A number is only complete once a delimiter follows it ("12" may be "12.5e3")
+                if (not final and isinstance(item, (int, float)) and not isinstance(item, bool)
+                        and (end == size or buffer[end] not in _DELIMITERS)):
+                    break
+                items.append(item)
+                self.count += 1
+                # Fast path for the usual "item, item" layout
+                separator = _SEPARATOR.match(buffer, end)
+                if separator and separator.end() < size:
+                    position = separator.end()
+                    self.state = 'item'
+                else:
+                    position = end
+                    self.state = 'separator'
+
+            elif self.state == 'separator':
+                if buffer[position] == ',':
+                    self.state = 'item'
+                elif buffer[position] == ']':
+                    self.state = 'done'
+                else:
+                    raise ValueError(f"Expected ',' or ']' after array item {self.count - 1}")
+                position += 1
+
+            else:
+                raise ValueError("Unexpected data after the JSON array")
+
+        # Drop the consumed prefix so long arrays don't keep growing the buffer
+        self.buffer = buffer[position:]
+        return items
+
+    def close(self) -> List[Any]:
+        items = self.feed(b'', final=True)
+        if self.state != 'done':
+            raise ValueError("Truncated JSON array")
+        return items
+
+
+class JsonStreamWriter:
+    """Write a JSON document member by member instead of dumping it whole
+
+    Output is identical to json.dump(document, indent=2), or to
+    separators=(',', ':') when compact. `level` is the nesting depth the root
+    value sits at, for documents written into the middle of another one.
+    """
+
+    def __init__(self, out: TextIO, compact: bool = False, level: int = 0):
+        self.out = out
+        self.compact = compact
+        self.level = level
+        self.stack = []  # [closing bracket, members written] per open container
+
+    def _newline(self, depth: int) -> str:
+        return '\n' + '  ' * (self.level + depth)
+
+    def _member(self, key):
+        """Separator, indentation and key in front of the next member"""
+        if not self.stack:
+            return
+        top = self.stack[-1]
+        prefix = ',' if top[1] else ''
+        top[1] += 1
+        if not self.compact:
+            prefix += self._newline(len(self.stack))
+        if key is not None:
+            prefix += json.dumps(key) + (':' if self.compact else ': ')
+        self.out.write(prefix)
+
+    def begin_object(self, key: str = None):
+        self._member(key)
+        self.out.write('{')
+        self.stack.append(['}', 0])
+
+    def begin_array(self, key: str = None):
+        self._member(key)
+        self.out.write('[')
+        self.stack.append([']', 0])
+
+    def end(self):
+        """Close the innermost open object or array"""
+        closer, count = self.stack.pop()
+        if count and not self.compact:
+            self.out.write(self._newline(len(self.stack)))
+        self.out.write(closer)
+
+    def value(self, value: Any, key: str = None):
+        self._member(key)
+        if self.compact:
+            self.out.write(json.dumps(value, separators=(',', ':')))
+        else:
+            self.out.write(json.dumps(value, indent=2).replace('\n', self._newline(len(self.stack))))
+
+    def raw(self, source: Union[str, TextIO], members: int = 1):
+        """Append pre-rendered members, already separated from each other, to the open container
+
+        source is the text itself or a file it is copied from.
+        """
+        if not members:
+            return
+        self._member(None)
+        self.stack[-1][1] += members - 1
+        if isinstance(source, str):
+            self.out.write(source)
+        else:
+            shutil.copyfileobj(source, self.out)
+
+
+class JsonEventReader:
+    """Pull reader for a JSON object document that streams selected nested arrays
+
+    Arrays stored under a key in `stream_keys` are not decoded whole: each
+    object in them is reported as its own enter/member/leave events, and may in
+    turn contain streamed arrays. Every other value is decoded in one piece, so
+    memory is bounded by the largest such value rather than by the document.
+
+    events() yields:
+      ('enter', depth)        an object starts (depth 0 is the document itself)
+      ('member', key, value)  a decoded member of the current object
+      ('begin', key)          a streamed array starts
+      ('value', value)        a streamed array element that is not an object
+      ('end', key)            a streamed array ends
+      ('leave', depth)        the current object ends
+
+    Raises ValueError if the document is not well-formed.
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, stream, stream_keys=('item',)):
+        self.stream = stream  # binary file object
+        self.stream_keys = frozenset(stream_keys)
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.scan = json.JSONDecoder().scan_once
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False at end of input"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.CHUNK_SIZE)
+        self.bytes_read += len(chunk)
+        self.eof = not chunk
+        # Drop the consumed prefix so the buffer stays about one value long
+        self.buffer = self.buffer[self.position:] + self.text.decode(chunk, self.eof)
+        self.position = 0
+        return True
+
+    def _next_char(self) -> str:
+        """Next non-whitespace character, left unconsumed; '' at end of input"""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        found = self._next_char()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of input'!r} at byte ~{self.bytes_read}")
+        self.position += 1
+
+    def _decode(self):
+        """Decode the value at the current position, reading more input until it is complete"""
+        self._next_char()
+        while True:
+            try:
+                value, end = self.scan(self.buffer, self.position)
+            except (StopIteration, ValueError):
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON value at byte ~{self.bytes_read}") from None
+            # A number is only complete once a delimiter follows it: "1" may be the start of "1.5" or "1e3"
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buffer) or self.buffer[end] not in _OBJECT_DELIMITERS) and self._fill()):
+                continue
+            self.position = end
+            return value
+
+    def events(self):
+        self._expect('{')
+        yield from self._object(0)
+        if self._next_char():
+            raise ValueError("Unexpected data after the JSON document")
+
+    def _object(self, depth: int):
+        """Events of an object whose '{' has been consumed"""
+        yield ('enter', depth)
+        first = True
+        while self._next_char() != '}':
+            if not first:
+                self._expect(',')
+            first = False
+            if self._next_char() != '"':
+                raise ValueError(f"Expected an object key at byte ~{self.bytes_read}")
+            key = self._decode()
+            self._expect(':')
+            if key in self.stream_keys and self._next_char() == '[':
+                self.position += 1
+                yield ('begin', key)
+                yield from self._array(depth)
+                yield ('end', key)
+            else:
+                yield ('member', key, self._decode())
+        self.position += 1
+        yield ('leave', depth)
+
+    def _array(self, depth: int):
+        """Events of a streamed array whose '[' has been consumed"""
+        first = True
+        while self._next_char() != ']':
+            if not first:
+                self._expect(',')
+            first = False
+            if self._next_char() == '{':
+                self.position += 1
+                yield from self._object(depth + 1)
+            else:
+                yield ('value', self._decode())
+        self.position += 1
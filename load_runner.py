@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Load / throughput runner
+Replays the test cases of an existing JSON test plan as traffic for a fixed
+duration, at a target request rate or concurrency, with validations enabled
+"""
+
+import argparse
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import parameters
+from contracts import DEFAULT_SPEC_PATH
+from test_runner import Colors, TestRunner, build_summary, print_resilience
+from timing import LatencyHistogram, endpoint_key
+
+
+class LatencyStats:
+    """Latency and error counters for one endpoint or test case"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.statuses = {}
+
+    def add(self, result: Dict):
+        self.histogram.record(result['duration_ms'])
+        if not result['passed']:
+            self.errors += 1
+        status = str(result['response_status'] or 'error')
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict:
+        latency = self.histogram.summary()
+        count = latency.pop('count')
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': (self.errors / count * 100) if count else 0,
+            'throughput_rps': round(count / elapsed, 2) if elapsed > 0 else 0,
+            'latency_ms': {key: round(value, 2) for key, value in latency.items()},
+            'status_codes': dict(sorted(self.statuses.items()))
+        }
+
+
+class LoadRunner(TestRunner):
+    """Replays a test plan as load at a target RPS or concurrency"""
+
+    def __init__(self, test_plan_path: str, duration: float, rps: float = None, concurrency: int = 10,
+                 ramp_up: float = 0, read_only: bool = False, http_config: Dict = None, local_server: str = None,
+                 contract: str = None, stream_bodies: bool = False, max_body_bytes: int = None):
+        super().__init__(test_plan_path, http_config=http_config, workers=concurrency, local_server=local_server,
+                         contract=contract, stream_bodies=stream_bodies, max_body_bytes=max_body_bytes)
+        self.duration = duration
+        self.rps = rps
+        self.concurrency = max(1, concurrency)
+        self.ramp_up = max(0.0, min(ramp_up, duration))
+        self.scenario = self._build_scenario(read_only)
+        self.lock = threading.Lock()
+        self.overall = LatencyStats()
+        self.by_endpoint = {}
+        self.by_test_case = {}
+        self.last_results = {}
+        self.elapsed = 0.0
+        self.dropped = 0
+
+    def _build_scenario(self, read_only: bool) -> List[Dict]:
+        """Test cases replayed round-robin, in plan order"""
+        scenario = []
+        for req in self.test_plan.get('requirements', []):
+            for test_case in req.get('test_cases', []):
+                if read_only and test_case.get('method', 'GET').upper() != 'GET':
+                    continue
+                entry = {'requirement': req, 'test_case': test_case}
+                if parameters.is_parameterized(test_case):
+                    # Each replay of the case takes the next row, cycling through the data lazily
+                    entry['rows'] = parameters.cycle(test_case, Path(self.test_plan_path).parent)
+                    entry['rows_lock'] = threading.Lock()
+                scenario.append(entry)
+
+        if not scenario:
+            print(f"{Colors.RED}Error: Test plan has no test cases to replay{Colors.RESET}")
+            sys.exit(1)
+        return scenario
+
+    def _fire(self, entry: Dict):
+        """Execute one request and fold the result into the aggregates"""
+        test_case = entry['test_case']
+        if 'rows' in entry:
+            with entry['rows_lock']:
+                row_case = next(entry['rows'], None)
+            if row_case is None:
+                return
+            result = self._execute_test(row_case)
+        else:
+            result = self._execute_test(test_case)
+        test_id = test_case.get('id', 'UNKNOWN')
+        endpoint = endpoint_key(test_case)
+
+        with self.lock:
+            self.latency.record(result, endpoint, entry['requirement'].get('id', 'UNKNOWN'))
+            self.overall.add(result)
+            self.by_endpoint.setdefault(endpoint, LatencyStats()).add(result)
+            self.by_test_case.setdefault(test_id, LatencyStats()).add(result)
+            self.last_results[test_id] = result
+            self.results['total'] += 1
+            if result['passed']:
+                self.results['passed'] += 1
+            else:
+                self.results['failed'] += 1
+
+    def _send_offset(self, sequence: int) -> float:
+        """Seconds after start at which request number `sequence` is due
+
+        The rate ramps linearly from 0 to the target over ramp_up, so the number of
+        requests due by time t is rps * t^2 / (2 * ramp_up) during the ramp.
+        """
+        ramp_requests = self.rps * self.ramp_up / 2
+        if sequence < ramp_requests:
+            return math.sqrt(2 * sequence * self.ramp_up / self.rps)
+        return self.ramp_up + (sequence - ramp_requests) / self.rps
+
+    def _run_open_model(self, start: float, deadline: float):
+        """Dispatch requests on a fixed schedule (target RPS), independent of response times
+
+        At most `concurrency` requests are in flight. A send that comes due while every
+        slot is busy is dropped and counted rather than queued, so a target that falls
+        behind cannot build a backlog that keeps firing after the deadline.
+        """
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def fire(entry: Dict):
+            try:
+                self._fire(entry)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            sent = 0
+            next_send = start
+            while next_send < deadline:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if slots.acquire(blocking=False):
+                    executor.submit(fire, self.scenario[sent % len(self.scenario)])
+                else:
+                    with self.lock:
+                        self.dropped += 1
+                sent += 1
+                next_send = start + self._send_offset(sent)
+
+    def _run_closed_model(self, start: float, deadline: float):
+        """Keep N virtual users busy back-to-back; users join evenly during ramp-up"""
+        def virtual_user(user_index: int):
+            join_at = start + (self.ramp_up * user_index / self.concurrency)
+            time.sleep(max(0.0, join_at - time.perf_counter()))
+            position = user_index
+            while time.perf_counter() < deadline:
+                self._fire(self.scenario[position % len(self.scenario)])
+                position += 1
+
+        users = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(self.concurrency)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+
+    def _print_progress(self, start: float, stop: threading.Event):
+        """Print a one-line status every second while load is running"""
+        while not stop.wait(1.0):
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                total = self.results['total']
+                failed = self.results['failed']
+            rate = total / elapsed if elapsed > 0 else 0
+            error_rate = (failed / total * 100) if total else 0
+            print(f"  [{elapsed:5.0f}s] {total} requests | {rate:.1f} req/s | errors {error_rate:.1f}%")
+
+    def run_load(self) -> int:
+        """Set up fixtures, generate load for the configured duration, then clean up"""
+        mode = f"{self.rps} req/s target" if self.rps else f"{self.concurrency} concurrent users"
+
+        print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  Load Test{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
+        print(f"{Colors.BOLD}Project:{Colors.RESET} {self.test_plan.get('project_name', 'Unknown')}")
+        print(f"{Colors.BOLD}Base URL:{Colors.RESET} {self.base_url}")
+        print(f"{Colors.BOLD}Scenario:{Colors.RESET} {len(self.scenario)} test cases")
+        print(f"{Colors.BOLD}Load:{Colors.RESET} {mode} for {self.duration}s (ramp-up {self.ramp_up}s)\n")
+
+        self._setup_fixtures()
+
+        stop = threading.Event()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        progress = threading.Thread(target=self._print_progress, args=(start, stop), daemon=True)
+        progress.start()
+
+        try:
+            if self.rps:
+                self._run_open_model(start, deadline)
+            else:
+                self._run_closed_model(start, deadline)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            stop.set()
+            progress.join()
+            self._cleanup_fixtures()
+
+        self._print_load_summary()
+        return 1 if self.results['failed'] > 0 else 0
+
+    def load_summary(self) -> Dict:
+        """Throughput, latency percentiles and error rates, overall and per group"""
+        return {
+            'duration_s': round(self.elapsed, 2),
+            'target_rps': self.rps,
+            'concurrency': self.concurrency,
+            'ramp_up_s': self.ramp_up,
+            'dropped': self.dropped,
+            'overall': self.overall.summary(self.elapsed),
+            'endpoints': {key: stats.summary(self.elapsed) for key, stats in sorted(self.by_endpoint.items())},
+            'test_cases': {key: stats.summary(self.elapsed) for key, stats in self.by_test_case.items()}
+        }
+
+    def _streamed_report(self) -> Dict:
+        """Report with one aggregated row per test case plus the load section"""
+        report = super()._streamed_report()
+        load = self.load_summary()
+
+        rows = []
+        for entry in self.scenario:
+            test_id = entry['test_case'].get('id', 'UNKNOWN')
+            if test_id not in self.last_results or any(row['id'] == test_id for row in rows):
+                continue
+            stats = load['test_cases'][test_id]
+            last = self.last_results[test_id]
+            rows.append({
+                'id': test_id,
+                'name': last['name'],
+                'method': last['method'],
+                'url': last['url'],
+                'passed': stats['errors'] == 0,
+                'message': f"{stats['requests']} requests, {stats['errors']} failed"
+                           + (f" (last error: {last['message']})" if not last['passed'] else ''),
+                'response_status': last['response_status'],
+                'duration_ms': stats['latency_ms']['p50']
+            })
+
+        report['summary'] = build_summary(self.results['passed'], self.results['failed'])
+        report['results'] = rows
+        report['load'] = load
+        return report
+
+    def _print_load_summary(self):
+        """Print overall and per-endpoint load statistics"""
+        load = self.load_summary()
+        overall = load['overall']
+        latency = overall['latency_ms']
+
+        print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}  Load Summary{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
+
+        print(f"{Colors.BOLD}Requests:{Colors.RESET}    {overall['requests']} in {load['duration_s']}s")
+        print(f"{Colors.BOLD}Throughput:{Colors.RESET}  {overall['throughput_rps']} req/s")
+        print(f"{Colors.BOLD}Error Rate:{Colors.RESET}  {overall['error_rate']:.2f}%")
+        if load['dropped']:
+            print(f"{Colors.BOLD}Dropped:{Colors.RESET}     {Colors.YELLOW}{load['dropped']} sends "
+                  f"(all {self.concurrency} slots busy){Colors.RESET}")
+        print(f"{Colors.BOLD}Latency:{Colors.RESET}     p50 {latency['p50']}ms | p90 {latency['p90']}ms | "
+              f"p99 {latency['p99']}ms | max {latency['max']}ms\n")
+
+        print(f"{Colors.BOLD}{'Endpoint':<40} {'Reqs':>7} {'Err%':>6} {'p50':>8} {'p90':>8} {'p99':>8}{Colors.RESET}")
+        for endpoint, stats in load['endpoints'].items():
+            color = Colors.RED if stats['errors'] else Colors.GREEN
+            lat = stats['latency_ms']
+            print(f"{endpoint[:40]:<40} {stats['requests']:>7} {color}{stats['error_rate']:>6.1f}{Colors.RESET} "
+                  f"{lat['p50']:>8} {lat['p90']:>8} {lat['p99']:>8}")
+        print()
+
+        print_resilience(self.guard.summary())
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Replay a JSON test plan as load')
+    parser.add_argument('test_plan', help='Path to the test plan JSON file')
+    parser.add_argument('--duration', type=float, default=30, help='Load duration in seconds (default: 30)')
+    parser.add_argument('--rps', type=float, help='Target requests per second (open model); omit to run closed-model users')
+    parser.add_argument('--concurrency', type=int, default=10, help='Virtual users, or max in-flight requests with --rps')
+    parser.add_argument('--ramp-up', type=float, default=0, help='Seconds to ramp linearly up to the target load')
+    parser.add_argument('--read-only', action='store_true', help='Replay only GET test cases')
+    parser.add_argument('--local-server', choices=['inprocess', 'port'], help='Target the built-in Petstore stand-in, e.g. to benchmark the runner itself')
+    parser.add_argument('--contract', nargs='?', const=DEFAULT_SPEC_PATH, metavar='SPEC', help='Count responses violating the Swagger spec schemas as errors')
+    parser.add_argument('--stream-bodies', action='store_true', help='Validate array bodies while reading them, stopping once settled (see test_runner.py)')
+    parser.add_argument('--max-body-bytes', type=int, help='With --stream-bodies, stop reading an array body after N bytes')
+    parser.add_argument('--rate-limit', type=float, metavar='RPS', help='Client-side requests per second per host, halved on 429 (default: unlimited until a 429)')
+    parser.add_argument('--retries', type=int, help='Retries for idempotent requests on connection errors and 429/502/503/504')
+    parser.add_argument('--output', default='load_report', help='Report path without extension (default: load_report)')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+
+    runner = LoadRunner(
+        args.test_plan,
+        duration=args.duration,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        ramp_up=args.ramp_up,
+        read_only=args.read_only,
+        http_config={'rate_limit': args.rate_limit, 'retries': args.retries},
+        local_server=args.local_server,
+        contract=args.contract,
+        stream_bodies=args.stream_bodies,
+        max_body_bytes=args.max_body_bytes
+    )
+    try:
+        exit_code = runner.run_load()
+    finally:
+        runner.close()
+    runner.save_report(f'{args.output}.json')
+    runner.save_html_report(f'{args.output}.html')
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Parameterized test cases
+Expands a test case's "parameters" (a value matrix, testData lists from
+config/api-config.json and/or a CSV/NDJSON data file) into concrete test cases
+one row at a time, so a single case can drive any number of rows in bounded memory
+"""
+
+import csv
+import itertools
+import json
+from collections import ChainMap
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import placeholders
+
+# Placeholder namespace of the current row: {params.status}, {params.pet.name}
+PARAMS = 'params'
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent / 'config' / 'api-config.json'
+
+SOURCE_FORMATS = ('.csv', '.ndjson', '.jsonl')
+
+# Keys an expanded case carries: its row, and the case it was expanded from
+ROW_KEY = 'parameter_row'
+TEMPLATE_KEY = 'parameterized'
+
+# Longest row label appended to an expanded case's name
+MAX_LABEL = 60
+
+
+def is_parameterized(test_case: Dict) -> bool:
+    return 'parameters' in test_case
+
+
+@lru_cache(maxsize=None)
+def load_test_data(path: str = str(DEFAULT_CONFIG_PATH)) -> Dict[str, List]:
+    """testData lists from the API config; empty if the file is missing"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('testData', {})
+    except FileNotFoundError:
+        return {}
+
+
+def _scalar(text: str):
+    """CSV cell as a number, boolean or null when it reads as one, else the text"""
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return text
+    return value if value is None or isinstance(value, (int, float, bool)) else text
+
+
+def read_source(path: Path) -> Iterator[Dict]:
+    """Rows of a CSV (header line, then one row per line) or NDJSON (one object per line) file, read lazily"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix == '.csv':
+            for row in csv.DictReader(f):
+                yield {key: _scalar(value) for key, value in row.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def source_path(parameters: Dict, base_dir: Path) -> Path:
+    """Data file of a parameters block, relative to the plan's directory"""
+    return base_dir / parameters['source']
+
+
+def check(test_case: Dict, base_dir: Path, test_data: Dict = None) -> List[str]:
+    """Problems that would stop a test case's parameters from expanding"""
+    parameters = test_case['parameters']
+    problems = []
+    if 'source' in parameters and not source_path(parameters, base_dir).is_file():
+        problems.append(f"parameter source not found: {source_path(parameters, base_dir)}")
+    test_data = load_test_data() if test_data is None else test_data
+    for name, key in parameters.get('test_data', {}).items():
+        if not isinstance(test_data.get(key), list):
+            problems.append(f"testData has no list '{key}' for parameter '{name}'")
+    return problems
+
+
+def iter_rows(parameters: Dict, base_dir: Path, test_data: Dict = None) -> Iterator[Dict]:
+    """Parameter rows: each data file row (or one empty row) crossed with every matrix combination"""
+    test_data = load_test_data() if test_data is None else test_data
+    axes = dict(parameters.get('matrix', {}))
+    for name, key in parameters.get('test_data', {}).items():
+        axes[name] = test_data[key]
+    names = list(axes)
+
+    rows = read_source(source_path(parameters, base_dir)) if 'source' in parameters else iter([{}])
+    expanded = (
+        dict(row, **dict(zip(names, values)))
+        for row in rows
+        for values in itertools.product(*axes.values())
+    )
+    limit = parameters.get('limit')
+    return itertools.islice(expanded, limit) if limit else expanded
+
+
+def label(row: Dict) -> str:
+    text = ', '.join(f"{key}={value}" for key, value in row.items())
+    return text if len(text) <= MAX_LABEL else text[:MAX_LABEL - 3] + '...'
+
+
+def expand_case(test_case: Dict, number: int, row: Dict) -> Dict:
+    """Concrete test case for one row; path and body are rendered by the runner from the template case"""
+    case = {key: value for key, value in test_case.items() if key != 'parameters'}
+    case['id'] = f"{test_case.get('id', 'UNKNOWN')}[{number}]"
+    case['name'] = f"{test_case.get('name', 'Unnamed Test')} [{label(row)}]"
+    context = {PARAMS: row}
+    for key in ('headers', 'expected_response'):
+        if key in case:
+            case[key] = placeholders.render(placeholders.compile_template(case[key]), context)
+    # A row can carry its own expected status, e.g. a CSV column of valid and invalid inputs
+    if 'expected_status' in row:
+        case['expected_status'] = int(row['expected_status'])
+    case[ROW_KEY] = row
+    case[TEMPLATE_KEY] = test_case
+    return case
+
+
+def expand(test_case: Dict, base_dir: Path, test_data: Dict = None) -> Iterator[Dict]:
+    """Lazily yield the concrete test cases of a parameterized case"""
+    for number, row in enumerate(iter_rows(test_case['parameters'], base_dir, test_data), 1):
+        yield expand_case(test_case, number, row)
+
+
+def cycle(test_case: Dict, base_dir: Path, test_data: Dict = None) -> Iterator[Dict]:
+    """Expanded cases repeated forever (re-reading any data file), for load replay"""
+    while True:
+        empty = True
+        for case in expand(test_case, base_dir, test_data):
+            empty = False
+            yield case
+        if empty:
+            return
+
+
+def context(row: Dict, fixture_data: Dict) -> ChainMap:
+    """Placeholder context resolving {params.*} from the row and everything else from fixtures"""
+    return ChainMap({PARAMS: row}, fixture_data)
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Petstore stand-in server
+In-memory implementation of the endpoints in docs/petstore-swagger.json, so
+suites can run without the proxy and the live API. It can be served on a local
+port or mounted into a requests session as an in-process transport.
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Base URL used for the in-process transport; never resolved or connected to
+IN_PROCESS_URL = 'http://petstore.local'
+
+PET_STATUSES = ('available', 'pending', 'sold')
+ORDER_STATUSES = ('placed', 'approved', 'delivered')
+
+# GET /store/order/{orderId} declares "minimum": 1, "maximum": 10 in docs/petstore-swagger.json
+ORDER_LOOKUP_MAX = 10
+
+# First id given to placed orders in a seeded store; unknown ids between the lookup range and this are invalid
+ORDER_ID_BASE = 1000
+
+USERNAME_PATTERN = re.compile(r'^[A-Za-z0-9._-]+$')
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# (path segments, {method: handler name}); '*' matches one segment, literal routes win
+ROUTES = [
+    (('pet',), {'POST': 'add_pet', 'PUT': 'update_pet'}),
+    (('pet', 'findByStatus'), {'GET': 'find_pets_by_status'}),
+    (('pet', 'findByTags'), {'GET': 'find_pets_by_tags'}),
+    (('pet', '*'), {'GET': 'get_pet', 'POST': 'update_pet_with_form', 'DELETE': 'delete_pet'}),
+    (('pet', '*', 'uploadImage'), {'POST': 'upload_image'}),
+    (('store', 'inventory'), {'GET': 'get_inventory'}),
+    (('store', 'order'), {'POST': 'place_order'}),
+    (('store', 'order', '*'), {'GET': 'get_order', 'DELETE': 'delete_order'}),
+    (('user',), {'POST': 'create_user'}),
+    (('user', 'createWithArray'), {'POST': 'create_users'}),
+    (('user', 'createWithList'), {'POST': 'create_users'}),
+    (('user', 'login'), {'GET': 'login'}),
+    (('user', 'logout'), {'GET': 'logout'}),
+    (('user', '*'), {'GET': 'get_user', 'PUT': 'update_user', 'DELETE': 'delete_user'}),
+]
+
+
+def api_response(code: int, message: Any, type_: str = 'unknown') -> Dict:
+    """ApiResponse body as defined in the spec"""
+    return {'code': code, 'type': type_, 'message': message}
+
+
+def error(status: int, message: str) -> Tuple[int, Dict]:
+    return status, api_response(status, message, 'error')
+
+
+def parse_id(value: Any):
+    """Integer id from a path segment or body field, or None when it isn't an integer
+
+    Numeric strings are accepted like the live API's JSON binding does, which
+    matters for bodies where a placeholder rendered an id into a string.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StandInRequest:
+    """Parsed request passed to route handlers"""
+
+    __slots__ = ('method', 'params', 'query', 'headers', 'raw_body')
+
+    def __init__(self, method: str, params: List[str], query: Dict[str, List[str]], headers, raw_body: bytes):
+        self.method = method
+        self.params = params
+        self.query = query
+        self.headers = headers
+        self.raw_body = raw_body
+
+    def json(self) -> Any:
+        """Decoded JSON body, or None if absent or malformed"""
+        try:
+            return json.loads(self.raw_body) if self.raw_body else None
+        except ValueError:
+            return None
+
+    def form(self) -> Dict:
+        """Form fields from a urlencoded or JSON body"""
+        content_type = (self.headers.get('Content-Type') or '') if self.headers else ''
+        if 'application/x-www-form-urlencoded' in content_type:
+            return {key: values[-1] for key, values in parse_qs(self.raw_body.decode('utf-8', 'replace')).items()}
+        body = self.json()
+        return body if isinstance(body, dict) else {}
+
+    def values(self, name: str) -> List[str]:
+        """All values of a repeatable query parameter, accepting comma-separated lists"""
+        return [item for value in self.query.get(name, []) for item in value.split(',')]
+
+
+class PetStore:
+    """In-memory Petstore with status and tag indexes
+
+    Seeded with pets and orders 1-10 and the user user1/password, like the
+    sample data the live API ships with. Safe to share between threads.
+    """
+
+    def __init__(self, seed: bool = True):
+        self.lock = threading.Lock()
+        self.pets = {}
+        self.orders = {}
+        self.users = {}
+        self.pets_by_status = {status: set() for status in PET_STATUSES}
+        self.pets_by_tag = {}
+        self.next_ids = {'pet': 1, 'order': 1, 'user': 1}
+        self.literal_routes = {segments: methods for segments, methods in ROUTES if '*' not in segments}
+        self.wildcard_routes = [(segments, methods) for segments, methods in ROUTES if '*' in segments]
+        if seed:
+            self._seed()
+
+    def _seed(self):
+        for number in range(1, 11):
+            self._store_pet({
+                'id': number,
+                'category': {'id': 1, 'name': 'Dogs'},
+                'name': f"doggie-{number}",
+                'photoUrls': [f"https://example.com/doggie-{number}.jpg"],
+                'tags': [{'id': 1, 'name': 'seed'}],
+                'status': PET_STATUSES[number % len(PET_STATUSES)]
+            })
+            self.orders[number] = {
+                'id': number, 'petId': number, 'quantity': 1,
+                'shipDate': '2025-01-01T00:00:00.000+0000', 'status': 'placed', 'complete': False
+            }
+        self.users['user1'] = {
+            'id': 1, 'username': 'user1', 'firstName': 'first name 1', 'lastName': 'last name 1',
+            'email': 'email1@test.com', 'password': 'password', 'phone': '123-456-7890', 'userStatus': 1
+        }
+        self.next_ids = {'pet': 11, 'order': ORDER_ID_BASE, 'user': 2}
+
+    def _new_id(self, kind: str, table: Dict) -> int:
+        while self.next_ids[kind] in table:
+            self.next_ids[kind] += 1
+        new_id = self.next_ids[kind]
+        self.next_ids[kind] += 1
+        return new_id
+
+    # Pet index maintenance (callers hold self.lock)
+
+    def _store_pet(self, pet: Dict):
+        self._unindex_pet(pet['id'])
+        self.pets[pet['id']] = pet
+        if pet.get('status') in self.pets_by_status:
+            self.pets_by_status[pet['status']].add(pet['id'])
+        for tag in pet.get('tags') or []:
+            if isinstance(tag, dict) and tag.get('name'):
+                self.pets_by_tag.setdefault(tag['name'], set()).add(pet['id'])
+
+    def _unindex_pet(self, pet_id: int):
+        pet = self.pets.get(pet_id)
+        if pet is None:
+            return
+        self.pets_by_status.get(pet.get('status'), set()).discard(pet_id)
+        for tag in pet.get('tags') or []:
+            if isinstance(tag, dict) and tag.get('name') in self.pets_by_tag:
+                self.pets_by_tag[tag['name']].discard(pet_id)
+
+    def _pets(self, pet_ids) -> List[Dict]:
+        return [self.pets[pet_id] for pet_id in sorted(pet_ids)]
+
+    @staticmethod
+    def _pet_errors(pet) -> str:
+        if not isinstance(pet, dict):
+            return "Invalid input"
+        if not isinstance(pet.get('name'), str) or not pet['name']:
+            return "Invalid input: name is required"
+        if not isinstance(pet.get('photoUrls'), list):
+            return "Invalid input: photoUrls is required"
+        if pet.get('status') is not None and pet['status'] not in PET_STATUSES:
+            return f"Invalid input: status must be one of {', '.join(PET_STATUSES)}"
+        return None
+
+    # Request handling
+
+    def handle(self, method: str, target: str, headers=None, body: bytes = b'') -> Tuple[int, Dict, bytes]:
+        """Serve one request; returns (status, headers, body)"""
+        split = urlsplit(target)
+        segments = tuple(unquote(segment) for segment in split.path.lstrip('/').split('/'))
+        if segments and segments[0] == 'v2':
+            segments = segments[1:]   # accept the live API's /v2 prefix
+
+        handler_name, params, allowed = self._route(method, segments)
+        request = StandInRequest(method, params, parse_qs(split.query, keep_blank_values=True), headers, body)
+
+        extra_headers = {}
+        if handler_name:
+            result = getattr(self, handler_name)(request)
+            status, payload = result[:2]
+            if len(result) > 2:
+                extra_headers = result[2]
+        elif allowed:
+            status, payload = error(405, "Method not allowed")
+        else:
+            status, payload = 404, api_response(404, None)
+
+        response_headers = {'Content-Type': 'application/json'}
+        response_headers.update(extra_headers)
+        return status, response_headers, json.dumps(payload).encode('utf-8')
+
+    def _route(self, method: str, segments: Tuple[str, ...]):
+        methods = self.literal_routes.get(segments)
+        params = []
+        if methods is None:
+            for pattern, candidate in self.wildcard_routes:
+                if len(pattern) == len(segments) and all(p == '*' or p == s for p, s in zip(pattern, segments)):
+                    methods = candidate
+                    params = [s for p, s in zip(pattern, segments) if p == '*']
+                    break
+        if methods is None:
+            return None, [], False
+        return methods.get(method), params, True
+
+    # /pet
+
+    def add_pet(self, request: StandInRequest):
+        pet = request.json()
+        problem = self._pet_errors(pet)
+        if problem:
+            return error(405, problem)
+        with self.lock:
+            pet['id'] = parse_id(pet.get('id'))
+            if pet['id'] is None or pet['id'] <= 0:
+                pet['id'] = self._new_id('pet', self.pets)
+            self._store_pet(pet)
+        return 200, pet
+
+    def update_pet(self, request: StandInRequest):
+        pet = request.json()
+        if not isinstance(pet, dict) or parse_id(pet.get('id')) is None:
+            return error(400, "Invalid ID supplied")
+        pet['id'] = parse_id(pet['id'])
+        problem = self._pet_errors(pet)
+        with self.lock:
+            if pet['id'] not in self.pets:
+                return error(404, "Pet not found")
+            if problem:
+                return error(405, problem)
+            self._store_pet(pet)
+        return 200, pet
+
+    def find_pets_by_status(self, request: StandInRequest):
+        if 'status' not in request.query:
+            with self.lock:
+                return 200, self._pets(self.pets)
+        statuses = request.values('status')
+        if not statuses or any(status not in PET_STATUSES for status in statuses):
+            return error(400, "Invalid status value")
+        with self.lock:
+            return 200, self._pets(set().union(*(self.pets_by_status[status] for status in statuses)))
+
+    def find_pets_by_tags(self, request: StandInRequest):
+        tags = [tag for tag in request.values('tags') if tag]
+        if not tags:
+            return error(400, "Invalid tag value")
+        with self.lock:
+            return 200, self._pets(set().union(*(self.pets_by_tag.get(tag, set()) for tag in tags)))
+
+    def get_pet(self, request: StandInRequest):
+        pet_id = parse_id(request.params[0])
+        if pet_id is None:
+            return error(400, "Invalid ID supplied")
+        with self.lock:
+            pet = self.pets.get(pet_id)
+        if pet is None:
+            return error(404, "Pet not found")
+        return 200, pet
+
+    def update_pet_with_form(self, request: StandInRequest):
+        pet_id = parse_id(request.params[0])
+        if pet_id is None:
+            return error(400, "Invalid ID supplied")
+        form = request.form()
+        if form.get('status') is not None and form['status'] not in PET_STATUSES:
+            return error(405, "Invalid input")
+        with self.lock:
+            if pet_id not in self.pets:
+                return error(404, "Pet not found")
+            pet = dict(self.pets[pet_id])
+            for field in ('name', 'status'):
+                if form.get(field):
+                    pet[field] = form[field]
+            self._store_pet(pet)
+        return 200, api_response(200, str(pet_id))
+
+    def delete_pet(self, request: StandInRequest):
+        pet_id = parse_id(request.params[0])
+        if pet_id is None:
+            return error(400, "Invalid ID supplied")
+        with self.lock:
+            if pet_id not in self.pets:
+                return error(404, "Pet not found")
+            self._unindex_pet(pet_id)
+            del self.pets[pet_id]
+        return 200, api_response(200, str(pet_id))
+
+    def upload_image(self, request: StandInRequest):
+        pet_id = parse_id(request.params[0])
+        if pet_id is None:
+            return error(400, "Invalid ID supplied")
+        with self.lock:
+            if pet_id not in self.pets:
+                return error(404, "Pet not found")
+        return 200, api_response(200, f"File uploaded, {len(request.raw_body)} bytes")
+
+    # /store
+
+    def get_inventory(self, request: StandInRequest):
+        with self.lock:
+            return 200, {status: len(pet_ids) for status, pet_ids in self.pets_by_status.items()}
+
+    def place_order(self, request: StandInRequest):
+        order = request.json()
+        if not isinstance(order, dict):
+            return error(400, "Invalid Order")
+        for field in ('petId', 'quantity'):
+            order[field] = parse_id(order.get(field, 1))
+            if order[field] is None or order[field] <= 0:
+                return error(400, f"Invalid Order: {field} must be a positive integer")
+        if order.get('status', 'placed') not in ORDER_STATUSES:
+            return error(400, f"Invalid Order: status must be one of {', '.join(ORDER_STATUSES)}")
+        order.setdefault('status', 'placed')
+        order.setdefault('complete', False)
+        with self.lock:
+            order['id'] = parse_id(order.get('id'))
+            if order['id'] is None or order['id'] <= 0:
+                order['id'] = self._new_id('order', self.orders)
+            self.orders[order['id']] = order
+        return 200, order
+
+    def get_order(self, request: StandInRequest):
+        order_id = parse_id(request.params[0])
+        if order_id is None or order_id <= 0:
+            return error(400, "Invalid ID supplied")
+        with self.lock:
+            order = self.orders.get(order_id)
+        if order is None:
+            # Unknown ids past the spec's maximum are invalid up to where placed orders start; above that they are not found
+            if ORDER_LOOKUP_MAX < order_id < ORDER_ID_BASE:
+                return error(400, "Invalid ID supplied")
+            return error(404, "Order not found")
+        return 200, order
+
+    def delete_order(self, request: StandInRequest):
+        order_id = parse_id(request.params[0])
+        if order_id is None or order_id <= 0:
+            return error(400, "Invalid ID supplied")
+        with self.lock:
+            if self.orders.pop(order_id, None) is None:
+                return error(404, "Order not found")
+        return 200, api_response(200, str(order_id))
+
+    # /user
+
+    @staticmethod
+    def _user_errors(user) -> str:
+        if not isinstance(user, dict) or not USERNAME_PATTERN.match(str(user.get('username') or '')):
+            return "Invalid username supplied"
+        if user.get('email') is not None and not EMAIL_PATTERN.match(str(user['email'])):
+            return "Invalid email supplied"
+        return None
+
+    def _save_user(self, user: Dict) -> int:
+        """Insert or replace a user (caller holds self.lock); returns its id"""
+        existing = self.users.get(user['username'])
+        if not isinstance(user.get('id'), int):
+            user['id'] = existing['id'] if existing else self._new_id('user', {u['id'] for u in self.users.values()})
+        self.users[user['username']] = user
+        return user['id']
+
+    def create_user(self, request: StandInRequest):
+        user = request.json()
+        problem = self._user_errors(user)
+        if problem:
+            return error(400, problem)
+        with self.lock:
+            user_id = self._save_user(user)
+        return 200, api_response(200, str(user_id))
+
+    def create_users(self, request: StandInRequest):
+        users = request.json()
+        if not isinstance(users, list) or any(self._user_errors(user) for user in users):
+            return error(400, "Invalid user list")
+        with self.lock:
+            for user in users:
+                self._save_user(user)
+        return 200, api_response(200, "ok")
+
+    def login(self, request: StandInRequest):
+        username = (request.query.get('username') or [''])[-1]
+        password = (request.query.get('password') or [''])[-1]
+        with self.lock:
+            user = self.users.get(username)
+        if not username or not password or user is None or user.get('password') != password:
+            return error(400, "Invalid username/password supplied")
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        headers = {
+            'X-Rate-Limit': '5000',
+            'X-Expires-After': expires.strftime('%a %b %d %H:%M:%S UTC %Y')
+        }
+        return 200, f"logged in user session:{abs(hash((username, expires))) % 10 ** 13}", headers
+
+    def logout(self, request: StandInRequest):
+        return 200, api_response(200, "ok")
+
+    def get_user(self, request: StandInRequest):
+        username = request.params[0]
+        if not USERNAME_PATTERN.match(username):
+            return error(400, "Invalid username supplied")
+        with self.lock:
+            user = self.users.get(username)
+        if user is None:
+            return error(404, "User not found")
+        return 200, user
+
+    def update_user(self, request: StandInRequest):
+        username = request.params[0]
+        user = request.json()
+        if isinstance(user, dict):
+            user.setdefault('username', username)
+        problem = self._user_errors(user) if USERNAME_PATTERN.match(username) else "Invalid username supplied"
+        with self.lock:
+            if problem is None and username not in self.users:
+                return error(404, "User not found")
+            if problem:
+                return error(400, problem)
+            user.setdefault('id', self.users[username]['id'])
+            if user['username'] != username:
+                del self.users[username]
+            self._save_user(user)
+        return 200, api_response(200, str(user['id']))
+
+    def delete_user(self, request: StandInRequest):
+        username = request.params[0]
+        if not USERNAME_PATTERN.match(username):
+            return error(400, "Invalid username supplied")
+        with self.lock:
+            if self.users.pop(username, None) is None:
+                return error(404, "User not found")
+        return 200, api_response(200, username)
+
+
+class InProcessAdapter(BaseAdapter):
+    """requests transport adapter that serves requests from a PetStore without sockets"""
+
+    def __init__(self, store: PetStore):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        split = urlsplit(request.url)
+        target = split.path + (f"?{split.query}" if split.query else '')
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        status, headers, payload = self.store.handle(request.method, target, request.headers, body)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = payload
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class PetstoreRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler delegating to the server's PetStore"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True   # avoid delayed-ACK stalls on small keep-alive responses
+    server_version = 'PetstoreStandIn/1.0'
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, payload = self.server.store.handle(self.command, self.path, self.headers, body)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PetstoreServer(ThreadingHTTPServer):
+    """Threaded HTTP server around a PetStore"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], store: PetStore = None, verbose: bool = False):
+        super().__init__(address, PetstoreRequestHandler)
+        self.store = store or PetStore()
+        self.verbose = verbose
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (e.g. --stream-bodies) just drop the connection
+        if isinstance(sys.exc_info()[1], ConnectionError) and not self.verbose:
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, store: PetStore = None) -> PetstoreServer:
+    """Serve a PetStore from a background thread; port 0 picks a free port"""
+    server = PetstoreServer((host, port), store)
+    threading.Thread(target=server.serve_forever, name='petstore-server', daemon=True).start()
+    return server
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Serve the in-memory Petstore stand-in')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=3000, help='Port to listen on (default: 3000, like the proxy)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Run the stand-in in the foreground as a drop-in for server/proxy.js"""
+    args = parse_args()
+    server = PetstoreServer((args.host, args.port), verbose=args.verbose)
+    print(f"\n🚀 Petstore stand-in running on {server.url}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Placeholder templates for test plans
+Compiles {fixture.field} placeholders once at plan load time so that rendering
+a path or body is a single pass over the precomputed placeholder positions
+"""
+
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+# {fixture_name.field} or a nested path such as {fixture_name.category.name} / {fixture_name.tags.0.name}
+PLACEHOLDER_PATTERN = re.compile(r'\{([A-Za-z_]\w*)\.([^{}\s]+)\}')
+
+_MISSING = object()
+
+
+def lookup(context: Dict, fixture_name: str, field_path: Tuple[str, ...]) -> Any:
+    """Follow a dotted field path into fixture data; returns _MISSING if any step is absent"""
+    value = context.get(fixture_name, _MISSING)
+    for step in field_path:
+        if isinstance(value, dict):
+            value = value.get(step, _MISSING)
+        elif isinstance(value, list) and step.isdigit() and int(step) < len(value):
+            value = value[int(step)]
+        else:
+            return _MISSING
+    return value
+
+
+class Template:
+    """Base class for compiled values that contain at least one placeholder"""
+
+    __slots__ = ('references',)
+
+    def render(self, context: Dict) -> Any:
+        raise NotImplementedError
+
+
+class StringTemplate(Template):
+    """String split into literal segments and (fixture, field path, source text) references"""
+
+    __slots__ = ('parts',)
+
+    def __init__(self, parts: List, references: Set[Tuple[str, Tuple[str, ...]]]):
+        self.parts = parts
+        self.references = references
+
+    def render(self, context: Dict) -> str:
+        pieces = []
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            fixture_name, field_path, source = part
+            value = lookup(context, fixture_name, field_path)
+            # Unresolved placeholders are left as written
+            pieces.append(source if value is _MISSING else str(value))
+        return ''.join(pieces)
+
+
+class DictTemplate(Template):
+    """Dict with at least one templated value; constant values are reused as-is"""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items: List[Tuple[Any, Any]], references):
+        self.items = items
+        self.references = references
+
+    def render(self, context: Dict) -> Dict:
+        return {key: render(value, context) for key, value in self.items}
+
+
+class ListTemplate(Template):
+    """List with at least one templated item"""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items: List[Any], references):
+        self.items = items
+        self.references = references
+
+    def render(self, context: Dict) -> List:
+        return [render(item, context) for item in self.items]
+
+
+def compile_template(value: Any) -> Any:
+    """Compile a plan value; values without placeholders are returned unchanged"""
+    if isinstance(value, str):
+        if '{' not in value:
+            return value
+        parts = []
+        references = set()
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(value):
+            if match.start() > position:
+                parts.append(value[position:match.start()])
+            fixture_name = match.group(1)
+            field_path = tuple(match.group(2).split('.'))
+            parts.append((fixture_name, field_path, match.group(0)))
+            references.add((fixture_name, field_path))
+            position = match.end()
+        if not references:
+            return value
+        if position < len(value):
+            parts.append(value[position:])
+        return StringTemplate(parts, references)
+
+    if isinstance(value, dict):
+        items = [(key, compile_template(item)) for key, item in value.items()]
+        references = set()
+        for _, item in items:
+            if isinstance(item, Template):
+                references |= item.references
+        return DictTemplate(items, references) if references else value
+
+    if isinstance(value, list):
+        items = [compile_template(item) for item in value]
+        references = set()
+        for item in items:
+            if isinstance(item, Template):
+                references |= item.references
+        return ListTemplate(items, references) if references else value
+
+    return value
+
+
+def render(compiled: Any, context: Dict) -> Any:
+    """Render a compiled value against fixture data"""
+    if isinstance(compiled, Template):
+        return compiled.render(context)
+    return compiled
+
+
+def references(compiled: Any) -> Set[Tuple[str, Tuple[str, ...]]]:
+    """(fixture, field path) pairs referenced by a compiled value"""
+    if isinstance(compiled, Template):
+        return compiled.references
+    return set()
+
+
+def format_reference(reference: Tuple[str, Tuple[str, ...]]) -> str:
+    """Render a reference back into placeholder syntax"""
+    fixture_name, field_path = reference
+    return '{' + fixture_name + '.' + '.'.join(field_path) + '}'
+
+
+def is_resolvable(context: Dict, reference: Tuple[str, Tuple[str, ...]]) -> bool:
+    """Whether a reference resolves against the given fixture data"""
+    return lookup(context, *reference) is not _MISSING
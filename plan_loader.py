@@ -0,0 +1,195 @@
+"""
+Test plan loading
+Parses and validates JSON test plans once, caching the result on disk keyed by
+content hash, so the runners and Postman converters share one fast loader.
+Only the standard library is imported here, to keep CLI startup cheap.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+from pathlib import Path
+from typing import Dict, List
+
+# Bump when validation or the cached format changes so stale entries are ignored
+CACHE_VERSION = b'plan-cache-2'
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.plan_cache')
+
+_cache_dir = os.environ.get('PLAN_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+# path -> (mtime_ns, size, marshalled plan); skips even the hash for unchanged files
+_loaded = {}
+
+
+class PlanError(ValueError):
+    """A test plan that is valid JSON but not a usable plan"""
+
+
+def cache_dir() -> str:
+    """Directory of the on-disk plan cache (PLAN_CACHE_DIR overrides the default)"""
+    return _cache_dir
+
+
+def validate_plan(plan) -> List[str]:
+    """Structural problems that would stop a plan from running or converting"""
+    if not isinstance(plan, dict):
+        return ["plan must be a JSON object"]
+
+    errors = []
+    for key in ('fixtures', 'authentication', 'http'):
+        if key in plan and not isinstance(plan[key], dict):
+            errors.append(f"'{key}' must be an object")
+    if 'base_url' in plan and not isinstance(plan['base_url'], str):
+        errors.append("'base_url' must be a string")
+
+    requirements = plan.get('requirements', [])
+    if not isinstance(requirements, list):
+        return errors + ["'requirements' must be a list"]
+
+    for r, requirement in enumerate(requirements):
+        where = f"requirements[{r}]"
+        if not isinstance(requirement, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        test_cases = requirement.get('test_cases', [])
+        if not isinstance(test_cases, list):
+            errors.append(f"{where}.test_cases must be a list")
+            continue
+        for t, test_case in enumerate(test_cases):
+            case_where = f"{where}.test_cases[{t}]"
+            if not isinstance(test_case, dict):
+                errors.append(f"{case_where} must be an object")
+                continue
+            for key in ('id', 'name', 'method', 'path'):
+                if key in test_case and not isinstance(test_case[key], str):
+                    errors.append(f"{case_where}.{key} must be a string")
+            status = test_case.get('expected_status')
+            if status is not None and (not isinstance(status, int) or isinstance(status, bool)):
+                errors.append(f"{case_where}.expected_status must be an integer")
+            if 'parameters' in test_case:
+                errors.extend(_validate_parameters(test_case['parameters'], f"{case_where}.parameters"))
+    return errors
+
+
+def _validate_parameters(parameters, where: str) -> List[str]:
+    """Structural problems of a test case's parameters block"""
+    if not isinstance(parameters, dict):
+        return [f"{where} must be an object"]
+
+    errors = [f"{where}.{key} is not a known parameters key" for key in parameters
+              if key not in ('matrix', 'test_data', 'source', 'limit')]
+    if not any(key in parameters for key in ('matrix', 'test_data', 'source')):
+        errors.append(f"{where} needs a matrix, test_data or source")
+
+    matrix = parameters.get('matrix', {})
+    if not isinstance(matrix, dict):
+        errors.append(f"{where}.matrix must be an object")
+    else:
+        for name, values in matrix.items():
+            if not isinstance(values, list) or not values:
+                errors.append(f"{where}.matrix.{name} must be a non-empty list")
+    test_data = parameters.get('test_data', {})
+    if not isinstance(test_data, dict) or not all(isinstance(key, str) for key in test_data.values()):
+        errors.append(f"{where}.test_data must map parameter names to testData keys")
+    source = parameters.get('source')
+    if source is not None and (not isinstance(source, str) or not source.endswith(('.csv', '.ndjson', '.jsonl'))):
+        errors.append(f"{where}.source must be a .csv, .ndjson or .jsonl path")
+    limit = parameters.get('limit')
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+        errors.append(f"{where}.limit must be a positive integer")
+    return errors
+
+
+def load_plan(path) -> Dict:
+    """Parsed and validated plan; each call returns a fresh copy
+
+    Raises FileNotFoundError, json.JSONDecodeError or PlanError.
+    """
+    # os.path rather than pathlib: per-plan overhead matters for large plan directories
+    path = os.fspath(path)
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == stat.st_mtime_ns and loaded[1] == stat.st_size:
+        return marshal.loads(loaded[2])
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.blake2b(content, digest_size=16, person=CACHE_VERSION).hexdigest()
+    cached = os.path.join(cache_dir(), digest + '.plan')
+
+    try:
+        with open(cached, 'rb') as f:
+            data = f.read()
+        plan = marshal.loads(data)
+    except (OSError, EOFError, ValueError, TypeError):
+        plan = json.loads(content)
+        errors = validate_plan(plan)
+        if errors:
+            raise PlanError(f"{path}: " + '; '.join(errors))
+        data = marshal.dumps(plan)
+        _write_cache(cached, data)
+
+    _loaded[key] = (stat.st_mtime_ns, stat.st_size, data)
+    return plan
+
+
+def _write_cache(cached: str, data: bytes):
+    """Store a cache entry atomically; a read-only or missing cache is not an error"""
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        temp = f"{cached}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, cached)
+    except OSError:
+        pass
+
+
+def clear_cache() -> int:
+    """Delete every on-disk cache entry; returns how many were removed"""
+    removed = 0
+    for entry in Path(cache_dir()).glob('*.plan'):
+        try:
+            entry.unlink()
+            removed += 1
+        except OSError:
+            pass
+    _loaded.clear()
+    return removed
+
+
+def main():
+    """Validate plans (warming the cache), or clear the cache"""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Validate test plans and manage the plan cache')
+    parser.add_argument('plans', nargs='*', help='Plan files to validate')
+    parser.add_argument('--clear-cache', action='store_true', help=f'Delete cached plans from {cache_dir()}')
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        print(f"Removed {clear_cache()} cached plans")
+
+    failed = False
+    for plan_path in args.plans:
+        try:
+            plan = load_plan(plan_path)
+        except PlanError as e:
+            print(f"[FAIL] {e}")
+            failed = True
+            continue
+        except (OSError, ValueError) as e:
+            print(f"[FAIL] {plan_path}: {e}")
+            failed = True
+            continue
+        cases = sum(len(requirement.get('test_cases', [])) for requirement in plan.get('requirements', []))
+        print(f"[OK] {plan_path} ({cases} test cases)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Runner profiling
+Low-overhead per-phase timers for the runner hot path (plan load, fixtures,
+request build, send, validate, print, report), with optional cProfile or
+sampling capture written next to the JSON report
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+# Phases in the order they happen in a run; unknown phases are reported after these
+PHASES = ('plan_load', 'fixtures', 'request_build', 'send', 'validate', 'print', 'record',
+          'report_json', 'report_html')
+
+CAPTURE_MODES = ('phases', 'cprofile', 'sample')
+
+# Default time between stack samples in sample mode
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Deepest stack kept per sample; deeper frames are cut at the root end
+MAX_STACK_DEPTH = 64
+
+TOP_FUNCTIONS = 25
+
+
+class _PhaseTimer:
+    """Context manager adding the time spent in its block to one phase"""
+
+    __slots__ = ('profiler', 'phase', 'start')
+
+    def __init__(self, profiler: 'Profiler', phase: str):
+        self.profiler = profiler
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.phase, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op"""
+
+    enabled = False
+    _timer = _NullTimer()
+
+    def add(self, phase: str, seconds: float):
+        pass
+
+    def phase(self, phase: str):
+        return self._timer
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """Per-phase wall-clock totals, plus an optional cProfile or sampling capture
+
+    add() only touches a dict owned by the calling thread, so worker threads never
+    contend. With workers, phases of concurrent requests overlap and their totals
+    can exceed the wall time.
+    """
+
+    enabled = True
+
+    def __init__(self, capture: str = 'phases', sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if capture not in CAPTURE_MODES:
+            raise ValueError(f"Unknown profile mode: {capture}")
+        self.capture = capture
+        self.sample_interval = sample_interval
+        self._local = threading.local()
+        self._tables = []
+        self._lock = threading.Lock()
+        self.started = None
+        self.stopped = None
+        self._cprofile = None
+        self._sampler = None
+        self._sampling = threading.Event()
+        self.samples = Counter()  # stack (root first) -> sample count
+        self.sample_count = 0
+
+    def _table(self) -> Dict:
+        table = getattr(self._local, 'table', None)
+        if table is None:
+            table = self._local.table = {}
+            with self._lock:
+                self._tables.append(table)
+        return table
+
+    def add(self, phase: str, seconds: float):
+        """Add time spent in a phase (one call counts as one occurrence)"""
+        table = self._table()
+        entry = table.get(phase)
+        if entry is None:
+            table[phase] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def phase(self, phase: str) -> _PhaseTimer:
+        """Time a block: `with profiler.phase('send'): ...`"""
+        return _PhaseTimer(self, phase)
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.capture == 'cprofile':
+            # cProfile follows the thread that enables it, i.e. the main thread
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.capture == 'sample':
+            self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        if self.stopped is not None:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._sampling.set()
+            self._sampler.join()
+        self.stopped = time.perf_counter()
+
+    def _sample_loop(self):
+        """Record the stack of every other thread each interval"""
+        own = threading.get_ident()
+        while not self._sampling.wait(self.sample_interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+                self.sample_count += 1
+
+    def wall_seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def phase_totals(self) -> Dict[str, List]:
+        """[seconds, count] per phase, merged across threads, in run order"""
+        merged = {}
+        with self._lock:
+            tables = list(self._tables)
+        for table in tables:
+            for phase, (seconds, count) in list(table.items()):
+                entry = merged.setdefault(phase, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += count
+        order = {phase: position for position, phase in enumerate(PHASES)}
+        return dict(sorted(merged.items(), key=lambda item: order.get(item[0], len(PHASES))))
+
+    def summary(self) -> Dict:
+        """Phase breakdown for reports"""
+        wall_ms = self.wall_seconds() * 1000
+        phases = {}
+        for phase, (seconds, count) in self.phase_totals().items():
+            total_ms = seconds * 1000
+            phases[phase] = {
+                'total_ms': round(total_ms, 3),
+                'count': count,
+                'mean_ms': round(total_ms / count, 4) if count else 0,
+                'pct_of_wall': round(total_ms / wall_ms * 100, 1) if wall_ms else 0
+            }
+        return {'mode': self.capture, 'wall_ms': round(wall_ms, 3), 'phases': phases}
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+        """Hottest functions of the capture: by own time (cProfile) or by samples on top of the stack"""
+        if self._cprofile is not None:
+            stats = pstats.Stats(self._cprofile).stats
+            rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+            return [
+                {
+                    'function': f"{name} ({os.path.basename(filename)}:{line})",
+                    'calls': calls,
+                    'own_ms': round(own * 1000, 3),
+                    'cumulative_ms': round(cumulative * 1000, 3)
+                }
+                for (filename, line, name), (_, calls, own, cumulative, _) in rows
+            ]
+        if self.sample_count:
+            own = Counter()
+            inclusive = Counter()
+            for stack, count in self.samples.items():
+                own[stack[-1]] += count
+                for function in set(stack):
+                    inclusive[function] += count
+            return [
+                {
+                    'function': function,
+                    'own_samples': count,
+                    'own_pct': round(count / self.sample_count * 100, 1),
+                    'inclusive_pct': round(inclusive[function] / self.sample_count * 100, 1)
+                }
+                for function, count in own.most_common(limit)
+            ]
+        return []
+
+    def save(self, report_path: str) -> List[str]:
+        """Write the profile next to a report; returns the files written
+
+        <report>.profile.json always; <report>.prof (pstats, for snakeviz or
+        `python -m pstats`) with cprofile; <report>.folded (collapsed stacks, for
+        flamegraph tools) with sample.
+        """
+        self.stop()
+        base = Path(report_path).with_suffix('')
+        written = []
+
+        summary = self.summary()
+        summary['top_functions'] = self.top_functions()
+        if self.capture == 'sample':
+            summary['samples'] = self.sample_count
+            summary['sample_interval_ms'] = self.sample_interval * 1000
+        path = f"{base}.profile.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        written.append(path)
+
+        if self._cprofile is not None:
+            path = f"{base}.prof"
+            self._cprofile.dump_stats(path)
+            written.append(path)
+        elif self.capture == 'sample':
+            path = f"{base}.folded"
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(';'.join(stack) + f" {count}\n")
+            written.append(path)
+        return written
+
+    def format_table(self) -> List[str]:
+        """Console lines for the phase breakdown"""
+        summary = self.summary()
+        lines = [f"{'Phase':<16}{'Total (ms)':>12}{'Count':>9}{'Mean (ms)':>12}{'% wall':>9}"]
+        for phase, stats in summary['phases'].items():
+            lines.append(f"{phase:<16}{stats['total_ms']:>12.1f}{stats['count']:>9}"
+                         f"{stats['mean_ms']:>12.3f}{stats['pct_of_wall']:>8.1f}%")
+        lines.append(f"{'wall':<16}{summary['wall_ms']:>12.1f}")
+        return lines
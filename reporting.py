@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Streaming test reports
+Appends results to an NDJSON file while a run is in progress and builds the
+final JSON/HTML reports from that stream, so memory stays flat and a partial
+report survives if the process dies
+"""
+
+import argparse
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+from urllib.parse import urlsplit
+
+from results import as_dict
+from timing import LatencyRecorder
+
+
+class StreamingReporter:
+    """Append-only NDJSON result stream
+
+    The first line is a header record ({"record": "header", ...}) describing the
+    run; every following line is one result dict exactly as it appears in the
+    JSON report. Before the first result of each test case a group record
+    ({"record": "group", "id": ..., "endpoint": ..., "requirement": ...}) keeps
+    what the latency section is keyed by, which the result itself does not carry.
+    """
+
+    def __init__(self, path: str, header: Dict):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.grouped = set()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write(json.dumps(dict(header, record='header')) + '\n')
+        self.file.flush()
+
+    def write(self, result: Dict, endpoint: str = None, requirement: str = None):
+        """Append one result, preceded by its group record the first time its id appears"""
+        line = json.dumps(as_dict(result)) + '\n'
+        with self.lock:
+            if endpoint is not None and result['id'] not in self.grouped:
+                self.grouped.add(result['id'])
+                group = {'record': 'group', 'id': result['id'], 'endpoint': endpoint, 'requirement': requirement}
+                line = json.dumps(group) + '\n' + line
+            self.file.write(line)
+            # Flush per result so a crash loses at most the line being written
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def results(self) -> Iterator[Dict]:
+        """Re-read results written so far"""
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+        return read_results(self.path)
+
+
+def read_header(path) -> Dict:
+    """Header record of an NDJSON result stream"""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+    header.pop('record', None)
+    return header
+
+
+def read_records(path) -> Iterator[Dict]:
+    """Lazily yield result and group records from an NDJSON stream, skipping a truncated last line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()  # header
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            yield json.loads(line)
+
+
+def read_results(path) -> Iterator[Dict]:
+    """Lazily yield result dicts from an NDJSON stream"""
+    return (record for record in read_records(path) if 'record' not in record)
+
+
+def write_json_report(header: Dict, results: Iterable[Dict], output_path: str):
+    """Write a report formatted like json.dump(indent=2), pulling results one at a time"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for key, value in header.items():
+            f.write(f'\n  {json.dumps(key)}: ' + json.dumps(value, indent=2).replace('\n', '\n  ') + ',')
+        f.write('\n  "results": [')
+
+        empty = True
+        for result in results:
+            f.write(('\n    ' if empty else ',\n    ') + json.dumps(as_dict(result), indent=2).replace('\n', '\n    '))
+            empty = False
+
+        f.write(']\n}' if empty else '\n  ]\n}')
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Build JSON/HTML reports from an NDJSON result stream')
+    parser.add_argument('stream', help='NDJSON stream written with --stream-report')
+    parser.add_argument('--json', dest='json_path', default='test_report.json', help='JSON report path')
+    parser.add_argument('--html', dest='html_path', default='test_report.html', help='HTML report path')
+    parser.add_argument('--html-page-size', type=int, help='Split the HTML report into pages of N results')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Rebuild reports from a stream, e.g. after an interrupted run"""
+    args = parse_args()
+
+    from test_runner import build_summary, render_html_report
+
+    header = read_header(args.stream)
+    latency = LatencyRecorder()
+    groups = {}
+    total = 0
+    passed = 0
+    for record in read_records(args.stream):
+        if record.get('record') == 'group':
+            groups[record['id']] = (record['endpoint'], record['requirement'])
+            continue
+        total += 1
+        passed += record['passed']
+        # Streams written before group records existed fall back to the resolved URL path
+        endpoint, requirement = groups.get(
+            record['id'], (f"{record['method']} {urlsplit(record['url']).path}", 'UNKNOWN'))
+        latency.record(record, endpoint, requirement)
+    header['summary'] = build_summary(passed, total - passed)
+    header['latency'] = latency.summary()
+
+    write_json_report(header, read_results(args.stream), args.json_path)
+    print(f"Report saved to: {args.json_path}")
+
+    report_data = dict(header, results=read_results(args.stream))
+    report_data['project_name'] = report_data.get('project_name') or 'Unknown Project'
+    report_data['test_type'] = report_data.get('test_type') or 'backend'
+    render_html_report(report_data, args.html_path, page_size=args.html_page_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+"""
+Request resilience
+Client-side rate limits (token buckets per host and endpoint, halved on 429 and
+recovered gradually), retries of idempotent requests with jittered exponential
+backoff, and circuit breakers that fail fast once a host or endpoint is down.
+Both engines share one RequestGuard; it only returns how long to wait, so the
+caller sleeps with time.sleep or asyncio.sleep.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Methods retried on connection errors and retry_statuses
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE', 'HEAD', 'OPTIONS')
+
+# "Too Many Requests": slow down, but the endpoint is up
+THROTTLED_STATUS = 429
+
+# Adaptive limits: a 429 halves the rate (at most once per RECUT_INTERVAL seconds),
+# which then climbs back by RECOVERY_PER_S of its ceiling every second
+DECREASE_FACTOR = 0.5
+RECUT_INTERVAL = 1.0
+RECOVERY_PER_S = 0.1
+MIN_RATE = 0.5
+
+# Share of the rate that drew a 429 that a learned limit may climb back to
+LEARNED_CEILING = 0.9
+
+# A host limited only by its first 429 starts from the rate it was sent at: the requests of the last
+# RATE_WINDOW seconds, spread over at least LEARN_WINDOW seconds
+RATE_WINDOW = 1.0
+LEARN_WINDOW = 0.1
+
+# Responses from a host that is up but failing; they count against its breaker
+SERVER_ERROR = 500
+
+
+class CircuitOpenError(Exception):
+    """A request was refused because its host or endpoint circuit is open"""
+
+
+class TokenBucket:
+    """Requests per second with a burst allowance
+
+    reserve() books the next free slot and returns how long to wait for it, so
+    callers queue up in order without holding the lock while they sleep.
+    """
+
+    def __init__(self, rate: float, burst: float = 1, adaptive: bool = True, learned: bool = False):
+        self.ceiling = float(rate)
+        self.rate = float(rate)
+        self.floor = min(self.ceiling, MIN_RATE)
+        self.burst = max(1.0, float(burst))
+        self.adaptive = adaptive
+        # A learned limit has no configured ceiling: each 429 lowers it below the rate that drew it
+        self.learned = learned
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.last_cut = None
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        if self.rate < self.ceiling:
+            self.rate = min(self.ceiling, self.rate + self.ceiling * RECOVERY_PER_S * elapsed)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def reserve(self, now: float) -> float:
+        """Take a token; seconds until it is actually available"""
+        with self.lock:
+            self._refill(now)
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def slow_down(self, now: float) -> bool:
+        """Halve the rate after a 429; False if adaptive is off or it was just cut"""
+        with self.lock:
+            if not self.adaptive or (self.last_cut is not None and now - self.last_cut < RECUT_INTERVAL):
+                return False
+            self._refill(now)
+            if self.learned:
+                self.ceiling = max(self.floor, self.rate * LEARNED_CEILING)
+            self.rate = max(self.floor, self.rate * DECREASE_FACTOR)
+            self.last_cut = now
+            return True
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures, then refuses requests for
+    `reset_after` seconds before letting a single probe through (half-open)"""
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self, now: float) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or now - self.opened_at < self.reset_after:
+                return False
+            self.probing = True
+            return True
+
+    def release(self):
+        """Give back a probe slot whose request was never sent"""
+        with self.lock:
+            self.probing = False
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.reset_after - (now - self.opened_at)) if self.opened_at is not None else 0.0
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failed(self, now: float) -> bool:
+        """Count a failure; True if it opened the circuit"""
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = now
+                self.probing = False
+                return True
+            return False
+
+
+class GuardedRequest:
+    """Progress of one logical request through its attempts"""
+
+    __slots__ = ('method', 'host', 'endpoint', 'settings', 'retries', 'attempts', 'retried',
+                 'throttled_ms', 'backoff_ms', 'failed_fast')
+
+    def __init__(self, method: str, host: str, endpoint: str, settings: Dict):
+        self.method = method
+        self.host = host
+        self.endpoint = endpoint
+        self.settings = settings
+        self.retries = settings['retries'] if method in IDEMPOTENT_METHODS else 0
+        self.attempts = 0
+        self.retried = []
+        self.throttled_ms = 0.0
+        self.backoff_ms = 0.0
+        self.failed_fast = None
+
+    def details(self) -> Optional[Dict]:
+        """What the guard did to this request, for the result; None if it went straight through"""
+        details = {}
+        if self.attempts > 1:
+            details['attempts'] = self.attempts
+            details['retried_on'] = self.retried
+            details['backoff_ms'] = round(self.backoff_ms, 2)
+        if self.throttled_ms:
+            details['throttled_ms'] = round(self.throttled_ms, 2)
+        if self.failed_fast:
+            details['circuit_open'] = self.failed_fast
+        return details or None
+
+
+class RequestGuard:
+    """Rate limits, retries and circuit breakers for every request of a run
+
+    Settings come from the runner's "http" config; a matching "hosts" entry
+    overrides them per host. Rate limits apply per host (rate_limit for every
+    host, or a URL prefix in rate_limits) and per endpoint ("METHOD /path" or
+    "/path" in rate_limits, matched against the unresolved plan path).
+    """
+
+    def __init__(self, http_config: Dict, throttle: bool = True):
+        self.config = http_config
+        self.throttle = throttle
+        self.host_settings = {}
+        self.buckets = {}
+        self.breakers = {}
+        self.sent = {}         # host -> send times of the last RATE_WINDOW seconds, to seed a limit on the first 429
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'throttled_ms': 0.0,
+                      'rate_cuts': 0, 'circuits_opened': 0, 'failed_fast': 0}
+
+    def _settings(self, host: str) -> Dict:
+        """HTTP settings for a host: the longest matching "hosts" entry over the defaults"""
+        settings = self.host_settings.get(host)
+        if settings is None:
+            settings = dict(self.config)
+            matches = [prefix for prefix in self.config['hosts'] if host.startswith(prefix.rstrip('/'))]
+            if matches:
+                settings.update(self.config['hosts'][max(matches, key=len)])
+            self.host_settings[host] = settings
+        return settings
+
+    @staticmethod
+    def _limit(spec):
+        """(rate, burst) from a rate_limits value: a number, or {"rate": ..., "burst": ...}"""
+        if isinstance(spec, dict):
+            return spec['rate'], spec.get('burst', 1)
+        return spec, 1
+
+    def _host_bucket(self, host: str, create: bool = False) -> Optional[TokenBucket]:
+        key = ('host', host)
+        bucket = self.buckets.get(key)
+        if bucket is not None or (key in self.buckets and not create):
+            return bucket
+
+        settings = self._settings(host)
+        limits = settings['rate_limits']
+        prefixes = [prefix for prefix in limits if prefix.startswith(('http://', 'https://'))
+                    and host.startswith(prefix.rstrip('/'))]
+        if prefixes:
+            bucket = TokenBucket(*self._limit(limits[max(prefixes, key=len)]), settings['adaptive_rate'])
+        elif settings['rate_limit']:
+            bucket = TokenBucket(settings['rate_limit'], 1, settings['adaptive_rate'])
+        elif create and settings['adaptive_rate']:
+            # Unlimited until the first 429: start from the recent rate that drew it, not the run's average
+            now = time.monotonic()
+            sent = self._recent(host, now)
+            first = sent[0] if sent else now
+            bucket = TokenBucket(max(MIN_RATE, max(1, len(sent)) / max(LEARN_WINDOW, now - first)), learned=True)
+        else:
+            bucket = None
+        self.buckets[key] = bucket
+        return bucket
+
+    def _recent(self, host: str, now: float) -> deque:
+        """Send times of a host within the last RATE_WINDOW seconds (caller holds self.lock)"""
+        sent = self.sent.setdefault(host, deque())
+        while sent and now - sent[0] > RATE_WINDOW:
+            sent.popleft()
+        return sent
+
+    def _endpoint_bucket(self, request: GuardedRequest) -> Optional[TokenBucket]:
+        key = ('endpoint', request.endpoint)
+        if key not in self.buckets:
+            limits = request.settings['rate_limits']
+            path = request.endpoint.split(' ', 1)[-1]
+            spec = limits.get(request.endpoint, limits.get(path))
+            self.buckets[key] = TokenBucket(*self._limit(spec), request.settings['adaptive_rate']) if spec else None
+        return self.buckets[key]
+
+    def _breakers(self, request: GuardedRequest) -> List:
+        """(key, breaker) for the request's host and endpoint; empty when breakers are off"""
+        if not request.settings['breaker_failures']:
+            return []
+        with self.lock:
+            return [
+                (key, self.breakers.setdefault(key, CircuitBreaker(request.settings['breaker_failures'],
+                                                                   request.settings['breaker_reset'])))
+                for key in (request.host, f"{request.method} {request.host}{request.endpoint.split(' ', 1)[-1]}")
+            ]
+
+    def start(self, method: str, url: str, endpoint: str = None) -> GuardedRequest:
+        """Begin a request; endpoint is "METHOD /unresolved/path" (defaults to the URL's path)"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self.lock:
+            return GuardedRequest(method, host, endpoint or f"{method} {parts.path}", self._settings(host))
+
+    def admit(self, request: GuardedRequest) -> float:
+        """Seconds to wait before sending the next attempt; raises CircuitOpenError to fail fast"""
+        now = time.monotonic()
+        breakers = self._breakers(request)
+        for position, (key, breaker) in enumerate(breakers):
+            if not breaker.allow(now):
+                for _, allowed in breakers[:position]:
+                    allowed.release()
+                request.failed_fast = key
+                with self.lock:
+                    self.stats['failed_fast'] += 1
+                raise CircuitOpenError(f"Circuit open for {key} after {breaker.failures} consecutive failures "
+                                       f"- failing fast for another {breaker.retry_in(now):.1f}s")
+
+        request.attempts += 1
+        with self.lock:
+            self.stats['requests'] += 1
+            self._recent(request.host, now).append(now)
+            buckets = [self._host_bucket(request.host), self._endpoint_bucket(request)] if self.throttle else []
+        wait = max([bucket.reserve(now) for bucket in buckets if bucket is not None], default=0.0)
+        if wait > 0:
+            request.throttled_ms += wait * 1000
+            with self.lock:
+                self.stats['throttled'] += 1
+                self.stats['throttled_ms'] += wait * 1000
+        return wait
+
+    def _backoff(self, request: GuardedRequest, retry_after: str = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After (both capped at backoff_max)"""
+        settings = request.settings
+        delay = random.uniform(0, settings['backoff_factor'] * (2 ** (request.attempts - 1)))
+        if retry_after and retry_after.strip().isdigit():
+            delay += int(retry_after)
+        delay = min(delay, settings['backoff_max'])
+        request.backoff_ms += delay * 1000
+        with self.lock:
+            self.stats['retries'] += 1
+        return delay
+
+    def _trip(self, breaker: CircuitBreaker):
+        if breaker.failed(time.monotonic()):
+            with self.lock:
+                self.stats['circuits_opened'] += 1
+
+    def completed(self, request: GuardedRequest, status: int, retry_after: str = None) -> Optional[float]:
+        """Record a response; seconds to back off before retrying it, or None to keep it"""
+        breakers = self._breakers(request)
+        if breakers:
+            # The host answered, but a 5xx means it is failing all the same
+            if status >= SERVER_ERROR:
+                self._trip(breakers[0][1])
+            else:
+                breakers[0][1].succeeded()
+            if status != THROTTLED_STATUS and status in request.settings['retry_statuses']:
+                self._trip(breakers[1][1])
+            else:
+                breakers[1][1].succeeded()
+
+        if status == THROTTLED_STATUS and self.throttle:
+            with self.lock:
+                buckets = [self._host_bucket(request.host, create=True), self._endpoint_bucket(request)]
+            for bucket in buckets:
+                if bucket is not None and bucket.slow_down(time.monotonic()):
+                    with self.lock:
+                        self.stats['rate_cuts'] += 1
+
+        if status not in request.settings['retry_statuses'] or request.attempts > request.retries:
+            return None
+        request.retried.append(str(status))
+        return self._backoff(request, retry_after)
+
+    def failed(self, request: GuardedRequest, error: Exception) -> Optional[float]:
+        """Record a connection error or timeout; seconds to back off before retrying, or None to give up"""
+        # Counts against the endpoint too, so a half-open endpoint probe that times out reopens its circuit
+        for _, breaker in self._breakers(request):
+            self._trip(breaker)
+        if request.attempts > request.retries:
+            return None
+        request.retried.append(type(error).__name__)
+        return self._backoff(request)
+
+    def abandoned(self, request: GuardedRequest):
+        """The attempt ended in an error that says nothing about the server; free any probe it held"""
+        for _, breaker in self._breakers(request):
+            breaker.release()
+
+    def rates(self) -> Dict[str, str]:
+        """Current rate of every limited host/endpoint, as "rate/ceiling req/s" """
+        with self.lock:
+            buckets = [(key, bucket) for key, bucket in self.buckets.items() if bucket is not None]
+        return {key: f"{bucket.rate:.1f}/{bucket.ceiling:.1f} req/s" for (_, key), bucket in sorted(buckets)}
+
+    def summary(self) -> Optional[Dict]:
+        """Run totals, or None if no request was retried, throttled or refused"""
+        with self.lock:
+            stats = dict(self.stats)
+        if not (stats['retries'] or stats['throttled'] or stats['rate_cuts'] or stats['failed_fast']
+                or stats['circuits_opened']):
+            return None
+        stats['throttled_ms'] = round(stats['throttled_ms'], 2)
+        stats['rates'] = self.rates()
+        return stats
@@ -0,0 +1,176 @@
+"""
+Compact test result storage
+TestResult is a slotted record with dict-style access, and ResultColumns keeps
+many results as typed arrays (one column per field) with per-test-case data
+stored once, so recording a result costs tens of bytes instead of a dict
+"""
+
+from array import array
+from typing import Dict, Iterator, List
+
+from timing import PHASES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Key order of a result in the JSON report
+RESULT_FIELDS = ('id', 'name', 'method', 'url', 'passed', 'message', 'response_status', 'duration_ms')
+
+DEFAULT_MESSAGE = "All validations passed"
+
+_NAN = float('nan')
+
+
+class TestResult:
+    """Outcome of one test case execution
+
+    Supports result['field'] access so it can stand in for the historical result dict.
+    """
+
+    __slots__ = RESULT_FIELDS + ('_timings', 'resilience')
+
+    def __init__(self, id: str, name: str, method: str, url: str, passed: bool = False, message: str = '',
+                 response_status: int = None, duration_ms: float = 0, timings=None, resilience: Dict = None):
+        self.id = id
+        self.name = name
+        self.method = method
+        self.url = url
+        self.passed = passed
+        self.message = message
+        self.response_status = response_status
+        self.duration_ms = duration_ms
+        self.timings = timings
+        self.resilience = resilience  # retries, rate limit waits or an open circuit, when any applied
+
+    @property
+    def timings(self):
+        """Phase timings as a dict, or None if the request got no response"""
+        if self._timings is None:
+            return None
+        return dict(zip(PHASES, self._timings))
+
+    @timings.setter
+    def timings(self, value):
+        if isinstance(value, dict):
+            value = tuple(value.get(phase) for phase in PHASES)
+        self._timings = value
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in RESULT_FIELDS or (key == 'timings' and self._timings is not None) or \
+            (key == 'resilience' and self.resilience is not None)
+
+    def get(self, key: str, default=None):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            return default
+
+    def to_dict(self) -> Dict:
+        """The result as it appears in the JSON report"""
+        result = {field: getattr(self, field) for field in RESULT_FIELDS}
+        if self._timings is not None:
+            result['timings'] = self.timings
+        if self.resilience is not None:
+            result['resilience'] = self.resilience
+        return result
+
+
+def as_dict(result) -> Dict:
+    """Plain dict for a TestResult or an already-plain result"""
+    return result.to_dict() if isinstance(result, TestResult) else result
+
+
+class ResultColumns:
+    """Column-oriented store of TestResults
+
+    Per-record data lives in typed arrays; id/name/method and URLs are kept once in
+    lookup tables, and only non-default messages are stored.
+    """
+
+    def __init__(self):
+        self.cases = []        # (id, name, method)
+        self.case_index = {}
+        self.urls = []
+        self.url_index = {}
+        self.case = array('I')
+        self.url = array('I')
+        self.passed = array('b')
+        self.status = array('H')   # 0 = no response
+        self.duration = array('d')
+        self.phases = {phase: array('d') for phase in PHASES}   # NaN = not measured
+        self.has_timings = array('b')
+        self.messages = {}     # record index -> message, when not DEFAULT_MESSAGE
+        self.resilience = {}   # record index -> resilience details, when any
+
+    def __len__(self) -> int:
+        return len(self.passed)
+
+    def _intern(self, table: List, index: Dict, key) -> int:
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(table)
+            table.append(key)
+        return position
+
+    def append(self, result):
+        """Store one result (TestResult or dict)"""
+        record = len(self.passed)
+        self.case.append(self._intern(self.cases, self.case_index, (result['id'], result['name'], result['method'])))
+        self.url.append(self._intern(self.urls, self.url_index, result['url']))
+        self.passed.append(1 if result['passed'] else 0)
+        self.status.append(result['response_status'] or 0)
+        self.duration.append(result['duration_ms'])
+
+        timings = result.get('timings')
+        self.has_timings.append(1 if timings is not None else 0)
+        for phase in PHASES:
+            value = timings.get(phase) if timings is not None else None
+            self.phases[phase].append(_NAN if value is None else value)
+
+        if result['message'] != DEFAULT_MESSAGE:
+            self.messages[record] = result['message']
+        if result.get('resilience') is not None:
+            self.resilience[record] = result['resilience']
+
+    def record(self, position: int) -> TestResult:
+        """Rebuild the TestResult stored at a position"""
+        test_id, name, method = self.cases[self.case[position]]
+        timings = None
+        if self.has_timings[position]:
+            timings = tuple(
+                None if value != value else value   # NaN -> None
+                for value in (self.phases[phase][position] for phase in PHASES)
+            )
+        return TestResult(
+            test_id, name, method, self.urls[self.url[position]],
+            passed=bool(self.passed[position]),
+            message=self.messages.get(position, DEFAULT_MESSAGE),
+            response_status=self.status[position] or None,
+            duration_ms=self.duration[position],
+            timings=timings,
+            resilience=self.resilience.get(position)
+        )
+
+    def __iter__(self) -> Iterator[TestResult]:
+        for position in range(len(self)):
+            yield self.record(position)
+
+    def failed(self) -> Iterator[TestResult]:
+        """Failed results in recording order"""
+        if numpy is not None:
+            positions = numpy.flatnonzero(numpy.frombuffer(self.passed, dtype=numpy.int8) == 0)
+        else:
+            positions = [position for position, passed in enumerate(self.passed) if not passed]
+        for position in positions:
+            yield self.record(int(position))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Run all test plans in parallel
+Discovers JSON test plans, runs each one in its own process and writes
+per-plan reports plus one merged JSON/HTML report
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from contracts import DEFAULT_SPEC_PATH
+from test_runner import Colors, TestRunner, build_summary, render_html_report
+from timing import LatencyRecorder
+
+
+def discover_plans(patterns: List[str]) -> List[Path]:
+    """Expand plan files and glob patterns (absolute or relative to the CWD) into a sorted list of plan files"""
+    plans = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            plans.add(path)
+        else:
+            plans.update(Path(match) for match in glob.glob(pattern, recursive=True) if os.path.isfile(match))
+    return sorted(plans)
+
+
+def report_stem(plan_path: Path, plans_root: Path) -> Path:
+    """Per-plan report location mirroring the plan layout, so names never collide"""
+    return plan_path.resolve().relative_to(plans_root).with_suffix('')
+
+
+def run_plan(plan_path: str, report_base: str, workers: int, local_server: str = None, cassette: Dict = None,
+             contract: str = None) -> Dict:
+    """Run one plan in a worker process and write its own reports"""
+    output = io.StringIO()
+    outcome = {'plan': plan_path, 'report': report_base + '.json'}
+
+    with redirect_stdout(output):
+        try:
+            runner = TestRunner(plan_path, workers=workers, local_server=local_server, cassette=cassette,
+                                contract=contract)
+            try:
+                runner.run_all_tests()
+            finally:
+                runner.close()
+
+            Path(report_base).parent.mkdir(parents=True, exist_ok=True)
+            runner.save_report(report_base + '.json')
+            runner.save_html_report(report_base + '.html')
+            outcome['report_data'] = runner.build_report()
+            outcome['latency_state'] = runner.latency.state()
+        except SystemExit:
+            outcome['error'] = 'Test plan could not be loaded'
+        except Exception as e:
+            outcome['error'] = f"Error: {str(e)}"
+
+    outcome['output'] = output.getvalue()
+    return outcome
+
+
+def merge_reports(outcomes: List[Dict], output_dir: Path) -> Dict:
+    """Combine per-plan reports into a single report"""
+    passed = 0
+    failed = 0
+    results = []
+    plans = []
+    latency = LatencyRecorder()
+
+    for outcome in outcomes:
+        report = outcome.get('report_data')
+        if report is None:
+            plans.append({
+                'plan': outcome['plan'],
+                'project_name': None,
+                'report': None,
+                'html_report': None,
+                'summary': build_summary(0, 0),
+                'error': outcome['error']
+            })
+            continue
+
+        passed += report['summary']['passed']
+        failed += report['summary']['failed']
+        results.extend(report['results'])
+        latency.merge(LatencyRecorder.from_state(outcome['latency_state']))
+        plans.append({
+            'plan': outcome['plan'],
+            'project_name': report['project_name'],
+            'report': outcome['report'],
+            'html_report': Path(outcome['report']).with_suffix('.html').relative_to(output_dir).as_posix(),
+            'summary': report['summary']
+        })
+
+    base_urls = sorted({o['report_data']['base_url'] for o in outcomes if 'report_data' in o})
+
+    return {
+        'project_name': 'Petstore API - All Test Plans',
+        'test_type': 'backend',
+        'base_url': ', '.join(base_urls),
+        'timestamp': datetime.now().isoformat(),
+        'summary': build_summary(passed, failed),
+        'latency': latency.summary(),
+        'plans': plans,
+        'results': results
+    }
+
+
+def print_plan_summary(merged: Dict):
+    """Print per-plan and overall totals"""
+    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  FINAL TEST SUMMARY{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
+
+    for plan in merged['plans']:
+        summary = plan['summary']
+        if plan.get('error'):
+            print(f"  {Colors.RED}[ERROR]{Colors.RESET} {plan['plan']}: {plan['error']}")
+        else:
+            color = Colors.GREEN if summary['failed'] == 0 else Colors.RED
+            print(f"  {color}{summary['passed']:>4}/{summary['total']:<4}{Colors.RESET} {plan['plan']}")
+    print()
+
+    summary = merged['summary']
+    print(f"{Colors.BOLD}Total Test Files Run:{Colors.RESET}  {len(merged['plans'])}")
+    print(f"{Colors.BOLD}Total Test Cases:{Colors.RESET}      {summary['total']}")
+    print(f"{Colors.GREEN}Passed:{Colors.RESET}                {summary['passed']}")
+    print(f"{Colors.RED}Failed:{Colors.RESET}                {summary['failed']}")
+    print(f"{Colors.BOLD}Pass Rate:{Colors.RESET}             {summary['pass_rate']:.1f}%\n")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run every test plan in parallel and merge the reports')
+    parser.add_argument('patterns', nargs='*', default=['tests/**/*.json'], help='Plan files or glob patterns (default: tests/**/*.json)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Number of plans to run at once')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent test cases within each plan')
+    parser.add_argument('--local-server', choices=['inprocess', 'port'], help='Run every plan against its own built-in Petstore stand-in')
+    parser.add_argument('--cassette', metavar='PATH', help='Cassette shared by all plans (see test_runner.py --cassette)')
+    parser.add_argument('--cassette-mode', choices=['record', 'replay', 'cache'], help='Cassette mode (default: replay)')
+    parser.add_argument('--contract', nargs='?', const=DEFAULT_SPEC_PATH, metavar='SPEC', help='Validate responses against the Swagger spec schemas')
+    parser.add_argument('--output-dir', default='reports', help='Directory for per-plan and merged reports')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+
+    plans = discover_plans(args.patterns)
+    if not plans:
+        print(f"{Colors.RED}Error: No test plans matched: {' '.join(args.patterns)}{Colors.RESET}")
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plans_root = Path(os.path.commonpath([p.resolve().parent for p in plans]))
+
+    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Petstore API - Running All Tests{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
+    print(f"{Colors.BOLD}Plans:{Colors.RESET} {len(plans)} | {Colors.BOLD}Processes:{Colors.RESET} {args.processes}\n")
+
+    outcomes = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processes, len(plans)))) as executor:
+        futures = {
+            executor.submit(run_plan, str(plan), str(output_dir / report_stem(plan, plans_root)), args.workers, args.local_server,
+                            {'path': args.cassette, 'mode': args.cassette_mode}, args.contract): plan
+            for plan in plans
+        }
+        # Print each plan's buffered output as soon as it finishes
+        for future in as_completed(futures):
+            outcome = future.result()
+            outcomes[futures[future]] = outcome
+            sys.stdout.write(outcome['output'])
+            if 'error' in outcome:
+                print(f"{Colors.RED}[ERROR] {outcome['plan']}: {outcome['error']}{Colors.RESET}\n")
+
+    merged = merge_reports([outcomes[plan] for plan in plans], output_dir)
+
+    merged_path = output_dir / 'test_report.json'
+    with open(merged_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+
+    print_plan_summary(merged)
+    print(f"{Colors.GREEN}Merged report saved to: {merged_path}{Colors.RESET}")
+    render_html_report(merged, str(output_dir / 'test_report.html'))
+
+    failed = merged['summary']['failed'] > 0 or any(plan.get('error') for plan in merged['plans'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
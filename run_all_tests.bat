@@ -18,54 +18,18 @@ if errorlevel 1 (
 echo [OK] Proxy server is running
 echo.
 
-REM Run Pet Tests
-echo ====================================================================
-echo Running Pet CRUD Tests...
-echo ====================================================================
-python test_runner.py tests\pet\pet_crud.json
-if exist test_report.json move test_report.json test_report_pet_crud.json
-echo.
-
-echo ====================================================================
-echo Running Pet Search Tests...
-echo ====================================================================
-python test_runner.py tests\pet\pet_search.json
-if exist test_report.json move test_report.json test_report_pet_search.json
-echo.
-
-REM Run Store Tests
-echo ====================================================================
-echo Running Store Orders Tests...
-echo ====================================================================
-python test_runner.py tests\store\store_orders.json
-if exist test_report.json move test_report.json test_report_store_orders.json
-echo.
-
-REM Run User Tests
-echo ====================================================================
-echo Running User CRUD Tests...
-echo ====================================================================
-python test_runner.py tests\user\user_crud.json
-if exist test_report.json move test_report.json test_report_user_crud.json
-echo.
-
-echo ====================================================================
-echo Running User Authentication Tests...
-echo ====================================================================
-python test_runner.py tests\user\user_auth.json
-if exist test_report.json move test_report.json test_report_user_auth.json
+REM Run every plan under tests\ in parallel; per-plan and merged reports go to reports\
+python run_all_plans.py "tests/**/*.json" --output-dir reports %*
+set EXIT_CODE=%errorlevel%
 echo.
 
 echo ======================================================================
 echo   ALL TESTS COMPLETED
 echo ======================================================================
 echo.
-echo Individual reports saved:
-echo   - test_report_pet_crud.json
-echo   - test_report_pet_search.json
-echo   - test_report_store_orders.json
-echo   - test_report_user_crud.json
-echo   - test_report_user_auth.json
+echo Individual reports saved under reports\ (mirroring tests\)
+echo Merged report: reports\test_report.json, reports\test_report.html
 echo.
 
 pause
+exit /b %EXIT_CODE%
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Run history
+Persistent per-test-case outcomes (last status, duration, failure counts) keyed
+by a hash of the test case's content, so later runs can pick only failed or
+changed cases and order them by how long they take
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from placeholders import PLACEHOLDER_PATTERN
+
+DEFAULT_HISTORY_PATH = '.test_history.json'
+
+HISTORY_VERSION = 1
+
+# Id of a row expanded from a parameterized case: TC-PET-001[42]
+EXPANDED_SUFFIX = '['
+
+
+def case_key(test_case: Dict, plan: Dict, base_dir: Path) -> str:
+    """Content hash of a test case and everything outside it that changes what it sends
+
+    That is the plan's base_url and authentication, the fixtures it references
+    and, for parameterized cases, the size and mtime of the data file.
+    """
+    text = json.dumps(test_case, sort_keys=True)
+    fixtures = plan.get('fixtures', {})
+    referenced = sorted({match.group(1) for match in PLACEHOLDER_PATTERN.finditer(text)} & set(fixtures))
+    payload = {
+        'case': test_case,
+        'base_url': plan.get('base_url'),
+        'authentication': plan.get('authentication'),
+        'fixtures': {name: fixtures[name] for name in referenced}
+    }
+    source = test_case.get('parameters', {}).get('source')
+    if source:
+        try:
+            stat = os.stat(base_dir / source)
+            payload['source'] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            payload['source'] = None
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def plan_keys(plan: Dict, base_dir: Path) -> Dict[str, str]:
+    """Test case id -> content hash for every case of a plan"""
+    return {
+        test_case.get('id', 'UNKNOWN'): case_key(test_case, plan, base_dir)
+        for req in plan.get('requirements', [])
+        for test_case in req.get('test_cases', [])
+    }
+
+
+def keys_at_revision(plan_path: str, revision: str) -> Set[str]:
+    """Content hashes of a plan's cases as committed at a git revision; empty if the plan did not exist"""
+    path = Path(plan_path).resolve()
+    completed = subprocess.run(['git', 'show', f"{revision}:./{path.name}"], cwd=path.parent,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        if 'does not exist' in completed.stderr or 'exists on disk, but not in' in completed.stderr:
+            return set()
+        raise ValueError(completed.stderr.strip() or f"git show failed for {revision}")
+    return set(plan_keys(json.loads(completed.stdout), path.parent).values())
+
+
+class RunHistory:
+    """Last outcome and duration per test case content hash, stored as one JSON file"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = Path(path)
+        self.cases = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == HISTORY_VERSION:
+                self.cases = data.get('cases', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            # A damaged history only costs the selection, never the run
+            self.cases = {}
+
+    def get(self, key: str) -> Dict:
+        return self.cases.get(key)
+
+    def failed(self, key: str) -> bool:
+        entry = self.cases.get(key)
+        return entry is not None and entry['status'] == 'failed'
+
+    def duration(self, key: str):
+        entry = self.cases.get(key)
+        return entry['duration_ms'] if entry is not None else None
+
+    def record(self, keys: Dict[str, str], results: Iterable[Dict], plan_path: str) -> int:
+        """Fold a run's results into the history; rows of a parameterized case count as that case"""
+        outcomes = {}
+        for result in results:
+            test_id = result['id']
+            if test_id not in keys and EXPANDED_SUFFIX in test_id:
+                test_id = test_id[:test_id.rindex(EXPANDED_SUFFIX)]
+            key = keys.get(test_id)
+            if key is None:
+                continue
+            outcome = outcomes.setdefault(key, {'id': test_id, 'passed': True, 'duration_ms': 0.0})
+            outcome['passed'] = outcome['passed'] and bool(result['passed'])
+            outcome['duration_ms'] += result['duration_ms'] or 0.0
+
+        now = datetime.now().isoformat(timespec='seconds')
+        for key, outcome in outcomes.items():
+            entry = self.cases.setdefault(key, {'runs': 0, 'failures': 0})
+            entry.update({
+                'id': outcome['id'],
+                'plan': plan_path,
+                'status': 'passed' if outcome['passed'] else 'failed',
+                'duration_ms': round(outcome['duration_ms'], 2),
+                'last_run': now
+            })
+            entry['runs'] += 1
+            entry['failures'] += 0 if outcome['passed'] else 1
+        return len(outcomes)
+
+    def save(self):
+        """Write atomically, so an interrupted save keeps the previous history"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': HISTORY_VERSION, 'cases': self.cases}, f, indent=1, sort_keys=True)
+        os.replace(temp, self.path)
+
+
+def order_units(units: List[List[int]], unit_keys: List[List[str]], history: RunHistory, only_failed: bool = False,
+                changed: Set[str] = None, failed_first: bool = False, by_duration: bool = False) -> List[List[int]]:
+    """Select and order groups of test cases (see test_runner.dependency_units)
+
+    A group is kept when any of its cases failed last time (only_failed) or is
+    in `changed`; with neither filter every group is kept. Failed groups sort
+    first with failed_first, then the longest groups with by_duration; cases
+    without history count as average length. Otherwise plan order is kept.
+    """
+    known = [entry['duration_ms'] for entry in history.cases.values()]
+    default_ms = sum(known) / len(known) if known else 0.0
+
+    selected = []
+    for position, (unit, keys) in enumerate(zip(units, unit_keys)):
+        failed = any(history.failed(key) for key in keys)
+        if only_failed or changed is not None:
+            if not ((only_failed and failed) or (changed is not None and any(key in changed for key in keys))):
+                continue
+        duration = sum(history.duration(key) if history.duration(key) is not None else default_ms for key in keys)
+        selected.append((
+            not failed if failed_first else False,
+            -duration if by_duration else 0.0,
+            position,
+            unit
+        ))
+    selected.sort(key=lambda item: item[:3])
+    return [item[3] for item in selected]
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Inspect or seed the test run history')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_PATH, help=f'History file (default: {DEFAULT_HISTORY_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show', help='List failing and slowest test cases')
+    show.add_argument('--limit', type=int, default=10, help='Rows per list (default: 10)')
+
+    seed = commands.add_parser('import', help='Record the results of an existing JSON report')
+    seed.add_argument('report', help='test_report.json written by test_runner.py')
+    seed.add_argument('plan', help='The plan the report was produced from')
+    return parser.parse_args(argv)
+
+
+def main():
+    """Show the history, or seed it from a JSON report"""
+    args = parse_args()
+    history = RunHistory(args.history)
+
+    if args.command == 'import':
+        from plan_loader import load_plan
+
+        plan = load_plan(args.plan)
+        with open(args.report, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        count = history.record(plan_keys(plan, Path(args.plan).parent), report.get('results', []), args.plan)
+        history.save()
+        print(f"Recorded {count} test cases from {args.report} into {args.history}")
+        return
+
+    entries = sorted(history.cases.values(), key=lambda entry: entry['last_run'], reverse=True)
+    failing = [entry for entry in entries if entry['status'] == 'failed']
+    print(f"{len(entries)} test cases in {args.history}, {len(failing)} failed on their last run\n")
+    for title, rows in (('Failed', failing), ('Slowest', sorted(entries, key=lambda entry: -entry['duration_ms']))):
+        if not rows:
+            continue
+        print(f"{title}:")
+        for entry in rows[:args.limit]:
+            print(f"  {entry['id']:<24}{entry['duration_ms']:>10.1f} ms  {entry['failures']}/{entry['runs']} failed  "
+                  f"{entry['plan']}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
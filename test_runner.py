@@ -4,13 +4,66 @@ Local Test Runner for TestSprite Tests
 Executes JSON-based API tests locally
 """
 
+import argparse
+import atexit
 import json
+import signal
 import sys
+import threading
+import time
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Dict, List, Any
 from datetime import datetime
 from pathlib import Path
-from jinja2 import Template
+from urllib.parse import urlsplit
+
+import parameters
+import placeholders
+import profiling
+import resilience
+import run_history
+import timing
+from cassette import DEFAULT_CASSETTE_CONFIG, Cassette, CassetteAdapter
+from contracts import DEFAULT_SPEC_PATH, load_contracts
+from plan_loader import PlanError, load_plan
+from reporting import StreamingReporter, write_json_report
+from results import ResultColumns, TestResult, as_dict
+
+
+# Connection pool defaults; overridable per plan ("http" section) or from the CLI
+DEFAULT_HTTP_CONFIG = {
+    'pool_connections': 10,     # number of per-host pools kept by the session
+    'pool_size': 10,            # max connections kept alive per host
+    'pool_block': False,        # block instead of opening extra connections when a pool is full
+    'keep_alive': True,
+    'retries': 0,               # retries on connection errors and retry_statuses (idempotent methods only)
+    'backoff_factor': 0.5,      # retry n waits a random 0..backoff_factor * 2**(n-1) seconds (or Retry-After)
+    'backoff_max': 30,
+    'retry_statuses': [429, 502, 503, 504],
+    'timeout': 10,
+    'rate_limit': None,         # requests/second per host; None = unlimited until the host answers 429
+    'rate_limits': {},          # per host or endpoint, e.g. {"https://petstore.swagger.io": 20, "POST /pet": {"rate": 5, "burst": 2}}
+    'adaptive_rate': True,      # halve a limit on 429 and let it recover gradually
+    'breaker_failures': 5,      # consecutive failures that open a host's or endpoint's circuit (0 = off)
+    'breaker_reset': 30,        # seconds an open circuit fails fast before letting a probe through
+    'hosts': {}                 # per-host overrides, e.g. {"https://petstore.swagger.io": {"pool_size": 4}}
+}
+
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+# Methods that order a literal path: earlier cases on it go first, later ones wait
+PATH_WRITE_METHODS = ('PUT', 'PATCH', 'DELETE')
+
+# Read size when a response body is validated while it downloads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Bytes of an array body read with --stream-bodies before validation stops
+DEFAULT_MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Completion value of a parameterized entry, whose rows record their own results
+ROWS_RECORDED = object()
 
 
 class Colors:
@@ -27,31 +80,284 @@ class Colors:
 class TestRunner:
     """Executes TestSprite JSON test plans locally"""
 
-    def __init__(self, test_plan_path: str):
+    # Whether the engine can serve the Petstore stand-in through a requests adapter
+    in_process_transport = True
+
+    def __init__(self, test_plan_path: str, http_config: Dict = None, workers: int = 1,
+                 stream_path: str = None, html_page_size: int = None, local_server: str = None,
+                 cassette: Dict = None, contract: str = None, stream_bodies: bool = False,
+                 max_body_bytes: int = None, profiler: profiling.Profiler = None):
+        self.profiler = profiler or profiling.NULL_PROFILER
+        load_start = time.perf_counter()
         self.test_plan_path = test_plan_path
         self.test_plan = self._load_test_plan()
         self.base_url = self.test_plan.get('base_url', 'http://localhost:3000')
         self.auth = self.test_plan.get('authentication', {})
         self.fixtures = self.test_plan.get('fixtures', {})
         self.fixture_data = {}  # Store created fixture data
+        self.fixture_generation = 0  # Bumped whenever fixture_data changes
+        self.fixture_lock = threading.Lock()  # Serializes fixture output and fixture_data updates
+        self.fixture_graph = None  # (setup deps, cleanup deps), built when setup starts
+        self.templates = {}  # id(test_case) -> compiled (path, body)
+        self.rendered = {}  # id(test_case) -> (fixture_generation, url, body)
+        self._compile_plan()
+        self.profiler.add('plan_load', time.perf_counter() - load_start)
+        self.workers = max(1, workers)
+        self.http_config = self._build_http_config(http_config)
+        self.timeout = self.http_config['timeout']
+        self.session = self._create_session()
+        self.local_server = None
+        if local_server:
+            self._start_local_server(local_server)
+        self.cassette = self._open_cassette(cassette)
+        # Replayed responses never reach the server, so they are not rate limited
+        self.guard = resilience.RequestGuard(
+            self.http_config, throttle=self.cassette is None or self.cassette.mode != 'replay'
+        )
+        self.contracts = self._load_contracts(contract) if contract else None
+        self.stream_bodies = stream_bodies
+        self.max_body_bytes = max_body_bytes or DEFAULT_MAX_BODY_BYTES
         self.results = {
             'passed': 0,
             'failed': 0,
             'total': 0,
-            'details': []
+            'details': ResultColumns()
         }
+        self.latency = timing.LatencyRecorder()
+        self.html_page_size = html_page_size
+        # With a stream path, results go to NDJSON as they finish instead of 'details'
+        self.reporter = StreamingReporter(stream_path, self._report_header()) if stream_path else None
+
+    def _load_contracts(self, spec_path: str):
+        """Compiled response contracts from a Swagger spec"""
+        try:
+            return load_contracts(spec_path)
+        except FileNotFoundError:
+            print(f"{Colors.RED}Error: API spec not found: {spec_path}{Colors.RESET}")
+            sys.exit(1)
+        except json.JSONDecodeError as e:
+            print(f"{Colors.RED}Error: Invalid JSON in API spec: {e}{Colors.RESET}")
+            sys.exit(1)
 
     def _load_test_plan(self) -> Dict:
         """Load test plan from JSON file"""
         try:
-            with open(self.test_plan_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_plan(self.test_plan_path)
         except FileNotFoundError:
             print(f"{Colors.RED}Error: Test plan file not found: {self.test_plan_path}{Colors.RESET}")
             sys.exit(1)
         except json.JSONDecodeError as e:
             print(f"{Colors.RED}Error: Invalid JSON in test plan: {e}{Colors.RESET}")
             sys.exit(1)
+        except PlanError as e:
+            print(f"{Colors.RED}Error: Invalid test plan: {e}{Colors.RESET}")
+            sys.exit(1)
+
+    def _compile_plan(self):
+        """Compile test case placeholders once and report references to unknown fixtures"""
+        fixture_names = set(self.fixtures) - {'cleanup'}
+
+        for req in self.test_plan.get('requirements', []):
+            for test_case in req.get('test_cases', []):
+                path_template, body_template = self._templates_for(test_case)
+                refs = placeholders.references(path_template) | placeholders.references(body_template)
+                if parameters.is_parameterized(test_case):
+                    problems = parameters.check(test_case, Path(self.test_plan_path).parent)
+                    if problems:
+                        print(f"{Colors.RED}Error: [{test_case.get('id', 'UNKNOWN')}] {'; '.join(problems)}{Colors.RESET}")
+                        sys.exit(1)
+                    fixture_names.add(parameters.PARAMS)
+                for reference in sorted(refs):
+                    if reference[0] not in fixture_names:
+                        print(f"{Colors.YELLOW}Warning: [{test_case.get('id', 'UNKNOWN')}] references unknown fixture "
+                              f"{placeholders.format_reference(reference)}{Colors.RESET}")
+                fixture_names.discard(parameters.PARAMS)
+
+    def _templates_for(self, test_case: Dict):
+        """Compiled (path, body) templates for a test case, compiled on first use"""
+        key = id(test_case)
+        templates = self.templates.get(key)
+        if templates is None:
+            templates = (
+                placeholders.compile_template(test_case.get('path', '/')),
+                placeholders.compile_template(test_case.get('body'))
+            )
+            self.templates[key] = templates
+        return templates
+
+    def _render_test(self, test_case: Dict):
+        """Resolved (url, body) for a test case, cached until fixture data changes"""
+        row = test_case.get(parameters.ROW_KEY)
+        if row is not None:
+            # Expanded rows share their template case's compiled templates and are never cached
+            path_template, body_template = self._templates_for(test_case[parameters.TEMPLATE_KEY])
+            context = parameters.context(row, self.fixture_data)
+            return (f"{self.base_url}{placeholders.render(path_template, context)}",
+                    placeholders.render(body_template, context))
+
+        key = id(test_case)
+        cached = self.rendered.get(key)
+        if cached is not None and cached[0] == self.fixture_generation:
+            return cached[1], cached[2]
+
+        path_template, body_template = self._templates_for(test_case)
+        generation = self.fixture_generation
+        # Repeated executions share one url string instead of formatting a new one each time
+        url = f"{self.base_url}{placeholders.render(path_template, self.fixture_data)}"
+        body = placeholders.render(body_template, self.fixture_data)
+        self.rendered[key] = (generation, url, body)
+        return url, body
+
+    def _check_fixture_fields(self):
+        """After setup, report placeholders whose field is missing from a created fixture"""
+        reported = set()
+        for req in self.test_plan.get('requirements', []):
+            for test_case in req.get('test_cases', []):
+                path_template, body_template = self._templates_for(test_case)
+                for reference in placeholders.references(path_template) | placeholders.references(body_template):
+                    if (reference[0] in self.fixture_data and reference not in reported
+                            and not placeholders.is_resolvable(self.fixture_data, reference)):
+                        reported.add(reference)
+                        print(f"{Colors.YELLOW}Warning: Fixture '{reference[0]}' has no field for "
+                              f"{placeholders.format_reference(reference)}{Colors.RESET}")
+        if reported:
+            print()
+
+    def _build_http_config(self, overrides: Dict = None) -> Dict:
+        """Merge HTTP settings: defaults < test plan "http" section < explicit overrides"""
+        config = dict(DEFAULT_HTTP_CONFIG)
+        config['hosts'] = {}
+        config['rate_limits'] = {}
+
+        for source in (self.test_plan.get('http', {}), overrides or {}):
+            for key, value in source.items():
+                if value is None:
+                    continue
+                if key == 'hosts':
+                    for host, host_config in value.items():
+                        config['hosts'].setdefault(host, {}).update(host_config)
+                elif key == 'rate_limits':
+                    config['rate_limits'].update(value)
+                else:
+                    config[key] = value
+
+        # Every worker thread needs its own keep-alive connection
+        config['pool_size'] = max(config['pool_size'], self.workers)
+
+        return config
+
+    def _create_adapter(self, config: Dict) -> timing.TimingHTTPAdapter:
+        """Create a pooled transport adapter from HTTP settings (retries are up to the request guard)"""
+        return timing.TimingHTTPAdapter(
+            pool_connections=config['pool_connections'],
+            pool_maxsize=config['pool_size'],
+            pool_block=config['pool_block']
+        )
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session shared by fixtures, tests and cleanup"""
+        session = requests.Session()
+
+        default_adapter = self._create_adapter(self.http_config)
+        session.mount('http://', default_adapter)
+        session.mount('https://', default_adapter)
+
+        # Hosts with their own limits get a dedicated adapter (longest prefix wins)
+        for host, host_config in self.http_config['hosts'].items():
+            config = dict(self.http_config)
+            config.update(host_config)
+            session.mount(host, self._create_adapter(config))
+
+        if not self.http_config['keep_alive']:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def _send(self, method: str, url: str, headers: Dict, body: Any = None, stream: bool = False,
+              endpoint: str = None, guarded: List = None) -> requests.Response:
+        """Send a request through the pooled session, rate limited and retried by the request guard
+
+        With stream=True the call returns as soon as headers arrive and the caller must read the body.
+        endpoint ("METHOD /unresolved/path") selects per-endpoint limits and circuits; the
+        GuardedRequest is appended to `guarded` for the caller to report. Raises
+        resilience.CircuitOpenError instead of sending while the circuit is open.
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        json_body = body if method in ('POST', 'PUT') else None
+        request = self.guard.start(method, url, endpoint)
+        if guarded is not None:
+            guarded.append(request)
+        while True:
+            wait = self.guard.admit(request)
+            if wait:
+                time.sleep(wait)
+            try:
+                response = self.session.request(method, url, headers=headers, json=json_body, timeout=self.timeout,
+                                                stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                wait = self.guard.failed(request, e)
+                if wait is None:
+                    raise
+            except Exception:
+                self.guard.abandoned(request)
+                raise
+            else:
+                wait = self.guard.completed(request, response.status_code, response.headers.get('Retry-After'))
+                if wait is None:
+                    return response
+                self._stop_reading(response, response.iter_content(STREAM_CHUNK_SIZE))
+            time.sleep(wait)
+
+    def _start_local_server(self, mode: str):
+        """Run against the in-memory Petstore stand-in instead of the plan's base_url
+
+        'inprocess' serves requests through a session adapter without sockets;
+        'port' serves them over HTTP on a free loopback port.
+        """
+        from petstore_server import IN_PROCESS_URL, InProcessAdapter, PetStore, start_server
+
+        store = PetStore()
+        if mode == 'inprocess' and self.in_process_transport:
+            self.session.mount(IN_PROCESS_URL, InProcessAdapter(store))
+            self.base_url = IN_PROCESS_URL
+            return
+
+        if mode == 'inprocess':
+            print(f"{Colors.YELLOW}Note: this engine needs a socket; serving the Petstore stand-in on a local port{Colors.RESET}")
+        self.local_server = start_server(store=store)
+        self.base_url = self.local_server.url
+
+    def _open_cassette(self, overrides: Dict = None):
+        """Open the record/replay cassette and route the session's transports through it"""
+        config = dict(DEFAULT_CASSETTE_CONFIG)
+        config.update({key: value for key, value in (overrides or {}).items() if value is not None})
+        if not config['path']:
+            return None
+
+        try:
+            cassette = Cassette(config['path'], config['mode'], ttl=config['ttl'], max_entries=config['max_entries'])
+        except (OSError, ValueError) as e:
+            print(f"{Colors.RED}Error: {e}{Colors.RESET}")
+            sys.exit(1)
+
+        if self.session is not None:
+            for prefix, adapter in list(self.session.adapters.items()):
+                self.session.mount(prefix, CassetteAdapter(adapter, cassette))
+        return cassette
+
+    def close(self):
+        """Release pooled connections, stop the local server and finish the result stream"""
+        if self.session is not None:
+            self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+        if self.local_server is not None:
+            self.local_server.stop()
+            self.local_server = None
+        if self.reporter:
+            self.reporter.close()
 
     def _build_headers(self, test_headers: Dict = None) -> Dict:
         """Build request headers including authentication"""
@@ -68,100 +374,198 @@ class TestRunner:
 
         return headers
 
+    def _fixture_request(self, fixture_name: str, fixture_config: Dict):
+        """Build (method, url, headers, body) for a fixture, or None if it can't be created"""
+        method = fixture_config.get('method', 'POST').upper()
+        path = self._resolve_placeholders(fixture_config.get('path'))
+        body = self._resolve_placeholders(fixture_config.get('body'))
+        headers = self._build_headers(fixture_config.get('headers'))
+
+        url = f"{self.base_url}{path}"
+
+        if method not in ('POST', 'PUT'):
+            print(f"  {Colors.YELLOW}[SKIP] Fixture '{fixture_name}': Unsupported method {method}{Colors.RESET}")
+            return None
+
+        return method, url, headers, body
+
+    def _store_fixture(self, fixture_name: str, response):
+        """Record a fixture creation response for placeholder resolution"""
+        if response.status_code in [200, 201]:
+            print(f"  {Colors.GREEN}[OK] Fixture '{fixture_name}' created{Colors.RESET}")
+            # Store response data for later use
+            try:
+                data = response.json()
+            except:
+                data = {'status': 'created'}
+            self.fixture_data[fixture_name] = data
+            self.fixture_generation += 1
+        else:
+            print(f"  {Colors.RED}[FAIL] Fixture '{fixture_name}': Status {response.status_code}{Colors.RESET}")
+
+    def _fixture_references(self, config: Dict) -> set:
+        """Names of the fixtures referenced by placeholders in a fixture or cleanup step"""
+        referenced = placeholders.references(placeholders.compile_template(config.get('path'))) | \
+            placeholders.references(placeholders.compile_template(config.get('body')))
+        return {name for name, _ in referenced}
+
+    def _build_fixture_graph(self):
+        """Dependencies between fixtures and between cleanup steps
+
+        A fixture waits for every fixture its path or body references. A cleanup step
+        waits for the steps deleting fixtures that (transitively) depend on the ones it
+        deletes, so cleanup runs in reverse dependency order.
+        """
+        names = [name for name in self.fixtures if name != 'cleanup']
+        setup_deps = {name: (self._fixture_references(self.fixtures[name]) & set(names)) - {name} for name in names}
+
+        ordered = set(topological_order(setup_deps))
+        if len(ordered) != len(setup_deps):
+            stuck = [name for name in names if name not in ordered]
+            print(f"{Colors.RED}Error: Dependency cycle between fixtures: {', '.join(stuck)}{Colors.RESET}")
+            sys.exit(1)
+
+        ancestors = {}
+
+        def ancestors_of(name: str) -> set:
+            if name not in ancestors:
+                ancestors[name] = set()
+                for dep in setup_deps[name]:
+                    ancestors[name] |= {dep} | ancestors_of(dep)
+            return ancestors[name]
+
+        deletes = [self._fixture_references(step) & set(names) for step in self.fixtures.get('cleanup', [])]
+        cleanup_deps = {
+            position: {
+                other for other, other_deletes in enumerate(deletes)
+                if other != position and any(deleted & ancestors_of(name) for name in other_deletes)
+            }
+            for position, deleted in enumerate(deletes)
+        }
+        return setup_deps, cleanup_deps
+
+    def _fixture_workers(self, deps: Dict) -> int:
+        """Fixture requests in flight at once, bounded by the connection pool"""
+        return max(1, min(self.http_config['pool_size'], len(deps)))
+
+    def _create_fixture(self, fixture_name: str):
+        """Create one fixture and store its response (runs on a worker thread)"""
+        with self.fixture_lock:
+            request = self._fixture_request(fixture_name, self.fixtures[fixture_name])
+        if request is None:
+            return
+
+        try:
+            response = self._send(*request)
+        except Exception as e:
+            with self.fixture_lock:
+                print(f"  {Colors.RED}[ERROR] Fixture '{fixture_name}': {str(e)}{Colors.RESET}")
+            return
+
+        with self.fixture_lock:
+            self._store_fixture(fixture_name, response)
+
     def _setup_fixtures(self):
-        """Setup test fixtures by creating initial data"""
+        """Setup test fixtures by creating initial data, independent fixtures in parallel"""
         if not self.fixtures:
             return
 
+        self.fixture_graph = self._build_fixture_graph()
+        setup_deps, _ = self.fixture_graph
+
         print(f"{Colors.BOLD}{Colors.YELLOW}Setting up fixtures...{Colors.RESET}\n")
 
-        for fixture_name, fixture_config in self.fixtures.items():
-            # Skip cleanup - it's not a fixture to create
-            if fixture_name == 'cleanup':
-                continue
+        # Fallback for exits that bypass the caller's finally block
+        atexit.register(self._cleanup_fixtures, sequential=True)
+        self._run_graph(setup_deps, self._create_fixture, self._fixture_workers(setup_deps))
 
-            method = fixture_config.get('method', 'POST').upper()
-            path = fixture_config.get('path')
-            body = fixture_config.get('body')
-            headers = self._build_headers(fixture_config.get('headers'))
+        print()
+        self._check_fixture_fields()
 
-            url = f"{self.base_url}{path}"
+    def _cleanup_request(self, cleanup_config: Dict):
+        """Build (method, path, url, headers) for a cleanup step, or None if its fixture was never created"""
+        method = cleanup_config.get('method', 'DELETE').upper()
+        path = cleanup_config.get('path')
+        headers = self._build_headers(cleanup_config.get('headers'))
 
-            try:
-                if method == 'POST':
-                    response = requests.post(url, headers=headers, json=body, timeout=10)
-                elif method == 'PUT':
-                    response = requests.put(url, headers=headers, json=body, timeout=10)
-                else:
-                    print(f"  {Colors.YELLOW}[SKIP] Fixture '{fixture_name}': Unsupported method {method}{Colors.RESET}")
-                    continue
+        compiled = placeholders.compile_template(path)
+        if not all(placeholders.is_resolvable(self.fixture_data, ref) for ref in placeholders.references(compiled)):
+            print(f"  {Colors.YELLOW}[SKIP] Cleanup: {path} (fixture not created){Colors.RESET}")
+            return None
 
-                if response.status_code in [200, 201]:
-                    print(f"  {Colors.GREEN}[OK] Fixture '{fixture_name}' created{Colors.RESET}")
-                    # Store response data for later use
-                    try:
-                        self.fixture_data[fixture_name] = response.json()
-                    except:
-                        self.fixture_data[fixture_name] = {'status': 'created'}
-                else:
-                    print(f"  {Colors.RED}[FAIL] Fixture '{fixture_name}': Status {response.status_code}{Colors.RESET}")
-            except Exception as e:
-                print(f"  {Colors.RED}[ERROR] Fixture '{fixture_name}': {str(e)}{Colors.RESET}")
+        # Replace placeholders with fixture data
+        path = placeholders.render(compiled, self.fixture_data)
 
-        print()
+        url = f"{self.base_url}{path}"
+        return method, path, url, headers
+
+    def _report_cleanup(self, path: str, response):
+        """Print the outcome of a cleanup request"""
+        if response.status_code in [200, 204]:
+            print(f"  {Colors.GREEN}[OK] Cleaned up: {path}{Colors.RESET}")
+        else:
+            print(f"  {Colors.YELLOW}[WARN] Cleanup failed: {path} (Status {response.status_code}){Colors.RESET}")
+
+    def _run_cleanup_step(self, position: int):
+        """Execute one cleanup step (runs on a worker thread)"""
+        with self.fixture_lock:
+            request = self._cleanup_request(self.fixtures['cleanup'][position])
+        if request is None:
+            return
+        method, path, url, headers = request
+        if method != 'DELETE':
+            return
 
-    def _cleanup_fixtures(self):
-        """Cleanup test fixtures by deleting created data"""
-        cleanup = self.fixtures.get('cleanup', [])
-        if not cleanup:
+        try:
+            response = self._send(method, url, headers)
+        except Exception as e:
+            with self.fixture_lock:
+                print(f"  {Colors.RED}[ERROR] Cleanup failed: {path} - {str(e)}{Colors.RESET}")
             return
 
-        print(f"\n{Colors.BOLD}{Colors.YELLOW}Cleaning up fixtures...{Colors.RESET}\n")
+        with self.fixture_lock:
+            self._report_cleanup(path, response)
 
-        for cleanup_config in cleanup:
-            method = cleanup_config.get('method', 'DELETE').upper()
-            path = cleanup_config.get('path')
-            headers = self._build_headers(cleanup_config.get('headers'))
+    def _cleanup_fixtures(self, sequential: bool = False):
+        """Cleanup test fixtures by deleting created data, in reverse dependency order
 
-            # Replace placeholders with fixture data
-            if path and '{' in path:
-                for fixture_name, data in self.fixture_data.items():
-                    if isinstance(data, dict) and 'id' in data:
-                        path = path.replace(f'{{{fixture_name}.id}}', str(data['id']))
+        sequential=True avoids thread pools, which are unavailable during interpreter shutdown.
+        """
+        atexit.unregister(self._cleanup_fixtures)
+        if self.fixture_graph is None:
+            return
+        _, cleanup_deps = self.fixture_graph
+        self.fixture_graph = None
+        if not cleanup_deps:
+            return
 
-            url = f"{self.base_url}{path}"
+        print(f"\n{Colors.BOLD}{Colors.YELLOW}Cleaning up fixtures...{Colors.RESET}\n")
 
-            try:
-                if method == 'DELETE':
-                    response = requests.delete(url, headers=headers, timeout=10)
-                    if response.status_code in [200, 204]:
-                        print(f"  {Colors.GREEN}[OK] Cleaned up: {path}{Colors.RESET}")
-                    else:
-                        print(f"  {Colors.YELLOW}[WARN] Cleanup failed: {path} (Status {response.status_code}){Colors.RESET}")
-            except Exception as e:
-                print(f"  {Colors.RED}[ERROR] Cleanup failed: {path} - {str(e)}{Colors.RESET}")
+        if sequential:
+            for position in topological_order(cleanup_deps):
+                self._run_cleanup_step(position)
+        else:
+            self._run_graph(cleanup_deps, self._run_cleanup_step, self._fixture_workers(cleanup_deps))
 
         print()
 
     def _resolve_placeholders(self, value: Any) -> Any:
         """Replace placeholders in test data with fixture values"""
-        if isinstance(value, str):
-            # Replace {fixture_name.field} with actual values
-            for fixture_name, data in self.fixture_data.items():
-                if isinstance(data, dict):
-                    for field, field_value in data.items():
-                        placeholder = f'{{{fixture_name}.{field}}}'
-                        if placeholder in value:
-                            value = value.replace(placeholder, str(field_value))
-        elif isinstance(value, dict):
-            return {k: self._resolve_placeholders(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self._resolve_placeholders(item) for item in value]
-
-        return value
-
-    def _validate_response(self, response: requests.Response, expected: Dict) -> tuple[bool, str]:
-        """Validate response against expected criteria"""
+        return placeholders.render(placeholders.compile_template(value), self.fixture_data)
+
+    @staticmethod
+    def _response_data(response) -> Any:
+        """Body parsed as JSON straight from the bytes, or its text if it is not JSON"""
+        try:
+            return json.loads(response.content)
+        except ValueError:
+            return response.text
+
+    def _validate_response(self, response: requests.Response, expected: Dict, body: Any = None) -> tuple[bool, str]:
+        """Validate response against expected criteria
+
+        body is the already parsed response body, if the caller has it.
+        """
         errors = []
 
         # Check status code
@@ -175,10 +579,7 @@ class TestRunner:
         expected_response = expected.get('expected_response', {})
 
         if expected_response:
-            try:
-                response_data = response.json()
-            except json.JSONDecodeError:
-                response_data = response.text
+            response_data = body if body is not None else self._response_data(response)
 
             # Check if response contains expected fields
             if 'contains' in expected_response and isinstance(response_data, dict):
@@ -212,64 +613,485 @@ class TestRunner:
             return False, '; '.join(errors)
         return True, "All validations passed"
 
-    def _execute_test(self, test_case: Dict) -> Dict:
-        """Execute a single test case"""
+    def _prepare_test(self, test_case: Dict):
+        """Resolve a test case into a result skeleton plus (method, url, headers, body)"""
+        start = time.perf_counter()
         test_id = test_case.get('id', 'UNKNOWN')
         test_name = test_case.get('name', 'Unnamed Test')
         method = test_case.get('method', 'GET').upper()
-        path = self._resolve_placeholders(test_case.get('path', '/'))
+        url, body = self._render_test(test_case)
         headers = self._build_headers(test_case.get('headers'))
-        body = self._resolve_placeholders(test_case.get('body'))
 
-        url = f"{self.base_url}{path}"
-
-        result = {
-            'id': test_id,
-            'name': test_name,
-            'method': method,
-            'url': url,
-            'passed': False,
-            'message': '',
-            'response_status': None,
-            'duration_ms': 0
-        }
+        result = TestResult(test_id, test_name, method, url)
+
+        self.profiler.add('request_build', time.perf_counter() - start)
+        return result, (method, url, headers, body)
+
+    def _contract_for(self, result: TestResult, response):
+        """Spec contract for a response, or None when contract checking is off or nothing is documented"""
+        if self.contracts is None:
+            return None
+        return self.contracts.contract_for(result['method'], urlsplit(result['url']).path, response.status_code)
+
+    def _check_contract(self, result: TestResult, response, streamed_errors: List[str] = None) -> List[str]:
+        """Contract violations of a response; the body is skipped if it was validated while downloading"""
+        contract = self._contract_for(result, response)
+        if contract is None:
+            return []
+        errors = contract.check_headers(response.headers)
+        if streamed_errors is not None:
+            errors.extend(streamed_errors)
+        else:
+            errors.extend(contract.check_content(response.content))
+        return errors
+
+    def _download(self, result: TestResult, response: requests.Response):
+        """Read the response body, validating what can be validated as it arrives
+
+        Returns (body, contract_errors): the parsed body for _validate_response and the
+        contract result for the body; either is None when it is to be taken from
+        response.content instead. Array bodies under contract are checked item by item as
+        chunks arrive; with stream_bodies array bodies are not kept at all (see _stream_body).
+        """
+        contract = self._contract_for(result, response)
+        check = contract.stream() if contract is not None and contract.streams else None
+        # Bodies already in memory (stand-in, cassette) are checked after the fact instead
+        if response._content is not False or (check is None and not self.stream_bodies):
+            response.content
+            return None, None
+
+        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+        if self.stream_bodies:
+            return self._stream_body(response, chunks, check)
+
+        content = []
+        for chunk in chunks:
+            content.append(chunk)
+            check.feed(chunk)
+        response._content = b''.join(content)
+        return None, check.close()
+
+    def _stream_body(self, response: requests.Response, chunks, check):
+        """Validate an array body without keeping it; other bodies are read in full
+
+        Assertions on an array body are settled by its first byte, so reading stops there
+        unless a contract check needs the items. That check stops at its error limit or
+        after max_body_bytes, with the items read so far validated.
+        """
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if head.lstrip():
+                break
+        if not head.lstrip().startswith(b'['):
+            response._content = head + b''.join(chunks)
+            return None, None
+
+        read = len(head)
+        complete = False
+        if check is not None:
+            check.feed(head)
+            while not check.failed and read < self.max_body_bytes:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    complete = True
+                    break
+                read += len(chunk)
+                check.feed(chunk)
+        if not complete:
+            self._stop_reading(response, chunks)
+
+        # The items are gone; only the shape matters to _validate_response from here
+        return [], check.close(complete) if check is not None else None
+
+    @staticmethod
+    def _stop_reading(response: requests.Response, chunks):
+        """Abandon a body; drain it if little is left so the connection can be reused"""
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) - response.raw.tell() <= STREAM_CHUNK_SIZE:
+            for _ in chunks:
+                pass
+        else:
+            response.close()
+
+    def _complete_test(self, result: TestResult, test_case: Dict, response, duration_ms: float, timings: Dict = None,
+                       body: Any = None, streamed_errors: List[str] = None):
+        """Fill a result from a received response; shared by the sync and async engines"""
+        result['response_status'] = response.status_code
+        result['duration_ms'] = round(duration_ms, 2)
+
+        # Validate response
+        validation_start = time.perf_counter()
+        passed, message = self._validate_response(response, test_case, body)
+        contract_errors = self._check_contract(result, response, streamed_errors)
+        if contract_errors:
+            message = '; '.join(contract_errors if passed else [message] + contract_errors)
+            passed = False
+        validation_s = time.perf_counter() - validation_start
+        self.profiler.add('validate', validation_s)
+
+        result['passed'] = passed
+        result['message'] = message
+
+        if timings is not None:
+            timings['validation_ms'] = validation_s * 1000
+            result['timings'] = {
+                phase: (round(value, 3) if value is not None else None)
+                for phase, value in timings.items()
+            }
+
+    def _execute_test(self, test_case: Dict) -> TestResult:
+        """Execute a single test case"""
+        result, request = self._prepare_test(test_case)
 
+        phases = timing.begin_phases()
+        guarded = []
         try:
-            start_time = datetime.now()
-
-            # Make HTTP request
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=10)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, json=body, timeout=10)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=body, timeout=10)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            start_time = time.perf_counter()
+
+            # Make HTTP request over the pooled session; returns once headers are in
+            response = self._send(*request, stream=True, endpoint=timing.endpoint_key(test_case), guarded=guarded)
+            headers_time = time.perf_counter()
+            # Waiting for a rate limit slot is not server time
+            start_time += guarded[0].throttled_ms / 1000
 
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds() * 1000
+            body, streamed_errors = self._download(result, response)
+            end_time = time.perf_counter()
+            timing.end_phases()
+            self.profiler.add('send', end_time - start_time)
 
-            result['response_status'] = response.status_code
-            result['duration_ms'] = round(duration, 2)
+            connection_ms = phases['dns_ms'] + phases['connect_ms'] + phases['tls_ms']
+            phases['ttfb_ms'] = max(0.0, (headers_time - start_time) * 1000 - connection_ms)
+            phases['download_ms'] = (end_time - headers_time) * 1000
 
-            # Validate response
-            passed, message = self._validate_response(response, test_case)
-            result['passed'] = passed
-            result['message'] = message
+            self._complete_test(result, test_case, response, (end_time - start_time) * 1000, phases, body, streamed_errors)
 
         except requests.exceptions.Timeout:
-            result['message'] = "Request timeout (>10s)"
+            result['message'] = f"Request timeout (>{self.timeout}s)"
         except requests.exceptions.ConnectionError:
             result['message'] = "Connection error - is the server running?"
+        except resilience.CircuitOpenError as e:
+            result['message'] = str(e)
         except Exception as e:
             result['message'] = f"Error: {str(e)}"
+        finally:
+            timing.end_phases()
 
+        if guarded:
+            result['resilience'] = guarded[0].details()
         return result
 
-    def _print_test_result(self, result: Dict):
+    def _build_schedule(self) -> List[Dict]:
+        """Flatten requirements into plan-ordered entries and resolve their dependencies
+
+        Ordering constraints come from three sources:
+          - explicit ``depends_on`` (test case or requirement ids) on a test case or requirement
+          - ``serial: true`` on a requirement (its cases run in order) or on a test case
+            (it runs alone, after everything before it and before everything after it)
+          - fixture placeholders: a non-GET case touching ``{fixture.field}`` is ordered after
+            every earlier case using that fixture, and later cases using it wait for it
+          - literal paths: a PUT/PATCH/DELETE on a path without placeholders (query string
+            ignored) waits for every earlier case on that path, and later cases on it wait
+            for the last such write, e.g. GET before DELETE /store/order/1
+        """
+        schedule = []
+        by_id = {}
+        requirement_members = {}
+
+        for req in self.test_plan.get('requirements', []):
+            members = []
+            for test_case in req.get('test_cases', []):
+                entry = {
+                    'index': len(schedule),
+                    'requirement': req,
+                    'test_case': test_case,
+                    'deps': set()
+                }
+                schedule.append(entry)
+                members.append(entry['index'])
+                if 'id' in test_case:
+                    by_id[test_case['id']] = [entry['index']]
+            requirement_members[req.get('id')] = members
+
+            if req.get('serial'):
+                for previous, current in zip(members, members[1:]):
+                    schedule[current]['deps'].add(previous)
+
+        def resolve(dep_ids) -> set:
+            if isinstance(dep_ids, str):
+                dep_ids = [dep_ids]
+            indexes = set()
+            for dep_id in dep_ids or []:
+                if dep_id in by_id:
+                    indexes.update(by_id[dep_id])
+                elif dep_id in requirement_members:
+                    indexes.update(requirement_members[dep_id])
+                else:
+                    print(f"{Colors.RED}Error: Unknown depends_on reference: {dep_id}{Colors.RESET}")
+                    sys.exit(1)
+            return indexes
+
+        fixture_names = set(self.fixtures) - {'cleanup'}
+        fixture_users = {}     # fixture name -> indexes of cases referencing it so far
+        fixture_writers = {}   # fixture name -> index of the last mutating case
+        path_users = {}        # literal path -> indexes of cases requesting it so far
+        path_writers = {}      # literal path -> index of the last case updating or deleting it
+        serial_barrier = None
+
+        for entry in schedule:
+            test_case = entry['test_case']
+            index = entry['index']
+
+            entry['deps'] |= resolve(entry['requirement'].get('depends_on'))
+            entry['deps'] |= resolve(test_case.get('depends_on'))
+
+            if test_case.get('serial'):
+                entry['deps'].update(range(index))
+                serial_barrier = index
+            elif serial_barrier is not None:
+                entry['deps'].add(serial_barrier)
+
+            path_template, body_template = self._templates_for(test_case)
+            referenced = {name for name, _ in placeholders.references(path_template) | placeholders.references(body_template)}
+            mutates = test_case.get('method', 'GET').upper() != 'GET'
+            for fixture_name in referenced & fixture_names:
+                if mutates:
+                    entry['deps'].update(fixture_users.get(fixture_name, []))
+                    fixture_writers[fixture_name] = index
+                elif fixture_name in fixture_writers:
+                    entry['deps'].add(fixture_writers[fixture_name])
+                fixture_users.setdefault(fixture_name, []).append(index)
+
+            path = test_case.get('path', '/').split('?', 1)[0]
+            if '{' not in path:
+                if test_case.get('method', 'GET').upper() in PATH_WRITE_METHODS:
+                    entry['deps'].update(path_users.get(path, []))
+                    path_writers[path] = index
+                elif path in path_writers:
+                    entry['deps'].add(path_writers[path])
+                path_users.setdefault(path, []).append(index)
+
+            entry['deps'].discard(index)
+
+        self._check_for_cycles(schedule)
+        return schedule
+
+    def _check_for_cycles(self, schedule: List[Dict]):
+        """Abort if depends_on declarations form a cycle"""
+        ordered = set(topological_order({entry['index']: entry['deps'] for entry in schedule}))
+        if len(ordered) != len(schedule):
+            stuck = [entry['test_case'].get('id', 'UNKNOWN') for entry in schedule if entry['index'] not in ordered]
+            print(f"{Colors.RED}Error: Dependency cycle between test cases: {', '.join(stuck)}{Colors.RESET}")
+            sys.exit(1)
+
+    def _walk_plan(self, schedule: List[Dict]):
+        """Yield schedule entries in plan order, printing requirement headers on the way"""
+        position = 0
+        for req in self.test_plan.get('requirements', []):
+            req_id = req.get('id', 'UNKNOWN')
+            req_name = req.get('name', 'Unnamed Requirement')
+
+            print(f"{Colors.BOLD}{Colors.BLUE}[{req_id}] {req_name}{Colors.RESET}")
+            print(f"{Colors.BLUE}{'-'*70}{Colors.RESET}\n")
+
+            for _ in req.get('test_cases', []):
+                yield schedule[position]
+                position += 1
+
+    def _record_result(self, result: TestResult, entry: Dict):
+        """Print a finished test result and add it to the run totals"""
+        with self.profiler.phase('print'):
+            self._print_test_result(result)
+
+        record_start = time.perf_counter()
+        endpoint = timing.endpoint_key(entry['test_case'])
+        requirement = entry['requirement'].get('id', 'UNKNOWN')
+        self.latency.record(result, endpoint, requirement)
+
+        self.results['total'] += 1
+        if result['passed']:
+            self.results['passed'] += 1
+        else:
+            self.results['failed'] += 1
+
+        if self.reporter:
+            self.reporter.write(result, endpoint, requirement)
+        else:
+            self.results['details'].append(result)
+        self.profiler.add('record', time.perf_counter() - record_start)
+
+    def iter_results(self):
+        """Results in plan order, from memory or re-read from the NDJSON stream"""
+        if self.reporter:
+            return self.reporter.results()
+        return iter(self.results['details'])
+
+    def _expand(self, test_case: Dict):
+        """Lazily yield the concrete test cases of a parameterized case"""
+        return parameters.expand(test_case, Path(self.test_plan_path).parent)
+
+    def _run_parameterized(self, entry: Dict):
+        """Execute and record every row of a parameterized case, up to `workers` rows at once
+
+        Rows are expanded as they are submitted and recorded in row order, so only
+        a window of rows is ever held in memory however large the data source is.
+        """
+        cases = self._expand(entry['test_case'])
+        if self.workers == 1:
+            for test_case in cases:
+                self._record_result(self._execute_test(test_case), entry)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for test_case in cases:
+                in_flight.append(executor.submit(self._execute_test, test_case))
+                if len(in_flight) >= self.workers * 2:
+                    self._record_result(in_flight.popleft().result(), entry)
+            while in_flight:
+                self._record_result(in_flight.popleft().result(), entry)
+
+    def _concurrent_deps(self, schedule: List[Dict]) -> Dict:
+        """Schedule dependencies with parameterized cases as barriers
+
+        A parameterized case spreads its rows over all workers, so it runs after
+        everything before it and before everything after it, like a serial case.
+        """
+        deps = {}
+        barrier = None
+        for entry in schedule:
+            index = entry['index']
+            deps[index] = set(entry['deps'])
+            if parameters.is_parameterized(entry['test_case']):
+                deps[index].update(range(index))
+                barrier = index
+            elif barrier is not None:
+                deps[index].add(barrier)
+        return deps
+
+    def _run_sequential(self, schedule: List[Dict]):
+        """Execute test cases one after another in plan order"""
+        for entry in self._walk_plan(schedule):
+            if parameters.is_parameterized(entry['test_case']):
+                self._run_parameterized(entry)
+            else:
+                self._record_result(self._execute_test(entry['test_case']), entry)
+
+    def _run_graph(self, deps: Dict, action, workers: int, on_complete=None):
+        """Call action(node) on a thread pool as soon as all of the node's deps have finished
+
+        on_complete(node, value) runs on the calling thread as each node finishes.
+        """
+        remaining = {node: len(node_deps) for node, node_deps in deps.items()}
+        dependents = {node: [] for node in deps}
+        for node, node_deps in deps.items():
+            for dep in node_deps:
+                dependents[dep].append(node)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+
+            def submit(node):
+                running[executor.submit(action, node)] = node
+
+            for node, count in remaining.items():
+                if count == 0:
+                    submit(node)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    value = future.result()
+                    # Before dependents start, so they see everything on_complete did
+                    if on_complete:
+                        on_complete(node, value)
+                    for dependent in dependents[node]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            submit(dependent)
+
+    def _run_tests(self, schedule: List[Dict]):
+        """Execute a schedule, on `workers` threads when there is more than one"""
+        if self.workers > 1:
+            self._run_concurrent(schedule)
+        else:
+            self._run_sequential(schedule)
+
+    def _run_concurrent(self, schedule: List[Dict]):
+        """Execute independent test cases on a thread pool, reporting in plan order"""
+        completed = {}
+        walker = self._walk_plan(schedule)
+        pending = next(walker, None)
+
+        def flush(index: int, result: TestResult):
+            nonlocal pending
+            completed[index] = result
+            # Flush every result whose predecessors in plan order are already printed
+            while pending is not None and pending['index'] in completed:
+                result = completed.pop(pending['index'])
+                if result is not ROWS_RECORDED:
+                    self._record_result(result, pending)
+                pending = next(walker, None)
+
+        def execute(index: int):
+            entry = schedule[index]
+            if parameters.is_parameterized(entry['test_case']):
+                self._run_parameterized(entry)
+                return ROWS_RECORDED
+            return self._execute_test(entry['test_case'])
+
+        self._run_graph(self._concurrent_deps(schedule), execute, self.workers, flush)
+
+    def select_tests(self, history: run_history.RunHistory, only_failed: bool = False, changed_since: str = None,
+                     failed_first: bool = False, order: str = 'plan') -> int:
+        """Narrow and reorder the plan from the run history; returns the number of test cases left
+
+        Cases move in dependency groups (see dependency_units), so every kept case
+        still has its depends_on targets, fixture writers and path neighbours, in
+        their original relative order. changed_since is 'last' (content never
+        recorded in the history) or a git revision to compare the plan with.
+        """
+        base_dir = Path(self.test_plan_path).parent
+        schedule = self._build_schedule()
+        units = dependency_units(schedule)
+        keys = [run_history.case_key(entry['test_case'], self.test_plan, base_dir) for entry in schedule]
+
+        changed = None
+        if changed_since == 'last':
+            changed = {key for key in keys if history.get(key) is None}
+        elif changed_since:
+            changed = set(keys) - run_history.keys_at_revision(self.test_plan_path, changed_since)
+
+        if only_failed and not any(history.get(key) for key in keys):
+            print(f"{Colors.YELLOW}Note: No run history for this plan yet; running every test case{Colors.RESET}")
+            only_failed = False
+            changed = None
+
+        ordered = run_history.order_units(units, [[keys[index] for index in unit] for unit in units], history,
+                                          only_failed=only_failed, changed=changed, failed_first=failed_first,
+                                          by_duration=order == 'duration')
+        self._narrow_plan(schedule, ordered)
+
+        positions = [index for unit in ordered for index in unit]
+        reordered = ' (reordered)' if positions != sorted(positions) else ''
+        print(f"{Colors.BOLD}Selected:{Colors.RESET} {len(positions)} of {len(schedule)} test cases{reordered}\n")
+        return len(positions)
+
+    def _narrow_plan(self, schedule: List[Dict], units: List[List[int]]):
+        """Replace the plan's requirements with the cases of `units`, in that order"""
+        # Consecutive cases of the same requirement stay under one requirement header
+        requirements = []
+        for unit in units:
+            for index in unit:
+                entry = schedule[index]
+                if requirements and requirements[-1][0] is entry['requirement']:
+                    requirements[-1][1].append(entry['test_case'])
+                else:
+                    requirements.append((entry['requirement'], [entry['test_case']]))
+        self.test_plan['requirements'] = [dict(req, test_cases=cases) for req, cases in requirements]
+
+    def _print_test_result(self, result: TestResult):
         """Print formatted test result"""
         status_icon = f"{Colors.GREEN}[PASS]{Colors.RESET}" if result['passed'] else f"{Colors.RED}[FAIL]{Colors.RESET}"
         status_text = f"{Colors.GREEN}PASS{Colors.RESET}" if result['passed'] else f"{Colors.RED}FAIL{Colors.RESET}"
@@ -286,8 +1108,8 @@ class TestRunner:
 
         print()
 
-    def run_all_tests(self):
-        """Execute all tests in the test plan"""
+    def _print_header(self):
+        """Print the run banner and plan details"""
         print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}")
         print(f"{Colors.BOLD}{Colors.CYAN}  TestSprite Local Test Runner{Colors.RESET}")
         print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.RESET}\n")
@@ -295,35 +1117,27 @@ class TestRunner:
         print(f"{Colors.BOLD}Project:{Colors.RESET} {self.test_plan.get('project_name', 'Unknown')}")
         print(f"{Colors.BOLD}Test Type:{Colors.RESET} {self.test_plan.get('test_type', 'Unknown')}")
         print(f"{Colors.BOLD}Base URL:{Colors.RESET} {self.base_url}")
-        print(f"{Colors.BOLD}Test Plan:{Colors.RESET} {self.test_plan_path}\n")
-
-        # Setup fixtures before running tests
-        self._setup_fixtures()
-
-        requirements = self.test_plan.get('requirements', [])
-
-        for req in requirements:
-            req_id = req.get('id', 'UNKNOWN')
-            req_name = req.get('name', 'Unnamed Requirement')
-            test_cases = req.get('test_cases', [])
-
-            print(f"{Colors.BOLD}{Colors.BLUE}[{req_id}] {req_name}{Colors.RESET}")
-            print(f"{Colors.BLUE}{'-'*70}{Colors.RESET}\n")
+        print(f"{Colors.BOLD}Test Plan:{Colors.RESET} {self.test_plan_path}")
+        if self.workers > 1:
+            print(f"{Colors.BOLD}Workers:{Colors.RESET} {self.workers}")
+        print()
 
-            for test_case in test_cases:
-                result = self._execute_test(test_case)
-                self._print_test_result(result)
+    def run_all_tests(self):
+        """Execute all tests in the test plan"""
+        self._print_header()
 
-                self.results['total'] += 1
-                if result['passed']:
-                    self.results['passed'] += 1
-                else:
-                    self.results['failed'] += 1
+        schedule = self._build_schedule()
 
-                self.results['details'].append(result)
+        try:
+            # Setup fixtures before running tests
+            with self.profiler.phase('fixtures'):
+                self._setup_fixtures()
 
-        # Cleanup fixtures after all tests
-        self._cleanup_fixtures()
+            self._run_tests(schedule)
+        finally:
+            # Cleanup fixtures after all tests, also when the run is interrupted
+            with self.profiler.phase('fixtures'):
+                self._cleanup_fixtures()
 
         self._print_summary()
 
@@ -346,82 +1160,387 @@ class TestRunner:
         print(f"{Colors.RED}Failed:{Colors.RESET}       {failed}")
         print(f"{Colors.BOLD}Pass Rate:{Colors.RESET}    {pass_rate:.1f}%\n")
 
+        if self.cassette is not None:
+            stats = self.cassette.stats()
+            print(f"{Colors.BOLD}Cassette:{Colors.RESET}     {stats['mode']} - {stats['hits']} served, "
+                  f"{stats['misses']} missed, {stats['recorded']} recorded\n")
+
+        print_resilience(self.guard.summary())
+
         if failed > 0:
             print(f"{Colors.BOLD}{Colors.RED}Failed Tests:{Colors.RESET}")
-            for result in self.results['details']:
-                if not result['passed']:
-                    print(f"  • [{result['id']}] {result['name']}")
-                    print(f"    {Colors.RED}{result['message']}{Colors.RESET}")
+            failures = self.results['details'].failed() if not self.reporter else (
+                result for result in self.iter_results() if not result['passed']
+            )
+            for result in failures:
+                print(f"  • [{result['id']}] {result['name']}")
+                print(f"    {Colors.RED}{result['message']}{Colors.RESET}")
             print()
 
-    def save_report(self, output_path: str = 'test_report.json'):
-        """Save test results to JSON file"""
-        report = {
+    def _report_header(self) -> Dict:
+        """Report fields that precede the summary"""
+        return {
             'project_name': self.test_plan.get('project_name'),
             'test_type': self.test_plan.get('test_type'),
             'base_url': self.base_url,
-            'timestamp': datetime.now().isoformat(),
-            'summary': {
-                'total': self.results['total'],
-                'passed': self.results['passed'],
-                'failed': self.results['failed'],
-                'pass_rate': (self.results['passed'] / self.results['total'] * 100) if self.results['total'] > 0 else 0
-            },
-            'results': self.results['details']
+            'timestamp': datetime.now().isoformat()
         }
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2)
+    def build_report(self) -> Dict:
+        """Build the JSON report structure for this run"""
+        report = self._streamed_report()
+        report['results'] = [as_dict(result) for result in report['results']]
+        return report
+
+    def _streamed_report(self) -> Dict:
+        """Report data whose 'results' is a lazy iterator; build_report and both save paths start here"""
+        report = self._report_header()
+        report['summary'] = build_summary(self.results['passed'], self.results['failed'])
+        report['latency'] = self.latency.summary()
+        guard_summary = self.guard.summary()
+        if guard_summary:
+            report['resilience'] = guard_summary
+        if self.profiler.enabled:
+            # Phases timed so far; the report phases themselves are in the .profile.json
+            report['profile'] = self.profiler.summary()
+        report['results'] = self.iter_results()
+        return report
+
+    def save_report(self, output_path: str = 'test_report.json'):
+        """Save test results to JSON file"""
+        with self.profiler.phase('report_json'):
+            report = self._streamed_report()
+            results = report.pop('results')
+
+            write_json_report(report, results, output_path)
 
         print(f"{Colors.GREEN}Report saved to: {output_path}{Colors.RESET}\n")
 
     def save_html_report(self, output_path: str = 'test_report.html'):
         """Generate beautiful HTML report"""
-        template_path = Path(__file__).parent / 'templates' / 'report.html'
-
-        if not template_path.exists():
-            print(f"{Colors.YELLOW}Warning: HTML template not found at {template_path}{Colors.RESET}")
-            return
-
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template = Template(f.read())
-
-        report_data = {
-            'project_name': self.test_plan.get('project_name', 'Unknown Project'),
-            'test_type': self.test_plan.get('test_type', 'backend'),
-            'base_url': self.base_url,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'summary': {
-                'total': self.results['total'],
-                'passed': self.results['passed'],
-                'failed': self.results['failed'],
-                'pass_rate': (self.results['passed'] / self.results['total'] * 100) if self.results['total'] > 0 else 0
-            },
-            'results': self.results['details']
-        }
-
-        html_content = template.render(**report_data)
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        with self.profiler.phase('report_html'):
+            report_data = self._streamed_report()
+            report_data['project_name'] = report_data['project_name'] or 'Unknown Project'
+            report_data['test_type'] = report_data['test_type'] or 'backend'
+            render_html_report(report_data, output_path, page_size=self.html_page_size)
+
+
+def print_resilience(summary: Dict):
+    """Print what the request guard did during a run, if anything"""
+    if not summary:
+        return
+    print(f"{Colors.BOLD}Resilience:{Colors.RESET}   {summary['retries']} retries, {summary['throttled']} requests "
+          f"throttled ({summary['throttled_ms'] / 1000:.1f}s waiting), {summary['rate_cuts']} rate cuts on 429, "
+          f"{summary['circuits_opened']} circuits opened, {summary['failed_fast']} requests failed fast")
+    for key, rate in summary['rates'].items():
+        print(f"  Rate limit {key}: {rate}")
+    print()
+
+
+def topological_order(deps: Dict) -> List:
+    """Nodes ordered so each follows its deps; nodes on or behind a cycle are left out"""
+    remaining = {node: len(node_deps) for node, node_deps in deps.items()}
+    dependents = {node: [] for node in deps}
+    for node, node_deps in deps.items():
+        for dep in node_deps:
+            dependents[dep].append(node)
+
+    order = [node for node, count in remaining.items() if count == 0]
+    for node in order:
+        for dependent in dependents[node]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+    return order
+
+
+def dependency_units(schedule: List[Dict], group_by: str = 'case') -> List[List[int]]:
+    """Groups of schedule indexes (plan order) that must stay together when cases are split or reordered
+
+    Cases linked by depends_on, serial requirements, shared mutated fixtures or a
+    literal path one of them updates or deletes (see _build_schedule) always share
+    a group, so no group references a case it does not have. group_by 'requirement' or 'plan' additionally keeps whole requirements or
+    the whole plan together.
+    """
+    parent = list(range(len(schedule)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a: int, b: int):
+        parent[find(a)] = find(b)
+
+    for entry in schedule:
+        for dep in entry['deps']:
+            union(entry['index'], dep)
+
+    if group_by == 'plan':
+        for entry in schedule[1:]:
+            union(entry['index'], 0)
+    elif group_by == 'requirement':
+        first = {}
+        for entry in schedule:
+            union(entry['index'], first.setdefault(id(entry['requirement']), entry['index']))
+
+    groups = {}
+    for entry in schedule:
+        groups.setdefault(find(entry['index']), []).append(entry['index'])
+    return list(groups.values())
+
+
+def print_profile(profiler: profiling.Profiler, report_path: str):
+    """Stop profiling, print the phase breakdown and write the profile files next to the report"""
+    written = profiler.save(report_path)
+    print(f"{Colors.BOLD}{Colors.CYAN}Profile ({profiler.capture}){Colors.RESET}")
+    for line in profiler.format_table():
+        print(f"  {line}")
+    for function in profiler.top_functions(limit=5):
+        print(f"  {Colors.YELLOW}hot:{Colors.RESET} {function['function']}")
+    for path in written:
+        print(f"{Colors.GREEN}Profile saved to: {path}{Colors.RESET}")
+    print()
+
+
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM into SystemExit so finally blocks (fixture cleanup) still run"""
+    sys.exit(128 + signum)
+
+
+def build_summary(passed: int, failed: int) -> Dict:
+    """Build the report summary block from pass/fail counts"""
+    total = passed + failed
+    return {
+        'total': total,
+        'passed': passed,
+        'failed': failed,
+        'pass_rate': (passed / total * 100) if total > 0 else 0
+    }
+
+
+def _page_path(output_path: str, page: int) -> str:
+    """File name of an HTML report page; page 1 keeps the requested name"""
+    if page == 1:
+        return output_path
+    path = Path(output_path)
+    return str(path.with_name(f"{path.stem}_page{page}{path.suffix}"))
+
+
+def render_html_report(report_data: Dict, output_path: str, page_size: int = None):
+    """Render report data through templates/report.html
+
+    'results' may be any iterable; the template is streamed to disk chunk by chunk.
+    With page_size, results are split across report.html, report_page2.html, ...
+    holding at most page_size results each.
+    """
+    from jinja2 import Template  # only needed for HTML reports
+
+    template_path = Path(__file__).parent / 'templates' / 'report.html'
+
+    if not template_path.exists():
+        print(f"{Colors.YELLOW}Warning: HTML template not found at {template_path}{Colors.RESET}")
+        return
+
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = Template(f.read())
+
+    report_data = dict(report_data)
+    report_data['timestamp'] = datetime.fromisoformat(report_data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+
+    results = iter(report_data.pop('results'))
+    total = report_data['summary']['total']
+    page_count = max(1, -(-total // page_size)) if page_size else 1
+
+    for page in range(1, page_count + 1):
+        if page_size:
+            page_results = [result for _, result in zip(range(page_size), results)]
+            report_data['pagination'] = {
+                'page': page,
+                'pages': [{'number': n, 'href': Path(_page_path(output_path, n)).name} for n in range(1, page_count + 1)]
+            }
+        else:
+            page_results = results
+
+        with open(_page_path(output_path, page), 'w', encoding='utf-8') as f:
+            for chunk in template.generate(results=page_results, **report_data):
+                f.write(chunk)
+
+    print(f"{Colors.GREEN}HTML report saved to: {output_path}{Colors.RESET}")
+    if page_count > 1:
+        print(f"{Colors.GREEN}  ({page_count} pages of {page_size} results){Colors.RESET}")
+    print(f"{Colors.CYAN}Open in browser: file://{Path(output_path).absolute()}{Colors.RESET}\n")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    # Default test plan path
+    default_path = Path(__file__).parent / 'testsprite_tests' / 'testsprite_backend_test_plan.json'
 
-        print(f"{Colors.GREEN}HTML report saved to: {output_path}{Colors.RESET}")
-        print(f"{Colors.CYAN}Open in browser: file://{Path(output_path).absolute()}{Colors.RESET}\n")
+    parser = argparse.ArgumentParser(description='Run a JSON API test plan')
+    parser.add_argument('test_plan', nargs='?', default=str(default_path), help='Path to the test plan JSON file')
+    parser.add_argument('--workers', type=int, help='Run independent test cases concurrently (threads, or in-flight requests with --engine async; default: 1, or 100 with --engine async)')
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync', help='Execution engine: requests threads (sync) or asyncio/aiohttp (async)')
+    parser.add_argument('--local-server', choices=['inprocess', 'port'], help='Run against the built-in Petstore stand-in instead of base_url (in-process transport or a local port)')
+
+    validation_group = parser.add_argument_group('response validation')
+    validation_group.add_argument('--contract', nargs='?', const=DEFAULT_SPEC_PATH, metavar='SPEC', help='Also validate responses against the Swagger spec schemas (default spec: docs/petstore-swagger.json)')
+    validation_group.add_argument('--stream-bodies', action='store_true', help='Validate array bodies while reading them without keeping them; stop as soon as the result is settled (sync engine)')
+    validation_group.add_argument('--max-body-bytes', type=int, help=f'With --stream-bodies, stop reading an array body after N bytes (default: {DEFAULT_MAX_BODY_BYTES})')
+
+    report_group = parser.add_argument_group('reporting')
+    report_group.add_argument('--stream-report', metavar='PATH', help='Append results to an NDJSON file as they finish instead of keeping them in memory')
+    report_group.add_argument('--html-page-size', type=int, help='Split the HTML report into pages of N results')
+
+    cassette_group = parser.add_argument_group('record/replay')
+    cassette_group.add_argument('--cassette', metavar='PATH', help='Cassette file for recorded responses')
+    cassette_group.add_argument('--cassette-mode', choices=['record', 'replay', 'cache'], help='record: store every response; replay: serve only from the cassette; cache: serve fresh GETs, fetch and store the rest (default: replay)')
+    cassette_group.add_argument('--cache-ttl', type=float, help='Seconds a cached GET stays fresh in cache mode (default: 300)')
+    cassette_group.add_argument('--cache-size', type=int, help='Responses kept decoded in memory (default: 1024)')
+
+    http_group = parser.add_argument_group('connection pooling and resilience (overrides the plan "http" section)')
+    http_group.add_argument('--pool-size', type=int, help='Max keep-alive connections per host')
+    http_group.add_argument('--pool-connections', type=int, help='Number of per-host pools to keep')
+    http_group.add_argument('--pool-block', action='store_true', default=None, help='Wait for a free connection instead of opening extra ones')
+    http_group.add_argument('--no-keep-alive', dest='keep_alive', action='store_false', default=None, help='Close the connection after every request')
+    http_group.add_argument('--retries', type=int, help='Retries for idempotent requests on connection errors and 429/502/503/504')
+    http_group.add_argument('--backoff-factor', type=float, help='Retry n waits a random 0..factor * 2**(n-1) seconds (default: 0.5)')
+    http_group.add_argument('--backoff-max', type=float, help='Longest wait between retries, also for Retry-After (default: 30)')
+    http_group.add_argument('--rate-limit', type=float, metavar='RPS', help='Requests per second per host (default: unlimited until a 429)')
+    http_group.add_argument('--no-adaptive-rate', dest='adaptive_rate', action='store_false', default=None, help='Keep rate limits fixed instead of halving them on 429')
+    http_group.add_argument('--breaker-failures', type=int, metavar='N', help='Consecutive failures that open a host or endpoint circuit; 0 disables (default: 5)')
+    http_group.add_argument('--breaker-reset', type=float, metavar='SECONDS', help='How long an open circuit fails fast before a probe request (default: 30)')
+    http_group.add_argument('--timeout', type=float, help='Request timeout in seconds')
+
+    selection_group = parser.add_argument_group('test selection (from the run history)')
+    selection_group.add_argument('--history', default=run_history.DEFAULT_HISTORY_PATH, metavar='PATH', help=f'Run history file, updated after every run (default: {run_history.DEFAULT_HISTORY_PATH})')
+    selection_group.add_argument('--no-history', action='store_true', help='Neither read nor update the run history')
+    selection_group.add_argument('--only-failed', action='store_true', help='Run only test cases that failed on their last run')
+    selection_group.add_argument('--failed-first', action='store_true', help='Run test cases that failed on their last run first')
+    selection_group.add_argument('--changed-since', nargs='?', const='last', metavar='REV', help='Run only new or changed test cases: never run in their current form, or changed since a git revision')
+    selection_group.add_argument('--order', choices=['plan', 'duration'], default='plan', help='duration: longest test cases first, by their last duration (better packing with --workers)')
+
+    watch_group = parser.add_argument_group('watch mode')
+    watch_group.add_argument('--watch', action='store_true', help='Keep running: after each save of the plan, rerun only new or changed test cases, reusing fixtures and connections')
+    watch_group.add_argument('--watch-interval', type=float, default=0.2, metavar='SECONDS', help='How often to check the plan for changes (default: 0.2)')
+
+    profile_group = parser.add_argument_group('profiling')
+    profile_group.add_argument('--profile', nargs='?', const='phases', choices=profiling.CAPTURE_MODES,
+                               help='Time each runner phase and write test_report.profile.json; cprofile also writes '
+                                    'test_report.prof (main thread), sample writes test_report.folded stacks of all threads')
+    profile_group.add_argument('--profile-interval', type=float, default=profiling.DEFAULT_SAMPLE_INTERVAL * 1000,
+                               help='Milliseconds between stack samples with --profile sample (default: 5)')
+
+    args = parser.parse_args(argv)
+    if args.no_history and (args.only_failed or args.failed_first or args.changed_since or args.order != 'plan'):
+        parser.error('--only-failed, --failed-first, --changed-since and --order need the run history')
+    if args.watch and (args.engine == 'async' or args.stream_report or args.profile):
+        parser.error('--watch runs on the sync engine and cannot be combined with --stream-report or --profile')
+    if args.watch and (args.only_failed or args.failed_first or args.changed_since or args.order != 'plan'):
+        parser.error('--watch selects changed test cases itself; drop --only-failed, --failed-first, --changed-since and --order')
+    return args
+
+
+def http_config_from_args(args: argparse.Namespace) -> Dict:
+    """Collect connection pooling overrides from parsed CLI arguments"""
+    return {
+        'pool_size': args.pool_size,
+        'pool_connections': args.pool_connections,
+        'pool_block': args.pool_block,
+        'keep_alive': args.keep_alive,
+        'retries': args.retries,
+        'backoff_factor': args.backoff_factor,
+        'backoff_max': args.backoff_max,
+        'rate_limit': args.rate_limit,
+        'adaptive_rate': args.adaptive_rate,
+        'breaker_failures': args.breaker_failures,
+        'breaker_reset': args.breaker_reset,
+        'timeout': args.timeout
+    }
+
+
+def cassette_config_from_args(args: argparse.Namespace) -> Dict:
+    """Collect record/replay settings from parsed CLI arguments"""
+    return {
+        'path': args.cassette,
+        'mode': args.cassette_mode,
+        'ttl': args.cache_ttl,
+        'max_entries': args.cache_size
+    }
 
 
 def main():
     """Main entry point"""
-    # Default test plan path
-    default_path = Path(__file__).parent / 'testsprite_tests' / 'testsprite_backend_test_plan.json'
-
-    # Check if custom path provided
-    test_plan_path = sys.argv[1] if len(sys.argv) > 1 else str(default_path)
+    args = parse_args()
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    options = {}
+    if args.workers is not None:
+        # Otherwise each engine keeps its own default
+        options['workers'] = args.workers
+    if args.engine == 'async':
+        from async_runner import AsyncTestRunner
+        runner_class = AsyncTestRunner
+    elif args.watch:
+        from watch import WatchRunner
+        runner_class = WatchRunner
+        options['interval'] = args.watch_interval
+    else:
+        runner_class = TestRunner
+
+    profiler = None
+    if args.profile:
+        profiler = profiling.Profiler(args.profile, sample_interval=args.profile_interval / 1000)
+        profiler.start()
 
     # Create and run test runner
-    runner = TestRunner(test_plan_path)
-    exit_code = runner.run_all_tests()
+    runner = runner_class(
+        args.test_plan,
+        http_config=http_config_from_args(args),
+        stream_path=args.stream_report,
+        html_page_size=args.html_page_size,
+        local_server=args.local_server,
+        cassette=cassette_config_from_args(args),
+        contract=args.contract,
+        stream_bodies=args.stream_bodies,
+        max_body_bytes=args.max_body_bytes,
+        profiler=profiler,
+        **options
+    )
+
+    history = None if args.no_history else run_history.RunHistory(args.history)
+    if args.watch:
+        try:
+            exit_code = runner.watch(history)
+        finally:
+            runner.close()
+        sys.exit(exit_code)
+    if history and (args.only_failed or args.failed_first or args.changed_since or args.order != 'plan'):
+        try:
+            selected = runner.select_tests(history, only_failed=args.only_failed, changed_since=args.changed_since,
+                                           failed_first=args.failed_first, order=args.order)
+        except ValueError as e:
+            runner.close()
+            print(f"{Colors.RED}Error: --changed-since: {e}{Colors.RESET}")
+            sys.exit(1)
+        if selected == 0:
+            runner.close()
+            print(f"{Colors.GREEN}No test cases selected - nothing to run{Colors.RESET}\n")
+            sys.exit(0)
+
+    try:
+        exit_code = runner.run_all_tests()
+    finally:
+        runner.close()
     runner.save_report('test_report.json')
     runner.save_html_report('test_report.html')
+    if profiler:
+        print_profile(profiler, 'test_report.json')
+    if history:
+        history.record(run_history.plan_keys(runner.test_plan, Path(runner.test_plan_path).parent),
+                       runner.iter_results(), runner.test_plan_path)
+        history.save()
 
     # Exit with appropriate code
     sys.exit(exit_code)
@@ -0,0 +1,39 @@
+"""Chunk-boundary checks for the incremental JSON readers in json_stream.py"""
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_stream import JsonArrayParser, JsonEventReader  # noqa: E402
+
+DOCUMENT = b'{"a": 1.5, "b": 2, "c": -3e2, "item": [1.25, {"x": 10, "y": [1e1]}, 7], "d": 4}'
+
+EXPECTED = [
+    ('enter', 0), ('member', 'a', 1.5), ('member', 'b', 2), ('member', 'c', -300.0),
+    ('begin', 'item'), ('value', 1.25), ('enter', 1), ('member', 'x', 10), ('member', 'y', [10.0]),
+    ('leave', 1), ('value', 7), ('end', 'item'), ('member', 'd', 4), ('leave', 0)
+]
+
+
+def read_events(chunk_size: int):
+    reader = JsonEventReader(io.BytesIO(DOCUMENT))
+    reader.CHUNK_SIZE = chunk_size
+    return list(reader.events())
+
+
+def test_event_reader_numbers_split_across_chunks():
+    for chunk_size in range(1, len(DOCUMENT) + 1):
+        assert read_events(chunk_size) == EXPECTED, f"chunk size {chunk_size}"
+
+
+def test_array_parser_numbers_split_across_chunks():
+    document = b'[1.5, 2, -3e2, {"x": 1.25}, 7]'
+    for chunk_size in range(1, len(document) + 1):
+        parser = JsonArrayParser()
+        items = []
+        for start in range(0, len(document), chunk_size):
+            items += parser.feed(document[start:start + chunk_size])
+        items += parser.feed(b'', final=True)
+        assert items == [1.5, 2, -300.0, {'x': 1.25}, 7], f"chunk size {chunk_size}"
@@ -0,0 +1,334 @@
+"""
+Request timing instrumentation
+High-resolution per-phase request timings (DNS, connect, TLS, time to first
+byte, body download, validation) and mergeable HDR-style latency histograms
+"""
+
+import math
+import socket
+import threading
+import time
+from typing import Dict, List
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+PHASES = ('dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms', 'download_ms', 'validation_ms')
+
+# Per-thread phase accumulator for the request currently being sent
+_state = threading.local()
+
+
+def begin_phases() -> Dict:
+    """Start collecting connection phases for a request on this thread"""
+    phases = {'dns_ms': 0.0, 'connect_ms': 0.0, 'tls_ms': 0.0}
+    _state.phases = phases
+    return phases
+
+
+def end_phases():
+    """Stop collecting connection phases on this thread"""
+    _state.phases = None
+
+
+def _current_phases():
+    return getattr(_state, 'phases', None)
+
+
+class _TimedConnectionMixin:
+    """Times DNS resolution and TCP connect separately when a new connection is opened"""
+
+    def _new_conn(self) -> socket.socket:
+        phases = _current_phases()
+        host = getattr(self, '_dns_host', self.host)
+        start = time.perf_counter()
+
+        try:
+            addresses = socket.getaddrinfo(host.strip('[]'), self.port, connection.allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        resolved = time.perf_counter()
+        error = None
+        sock = None
+
+        # Connect to the resolved addresses directly so DNS isn't repeated inside create_connection
+        for *_, sockaddr in addresses:
+            try:
+                sock = connection.create_connection(
+                    (sockaddr[0], self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+                break
+            except socket.timeout as e:
+                raise ConnectTimeoutError(
+                    self,
+                    f"Connection to {self.host} timed out. (connect timeout={self.timeout})",
+                ) from e
+            except OSError as e:
+                error = e
+
+        if sock is None:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+        if phases is not None:
+            phases['dns_ms'] += (resolved - start) * 1000
+            phases['connect_ms'] += (time.perf_counter() - resolved) * 1000
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        """Attribute the time spent after the TCP connect to the TLS handshake"""
+        phases = _current_phases()
+        before = dict(phases) if phases is not None else None
+        start = time.perf_counter()
+
+        super().connect()
+
+        if phases is not None:
+            elapsed = (time.perf_counter() - start) * 1000
+            socket_ms = (phases['dns_ms'] - before['dns_ms']) + (phases['connect_ms'] - before['connect_ms'])
+            phases['tls_ms'] += max(0.0, elapsed - socket_ms)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open connections that report DNS/connect/TLS phases"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+
+# Histogram layout: values below 128us are exact, above that every power of two
+# is split into 64 linear sub-buckets (~1.6% worst-case relative error)
+_SUB_BUCKETS = 128
+_HALF = _SUB_BUCKETS // 2
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - 7
+    return _SUB_BUCKETS + (shift - 1) * _HALF + ((value_us >> shift) - _HALF)
+
+
+def _bucket_upper(index: int) -> int:
+    """Highest microsecond value that falls into a bucket"""
+    if index < _SUB_BUCKETS:
+        return index
+    shift = (index - _SUB_BUCKETS) // _HALF + 1
+    sub_bucket = (index - _SUB_BUCKETS) % _HALF + _HALF
+    return ((sub_bucket + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Mergeable log-linear latency histogram with microsecond resolution"""
+
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def record(self, value_ms: float):
+        value_us = max(0, int(value_ms * 1000))
+        index = _bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if other.count:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile(self, pct: float) -> float:
+        """Value (ms) at or below which pct% of recordings fall"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(_bucket_upper(index), self.min_us), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def chart(self, bins: int = 20) -> List[Dict]:
+        """Coarse log-scale distribution for report charts: [{'le_ms', 'count'}]"""
+        if not self.count:
+            return []
+        low = math.log10(max(self.min_us, 1))
+        high = math.log10(max(self.max_us, 1)) + 1e-9
+        step = (high - low) / bins or 1
+        counts = [0] * bins
+        for index, count in self.counts.items():
+            value = max(min(_bucket_upper(index), self.max_us), 1)
+            position = min(bins - 1, int((math.log10(value) - low) / step))
+            counts[max(0, position)] += count
+        return [
+            {'le_ms': round(10 ** (low + step * (i + 1)) / 1000, 3), 'count': count}
+            for i, count in enumerate(counts)
+        ]
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'min': round((self.min_us or 0) / 1000, 3),
+            'mean': round(self.total_us / self.count / 1000, 3) if self.count else 0,
+            'p50': round(self.percentile(50), 3),
+            'p90': round(self.percentile(90), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max_us / 1000, 3)
+        }
+
+    def state(self) -> Dict:
+        """Serializable form, for merging histograms across processes"""
+        return {
+            'counts': self.counts,
+            'count': self.count,
+            'total_us': self.total_us,
+            'min_us': self.min_us,
+            'max_us': self.max_us
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in state['counts'].items()}
+        histogram.count = state['count']
+        histogram.total_us = state['total_us']
+        histogram.min_us = state['min_us']
+        histogram.max_us = state['max_us']
+        return histogram
+
+
+class PhaseHistograms:
+    """Histograms of the total duration and of every timing phase for one group"""
+
+    __slots__ = ('total', 'phases')
+
+    def __init__(self):
+        self.total = LatencyHistogram()
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+
+    def record(self, result: Dict):
+        self.total.record(result['duration_ms'])
+        for phase, value in (result.get('timings') or {}).items():
+            if phase in self.phases and value is not None:
+                self.phases[phase].record(value)
+
+    def merge(self, other: 'PhaseHistograms'):
+        self.total.merge(other.total)
+        for phase, histogram in other.phases.items():
+            self.phases[phase].merge(histogram)
+
+    def state(self) -> Dict:
+        return {
+            'total': self.total.state(),
+            'phases': {phase: histogram.state() for phase, histogram in self.phases.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'PhaseHistograms':
+        histograms = cls()
+        histograms.total = LatencyHistogram.from_state(state['total'])
+        histograms.phases = {phase: LatencyHistogram.from_state(h) for phase, h in state['phases'].items()}
+        return histograms
+
+    def summary(self, chart: bool = False) -> Dict:
+        summary = self.total.summary()
+        summary['phases_mean_ms'] = {
+            phase: (round(histogram.total_us / histogram.count / 1000, 3) if histogram.count else 0)
+            for phase, histogram in self.phases.items()
+        }
+        summary['phases'] = {phase: histogram.summary() for phase, histogram in self.phases.items()}
+        if chart:
+            summary['chart'] = self.total.chart()
+        return summary
+
+
+class LatencyRecorder:
+    """Per-endpoint and per-requirement phase histograms for a run"""
+
+    def __init__(self):
+        self.overall = PhaseHistograms()
+        self.endpoints = {}
+        self.requirements = {}
+
+    def record(self, result: Dict, endpoint: str, requirement: str):
+        # Results that never got a response carry no latency information
+        if result.get('response_status') is None:
+            return
+        self.overall.record(result)
+        self.endpoints.setdefault(endpoint, PhaseHistograms()).record(result)
+        self.requirements.setdefault(requirement, PhaseHistograms()).record(result)
+
+    def merge(self, other: 'LatencyRecorder'):
+        self.overall.merge(other.overall)
+        for name, histograms in other.endpoints.items():
+            self.endpoints.setdefault(name, PhaseHistograms()).merge(histograms)
+        for name, histograms in other.requirements.items():
+            self.requirements.setdefault(name, PhaseHistograms()).merge(histograms)
+
+    def state(self) -> Dict:
+        """Serializable form, for merging recorders across processes"""
+        return {
+            'overall': self.overall.state(),
+            'endpoints': {name: h.state() for name, h in self.endpoints.items()},
+            'requirements': {name: h.state() for name, h in self.requirements.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'LatencyRecorder':
+        recorder = cls()
+        recorder.overall = PhaseHistograms.from_state(state['overall'])
+        recorder.endpoints = {name: PhaseHistograms.from_state(h) for name, h in state['endpoints'].items()}
+        recorder.requirements = {name: PhaseHistograms.from_state(h) for name, h in state['requirements'].items()}
+        return recorder
+
+    def summary(self) -> Dict:
+        return {
+            'phases': list(PHASES),
+            'overall': self.overall.summary(chart=True),
+            'endpoints': {name: h.summary() for name, h in sorted(self.endpoints.items())},
+            'requirements': {name: h.summary() for name, h in self.requirements.items()}
+        }
+
+
+def endpoint_key(test_case: Dict) -> str:
+    """Group requests by method and unresolved path without query string"""
+    path = test_case.get('path', '/').split('?')[0]
+    return f"{test_case.get('method', 'GET').upper()} {path}"
+
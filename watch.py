@@ -0,0 +1,303 @@
+"""
+Watch mode
+Keeps one TestRunner alive while a plan is being edited: every save is parsed,
+diffed against the previous parse, and only new or changed test cases (with
+their dependency groups) run again. Fixtures whose definition is unchanged
+stay alive between runs, and so do the pooled session and the local server.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import parameters
+import placeholders
+import run_history
+from plan_loader import PlanError, load_plan
+from results import ResultColumns
+from test_runner import Colors, TestRunner, dependency_units, topological_order
+from timing import LatencyRecorder
+
+# Seconds between checks of the watched files
+DEFAULT_INTERVAL = 0.2
+
+
+def file_signature(path: str):
+    """(mtime, size) of a file, or None while it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def dependents_closure(deps: Dict[str, Set[str]], names: Set[str]) -> Set[str]:
+    """`names` plus every fixture that (transitively) references one of them"""
+    closure = set(names)
+    grown = True
+    while grown:
+        grown = False
+        for name, name_deps in deps.items():
+            if name not in closure and name_deps & closure:
+                closure.add(name)
+                grown = True
+    return closure
+
+
+def requirement_settings(plan: Dict) -> Dict:
+    """Requirement id -> the requirement without its test cases (depends_on, serial, ...)"""
+    return {
+        req.get('id'): {key: value for key, value in req.items() if key != 'test_cases'}
+        for req in plan.get('requirements', [])
+    }
+
+
+class WatchRunner(TestRunner):
+    """TestRunner that stays up and reruns what changes in its plan"""
+
+    def __init__(self, test_plan_path: str, interval: float = DEFAULT_INTERVAL, report_path: str = 'test_report.json',
+                 html_report_path: str = 'test_report.html', **options):
+        super().__init__(test_plan_path, **options)
+        self.interval = interval
+        self.report_path = report_path
+        self.html_report_path = html_report_path
+        self.full_plan = self.test_plan
+        self.base_dir = Path(test_plan_path).parent
+        self.case_keys = run_history.plan_keys(self.test_plan, self.base_dir)
+        self.dirty = set()  # fixtures a non-GET test case may have changed or deleted since they were created
+
+    def _watched_paths(self) -> Set[str]:
+        """The plan and the data files its parameterized cases read"""
+        paths = {self.test_plan_path}
+        for req in self.full_plan.get('requirements', []):
+            for test_case in req.get('test_cases', []):
+                if 'source' in test_case.get('parameters', {}):
+                    paths.add(str(parameters.source_path(test_case['parameters'], self.base_dir)))
+        return paths
+
+    def _use_plan(self, plan: Dict):
+        """Point the runner at a parsed plan; compiled templates are per case object, so they start over"""
+        self.full_plan = plan
+        self.test_plan = plan
+        self.fixtures = plan.get('fixtures', {})
+        self.auth = plan.get('authentication', {})
+        self.templates.clear()
+        self.rendered.clear()
+
+    def _reload(self) -> Optional[Dict]:
+        """The plan as saved now, or None (with the reason printed) if it can't be used yet"""
+        try:
+            return load_plan(self.test_plan_path)
+        except FileNotFoundError:
+            print(f"{Colors.YELLOW}Test plan {self.test_plan_path} is gone; waiting for it to come back{Colors.RESET}")
+        except json.JSONDecodeError as e:
+            print(f"{Colors.RED}Error: Invalid JSON in test plan: {e}{Colors.RESET}")
+        except PlanError as e:
+            print(f"{Colors.RED}Error: Invalid test plan: {e}{Colors.RESET}")
+        return None
+
+    def _check_plan(self, plan: Dict):
+        """(fixture graph, schedule) of a new plan, or None if it would stop a normal run
+
+        The runner is left on the previous plan either way.
+        """
+        previous = self.full_plan
+        try:
+            self._use_plan(plan)
+            self._compile_plan()
+            return self._build_fixture_graph(), self._build_schedule()
+        except SystemExit:
+            # The checks print their error and exit; in watch mode the next save gets another chance
+            return None
+        finally:
+            self._use_plan(previous)
+
+    def _case_fixtures(self, test_case: Dict) -> Set[str]:
+        """Names of the fixtures a test case references"""
+        path_template, body_template = self._templates_for(test_case)
+        referenced = placeholders.references(path_template) | placeholders.references(body_template)
+        return {name for name, _ in referenced if name in self.fixtures and name != 'cleanup'}
+
+    def _discard_fixtures(self, names: Set[str]):
+        """Run the current plan's cleanup steps for `names` and forget their data"""
+        _, cleanup_deps = self.fixture_graph
+        steps = [
+            position for position in topological_order(cleanup_deps)
+            if self._fixture_references(self.fixtures['cleanup'][position]) & names
+        ]
+        for position in steps:
+            self._run_cleanup_step(position)
+        with self.fixture_lock:
+            for name in names:
+                self.fixture_data.pop(name, None)
+            self.fixture_generation += 1
+        self.dirty -= names
+
+    def _create_fixtures(self, names: Set[str]):
+        """Create fixtures of the current plan in dependency order"""
+        setup_deps, _ = self.fixture_graph
+        for name in topological_order({name: setup_deps[name] & names for name in names}):
+            self._create_fixture(name)
+        if names:
+            print()
+            self._check_fixture_fields()
+
+    def _update_fixtures(self, plan: Dict, graph) -> Set[str]:
+        """Recreate fixtures whose definition changed, and those built on them; returns their names
+
+        Everything else keeps the data created by the first run.
+        """
+        old_fixtures = self.fixtures
+        new_fixtures = plan.get('fixtures', {})
+        old_names = set(old_fixtures) - {'cleanup'}
+        new_names = set(new_fixtures) - {'cleanup'}
+
+        changed = {name for name in new_names if old_fixtures.get(name) != new_fixtures[name]}
+        # A local stand-in replaces base_url for the whole session; otherwise a new base_url means a new server
+        moved = self.base_url == self.full_plan.get('base_url', 'http://localhost:3000') and \
+            plan.get('base_url') != self.full_plan.get('base_url')
+        if moved:
+            changed = set(new_names)
+        new_setup_deps, _ = graph
+        recreate = dependents_closure(new_setup_deps, changed)
+
+        old_setup_deps, _ = self.fixture_graph
+        discard = dependents_closure(old_setup_deps, (recreate & old_names) | (old_names - new_names))
+        recreate |= discard & new_names
+
+        if discard or recreate:
+            print(f"{Colors.BOLD}{Colors.YELLOW}Updating changed fixtures...{Colors.RESET}\n")
+        self._discard_fixtures(discard)
+
+        self._use_plan(plan)
+        self.fixture_graph = graph
+        if moved:
+            self.base_url = plan.get('base_url', 'http://localhost:3000')
+        self._create_fixtures(recreate)
+        return recreate
+
+    def _refresh_fixtures(self, schedule: List[Dict]):
+        """Recreate the dirty fixtures a schedule uses, so reruns start from fresh fixture data"""
+        used = set()
+        for entry in schedule:
+            used |= self._case_fixtures(entry['test_case'])
+        setup_deps, _ = self.fixture_graph
+        stale = dependents_closure(setup_deps, used & self.dirty)
+        if not stale:
+            return
+        print(f"{Colors.BOLD}{Colors.YELLOW}Recreating fixtures modified by earlier runs...{Colors.RESET}\n")
+        self._discard_fixtures(stale)
+        self._create_fixtures(stale)
+
+    def _changed_cases(self, plan: Dict, previous: Dict, schedule: List[Dict], recreated: Set[str]) -> Set[str]:
+        """Ids of test cases that must run again after `previous` became `plan`"""
+        keys = run_history.plan_keys(plan, self.base_dir)
+        # The key covers the case, the plan's base_url/authentication and the fixtures it references
+        changed = {test_id for test_id, key in keys.items() if self.case_keys.get(test_id) != key}
+        self.case_keys = keys
+
+        old_requirements = requirement_settings(previous)
+        new_requirements = requirement_settings(plan)
+        for req in plan.get('requirements', []):
+            if old_requirements.get(req.get('id')) != new_requirements[req.get('id')]:
+                changed.update(test_case.get('id', 'UNKNOWN') for test_case in req.get('test_cases', []))
+
+        for entry in schedule:
+            if self._case_fixtures(entry['test_case']) & recreated:
+                changed.add(entry['test_case'].get('id', 'UNKNOWN'))
+        return changed
+
+    def _reset_results(self):
+        self.results = {'passed': 0, 'failed': 0, 'total': 0, 'details': ResultColumns()}
+        self.latency = LatencyRecorder()
+
+    def _run_round(self, schedule: List[Dict], history: run_history.RunHistory = None) -> int:
+        """Run a schedule of the current (possibly narrowed) plan, then report it like a normal run"""
+        self._reset_results()
+        self._refresh_fixtures(schedule)
+        try:
+            self._run_tests(schedule)
+        finally:
+            self.test_plan = self.full_plan
+            for entry in schedule:
+                if entry['test_case'].get('method', 'GET').upper() != 'GET':
+                    self.dirty |= self._case_fixtures(entry['test_case'])
+        self._print_summary()
+        self.save_report(self.report_path)
+        self.save_html_report(self.html_report_path)
+        if history:
+            history.record(self.case_keys, self.iter_results(), self.test_plan_path)
+            history.save()
+        return 1 if self.results['failed'] > 0 else 0
+
+    def _rerun(self, history: run_history.RunHistory = None) -> Optional[int]:
+        """Apply the saved plan and run what changed; None if nothing ran"""
+        plan = self._reload()
+        if plan is None:
+            return None
+        checked = self._check_plan(plan)
+        if checked is None:
+            print(f"{Colors.YELLOW}Plan not applied; still watching{Colors.RESET}")
+            return None
+        graph, schedule = checked
+        stamp = datetime.now().strftime('%H:%M:%S')
+        print(f"{Colors.BOLD}{Colors.CYAN}[{stamp}] {self.test_plan_path} changed{Colors.RESET}\n")
+
+        previous = self.full_plan
+        if plan.get('http') != previous.get('http'):
+            print(f"{Colors.YELLOW}Note: the \"http\" section changed; restart --watch to apply it{Colors.RESET}\n")
+        recreated = self._update_fixtures(plan, graph)
+        changed = self._changed_cases(plan, previous, schedule, recreated)
+
+        units = [unit for unit in dependency_units(schedule)
+                 if any(schedule[index]['test_case'].get('id', 'UNKNOWN') in changed for index in unit)]
+        selected = sum(len(unit) for unit in units)
+        if not selected:
+            print(f"{Colors.CYAN}No test case changed{Colors.RESET}")
+            return None
+
+        print(f"{Colors.BOLD}Running:{Colors.RESET} {selected} of {len(schedule)} test cases\n")
+        self.test_plan = dict(plan)
+        self._narrow_plan(schedule, units)
+        return self._run_round(self._build_schedule(), history)
+
+    def watch(self, history: run_history.RunHistory = None) -> int:
+        """Run the whole plan, then rerun changes on every save until interrupted
+
+        Returns the exit code of the latest run. Fixtures are cleaned up on the way out.
+        """
+        self._print_header()
+        schedule = self._build_schedule()
+        exit_code = 0
+        try:
+            with self.profiler.phase('fixtures'):
+                self._setup_fixtures()
+            if self.fixture_graph is None:
+                self.fixture_graph = ({}, {})
+            exit_code = self._run_round(schedule, history)
+
+            signatures = {path: file_signature(path) for path in self._watched_paths()}
+            print(f"{Colors.CYAN}Watching {len(signatures)} file(s) for changes (Ctrl+C to stop)...{Colors.RESET}")
+            while True:
+                time.sleep(self.interval)
+                current = {path: file_signature(path) for path in signatures}
+                if current == signatures:
+                    continue
+                start = time.perf_counter()
+                code = self._rerun(history)
+                if code is not None:
+                    exit_code = code
+                # Signatures from before the reload, so a save during the run triggers another one
+                signatures = {path: current[path] if path in current else file_signature(path)
+                              for path in self._watched_paths()}
+                print(f"{Colors.CYAN}Done in {time.perf_counter() - start:.2f}s. Watching for changes "
+                      f"(Ctrl+C to stop)...{Colors.RESET}")
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}Stopping watch mode{Colors.RESET}")
+        finally:
+            with self.profiler.phase('fixtures'):
+                self._cleanup_fixtures()
+        return exit_code